@@ -0,0 +1,176 @@
+"""League-wide aggregation: ORM iteration vs SQLite SQL vs DuckDB on Parquet.
+
+Exports a ``parquet_snapshot`` of the database into a temporary directory
+(one sorted file per table, and with ``--partition-by-team`` also the
+per-team layout) and times the ``team_scoring`` aggregate three ways:
+
+* ``orm`` - iterating ``Player_Stats`` through SQLModel and summing in Python
+* ``sqlite`` - the same aggregate as SQL on the SQLite database
+* ``duckdb`` - ``parquet_snapshot.ANALYTICS_QUERIES['team_scoring']`` over
+  the snapshot
+
+and checks the three agree.  It also prints the size of each table as
+Parquet, as CSV and in the database.  Needs ``pyarrow`` and ``duckdb``.
+
+    python -m benchmarks.bench_analytics --scale 100
+    python -m benchmarks.bench_analytics --db ncaa_hockey.db --partition-by-team
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+
+def best_of(fn: Callable, repeat: int) -> Tuple[float, object]:
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def scoring_orm() -> Dict[str, Tuple[int, int]]:
+    from sqlmodel import Session, select
+
+    from models import Player_Stats, read_engine
+
+    totals: Dict[str, List[int]] = {}
+    with Session(read_engine) as session:
+        for row in session.exec(select(Player_Stats)):
+            t = totals.setdefault(row.team, [0, 0])
+            t[0] += row.G or 0
+            t[1] += row.TP or 0
+    return {team: tuple(t) for team, t in totals.items()}
+
+
+def scoring_sqlite() -> Dict[str, Tuple[int, int]]:
+    from sqlalchemy import text
+
+    from models import read_engine
+
+    with read_engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT team, coalesce(sum(G), 0), coalesce(sum(TP), 0) FROM player_stats GROUP BY team"))
+        return {team: (goals, points) for team, goals, points in rows}
+
+
+def scoring_duckdb(con) -> Dict[str, Tuple[int, int]]:
+    from parquet_snapshot import ANALYTICS_QUERIES, run_query
+
+    columns, rows = run_query(con, ANALYTICS_QUERIES['team_scoring'])
+    team, goals, points = (columns.index(c) for c in ('team', 'goals', 'points'))
+    return {r[team]: (r[goals] or 0, r[points] or 0) for r in rows}
+
+
+def csv_bytes(db_path: str, directory: str) -> Dict[str, int]:
+    """Dump each snapshot table to CSV (same columns) and return the sizes."""
+    import sqlite3
+
+    from parquet_snapshot import EXCLUDED_COLUMNS, SNAPSHOT_TABLES
+
+    sizes = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        for table in SNAPSHOT_TABLES:
+            cursor = conn.execute(f"SELECT * FROM {table}")
+            names = [d[0] for d in cursor.description]
+            keep = [i for i, name in enumerate(names) if name not in EXCLUDED_COLUMNS]
+            path = os.path.join(directory, f"{table}.csv")
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow([names[i] for i in keep])
+                writer.writerows([row[i] for i in keep] for row in cursor)
+            sizes[table] = os.path.getsize(path)
+    finally:
+        conn.close()
+    return sizes
+
+
+def table_bytes(db_path: str) -> Dict[str, int]:
+    """Pages each table and its indexes take up in the database."""
+    import sqlite3
+
+    from parquet_snapshot import SNAPSHOT_TABLES
+
+    conn = sqlite3.connect(db_path)
+    try:
+        sizes = {}
+        for table in SNAPSHOT_TABLES:
+            names = [table] + [name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,))]
+            sizes[table] = conn.execute(
+                f"SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name IN ({','.join('?' * len(names))})",
+                names).fetchone()[0]
+        return sizes
+    except sqlite3.OperationalError:
+        # SQLite built without the dbstat table
+        return {}
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='database to benchmark (default: a synthetic one at --scale)')
+    parser.add_argument('--scale', type=float, default=100,
+                        help='size of the synthetic database, as a multiple of the real data')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per method; the best is reported')
+    parser.add_argument('--partition-by-team', action='store_true',
+                        help='also time a snapshot written one directory per team')
+    args = parser.parse_args()
+
+    db_path = args.db or f".bench/synthetic_x{args.scale:g}.db"
+    if not os.path.exists(db_path):
+        if args.db:
+            parser.error(f"{db_path} does not exist")
+        subprocess.run([sys.executable, "-m", "benchmarks.synthetic_db", "--scale", str(args.scale),
+                        "--db", db_path], check=True)
+    # models opens NCAA_DB_PATH when first imported
+    os.environ['NCAA_DB_PATH'] = os.path.abspath(db_path)
+    from parquet_snapshot import connect_snapshot, export_snapshot
+
+    with tempfile.TemporaryDirectory(prefix='bench_analytics_') as tmp:
+        layouts = {'sorted': False}
+        if args.partition_by_team:
+            layouts['by team'] = True
+        manifests, connections = {}, {}
+        for label, partitioned in layouts.items():
+            out = os.path.join(tmp, label.replace(' ', '_'))
+            started = time.perf_counter()
+            manifests[label] = export_snapshot(out, partition_by_team=partitioned, force=True)
+            print(f"exported {label} snapshot in {time.perf_counter() - started:.2f}s\n")
+            connections[label] = connect_snapshot(out)
+
+        methods = {'orm': scoring_orm, 'sqlite': scoring_sqlite}
+        for label, con in connections.items():
+            methods[f'duckdb ({label})'] = lambda con=con: scoring_duckdb(con)
+        print(f"{'team_scoring':<22}{'ms':>10}{'vs orm':>10}")
+        expected, orm_seconds = None, None
+        for name, fn in methods.items():
+            seconds, result = best_of(fn, args.repeat)
+            if expected is None:
+                expected, orm_seconds = result, seconds
+            elif result != expected:
+                sys.exit(f"{name} disagrees with the ORM totals")
+            print(f"{name:<22}{seconds * 1000:>10.1f}{orm_seconds / seconds:>9.0f}x")
+
+        csv_sizes = csv_bytes(db_path, tmp)
+        db_sizes = table_bytes(db_path)
+        print(f"\n{'table':<14}{'rows':>9}{'CSV KiB':>10}{'DB KiB':>10}"
+              + ''.join(f"{label + ' KiB':>15}" for label in layouts))
+        for table, size in csv_sizes.items():
+            info = manifests['sorted']['tables'][table]
+            db = f"{db_sizes[table] / 1024:.0f}" if table in db_sizes else 'n/a'
+            print(f"{table:<14}{info['rows']:>9}{size / 1024:>10.0f}{db:>10}"
+                  + ''.join(f"{m['tables'][table]['bytes'] / 1024:>15.0f}" for m in manifests.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""Repeatable API load scenarios against ``main.app``.
+
+Requests go through ``httpx.ASGITransport`` straight into the app, so no
+server or network is involved.  Each scenario is a fixed, seeded list of
+requests modelled on what the site does:
+
+* ``landing`` - ``/`` and ``/teams``
+* ``team_page`` - ``/team.html`` and ``/team/{team}/roster``
+* ``modal_clicks`` - ``/player/{first}/{last}?team=`` for random players
+* ``leaders``, ``search``, ``players_pages`` - the list endpoints
+
+For each scenario the requests are issued by ``--concurrency`` clients
+and throughput, p50/p95/p99 latency and SQL statements per request are
+reported and written to a JSON file.  ``--compare`` prints the change
+against an earlier results file.  The response cache is off unless
+``--cache`` is given.
+
+    python -m benchmarks.bench_api --scale 100 --output results.json
+    python -m benchmarks.bench_api --db ncaa_hockey.db --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.load_test import percentile
+
+LEADER_STATS = ["TP", "G", "A", "PIM", "GAA", "save_pct", "W"]
+SEARCH_TERMS = ["a", "jo", "mac", "smi", "eth", "bost", "tremb", "wyt"]
+
+
+def sample_data(db_path: str, seed: int, players: int = 500) -> Dict:
+    """Teams and players to build requests from, picked with ``seed``."""
+    conn = sqlite3.connect(db_path)
+    try:
+        teams = [team for (team,) in conn.execute("SELECT name FROM team ORDER BY name")]
+        max_id = conn.execute("SELECT max(player_id) FROM bio").fetchone()[0] or 0
+        rng = random.Random(seed)
+        ids = sorted({rng.randint(1, max_id) for _ in range(players)})
+        picked = conn.execute(
+            f"SELECT first_name, last_name, team FROM bio WHERE player_id IN ({','.join('?' * len(ids))})",
+            ids).fetchall()
+        counts = {table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+                  for table in ("bio", "player_stats", "goalie_stats", "team")}
+    finally:
+        conn.close()
+    return {"teams": teams, "players": picked, "max_id": max_id, "counts": counts}
+
+
+def build_scenarios(data: Dict, requests: int, seed: int) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    teams, players = data["teams"], data["players"]
+
+    def repeat(make):
+        return [path for _ in range(requests // len(make()) or 1) for path in make()][:requests]
+
+    return {
+        "landing": repeat(lambda: ["/", "/teams"]),
+        "team_page": repeat(lambda: ["/team.html", f"/team/{rng.choice(teams)}/roster"]),
+        "modal_clicks": [
+            "/player/{}/{}?team={}".format(*rng.choice(players)) for _ in range(requests)
+        ],
+        "leaders": [
+            f"/leaders/{rng.choice(LEADER_STATS)}?limit=25"
+            + (f"&team={rng.choice(teams)}" if rng.random() < 0.5 else "")
+            for _ in range(requests)
+        ],
+        "search": [f"/search?q={rng.choice(SEARCH_TERMS)}" for _ in range(requests)],
+        "players_pages": [
+            f"/players?limit=100&cursor={rng.randint(0, data['max_id'])}" for _ in range(requests)
+        ],
+    }
+
+
+async def _run_scenario(app, paths: List[str], concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(paths)
+
+    async def client_loop(client):
+        nonlocal errors
+        for path in queue:
+            start = time.perf_counter()
+            resp = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(paths),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(paths) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_scenarios(scenarios: Dict[str, List[str]], concurrency: int) -> Dict[str, Dict]:
+    """Run each scenario once as a warm-up and once measured; needs
+    ``NCAA_DB_PATH`` set before it is called (``main`` is imported here)."""
+    from sqlalchemy import event
+
+    import main
+
+    engine = main.async_read_engine.sync_engine if main.API_MODE == "async" else main.read_engine
+    statements = [0]
+
+    def count(*_args):
+        statements[0] += 1
+
+    results = {}
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        for name, paths in scenarios.items():
+            asyncio.run(_run_scenario(main.app, paths[: max(1, len(paths) // 10)], concurrency))
+            statements[0] = 0
+            result = asyncio.run(_run_scenario(main.app, paths, concurrency))
+            result["queries"] = statements[0]
+            result["queries_per_request"] = round(statements[0] / len(paths), 2)
+            results[name] = result
+            print_result(name, result)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return results
+
+
+def print_result(name: str, r: Dict):
+    print(f"{name:<14}{r['requests']:>9}{r['errors']:>7}{r['rps']:>10}"
+          f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['queries_per_request']:>9}")
+
+
+def compare(results: Dict[str, Dict], previous_path: str):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nchange against {previous_path} ({previous['meta'].get('commit') or 'unknown commit'}):")
+    print(f"{'scenario':<14}{'rps':>10}{'p99':>10}{'queries/req':>13}")
+    for name, r in results.items():
+        old = previous["scenarios"].get(name)
+        if not old:
+            continue
+
+        def pct(key):
+            return f"{(r[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else "n/a"
+        print(f"{name:<14}{pct('rps'):>10}{pct('p99_ms'):>10}"
+              f"{r['queries_per_request'] - old['queries_per_request']:>+13.2f}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="database to benchmark (default: a synthetic one at --scale)")
+    parser.add_argument("--scale", type=float, default=10,
+                        help="size of the synthetic database, as a multiple of the real data")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", help="run only these scenarios")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--cache", action="store_true", help="leave the API response cache enabled")
+    parser.add_argument("--output", default="bench_api.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    db_path = args.db or f".bench/synthetic_x{args.scale:g}.db"
+    if not os.path.exists(db_path):
+        if args.db:
+            parser.error(f"{db_path} does not exist")
+        # separate process: models binds to one database per process
+        subprocess.run([sys.executable, "-m", "benchmarks.synthetic_db", "--scale", str(args.scale),
+                        "--seed", str(args.seed), "--db", db_path], check=True)
+    os.environ["NCAA_DB_PATH"] = os.path.abspath(db_path)
+    os.environ["NCAA_API_MODE"] = args.mode
+    if not args.cache:
+        os.environ["NCAA_CACHE_MAX_MB"] = "0"
+
+    data = sample_data(db_path, args.seed)
+    scenarios = build_scenarios(data, args.requests, args.seed)
+    if args.scenarios:
+        scenarios = {name: scenarios[name] for name in args.scenarios}
+
+    print(f"{db_path}: " + ", ".join(f"{n} {t}" for t, n in data["counts"].items()))
+    print(f"{'scenario':<14}{'requests':>9}{'errors':>7}{'rps':>10}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/req':>9}")
+    results = run_scenarios(scenarios, args.concurrency)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "db": db_path,
+            "rows": data["counts"],
+            "mode": args.mode,
+            "cache": args.cache,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main_()
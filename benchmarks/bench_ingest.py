@@ -0,0 +1,299 @@
+"""Ingestion benchmark: where does a refresh spend its time?
+
+Times each stage of ingestion separately:
+
+* ``extract_next_data`` - team pages -> roster/skater/goalie rows through
+  ``next_data.load_page_props`` and the scrapers' extract functions
+* ``extract_html[backend]`` - the legacy roster table through
+  ``parse_html.parse_roster_html``, per installed backend
+* ``normalize`` - CSV rows -> column values (``csv.DictReader`` and the
+  ``*_init.py`` record mappers, ``parse_int`` included)
+* ``write_insert`` / ``write_unchanged`` - ``bulk_load.load_records`` into
+  an empty database, then the same data again (every row skipped by hash)
+
+Pages come from ``--fixtures DIR`` (saved ``*.html`` team pages) or are
+generated; CSVs are generated with ``benchmarks.synthetic_db`` at each
+``--scales`` size.  Every stage runs in a fresh process so its peak RSS is
+its own, with ``NCAA_DB_PATH`` pointing into a temporary directory, so
+``ncaa_hockey.db`` is never opened.  Results are printed and written to ``--output``.  With
+``--baseline`` (an earlier output file) the run fails (exit status 1) if a
+stage's rows/s drops, or its peak RSS grows, by more than ``--tolerance``
+percent; ``--min-rate STAGE=ROWS_PER_SEC`` sets absolute floors, for a
+stage (``normalize``) or one result (``normalize x10``); names this run
+doesn't have are an error.
+A stage that raises, or whose process dies, is reported as crashed and
+fails the run too.
+
+    python -m benchmarks.bench_ingest --scales 1 10 --output ingest.json
+    python -m benchmarks.bench_ingest --baseline ingest.json --tolerance 20
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import tempfile
+import time
+import traceback
+from typing import Callable, Dict, List
+
+from benchmarks import synthetic_db
+from benchmarks.bench_parse_html import available_backends
+from benchmarks.fixtures import load_pages
+
+CSV_FILES = ('players', 'skater_stats', 'goalie_stats')
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+# -- stages: each prepares its input and returns a function doing the timed
+# work, which returns the number of rows it produced or wrote
+
+def extract_next_data(fixtures: str, pages: int) -> Callable[[], int]:
+    from next_data import load_page_props
+    from scrape_all_teams import extract_roster
+    from scrape_goalie_stats import extract_goalie_stats
+    from scrape_skater_stats import extract_skater_stats
+
+    html_pages = load_pages(fixtures, pages)
+
+    def run():
+        rows = 0
+        for name, html in html_pages:
+            props = load_page_props(html, keys=('rosterList', 'skaterStats', 'goalieStats')) or {}
+            rows += len(extract_roster(props))
+            rows += len(extract_skater_stats(props, name))
+            rows += len(extract_goalie_stats(props, name))
+        return rows
+    return run
+
+
+def extract_html(fixtures: str, pages: int, backend: str) -> Callable[[], int]:
+    from parse_html import parse_roster_html
+
+    html_pages = load_pages(fixtures, pages)
+
+    def run():
+        return sum(len(parse_roster_html(html, name, backend)) for name, html in html_pages)
+    return run
+
+
+def normalize(csv_dir: str) -> Callable[[], int]:
+    from bio_init import bio_record
+    from goalie_init import goalie_record
+    from player_init import skater_record
+
+    mappers = dict(zip(CSV_FILES, (bio_record, skater_record, goalie_record)))
+
+    def run():
+        rows = 0
+        for name, mapper in mappers.items():
+            with open(os.path.join(csv_dir, f"{name}.csv"), newline='', encoding='utf-8') as f:
+                rows += sum(1 for r in map(mapper, csv.DictReader(f)) if r is not None)
+        return rows
+    return run
+
+
+def write(csv_dir: str) -> Callable[[], int]:
+    from bio_init import bio_record
+    from bulk_load import load_records
+    from goalie_init import goalie_record
+    from models import Bio, Goalie_Stats, Player_Stats
+    from player_init import skater_record
+
+    tables = [(Bio, 'players', bio_record), (Player_Stats, 'skater_stats', skater_record),
+              (Goalie_Stats, 'goalie_stats', goalie_record)]
+    # normalizing is its own stage; keep it out of this one
+    records = {}
+    for model, name, mapper in tables:
+        with open(os.path.join(csv_dir, f"{name}.csv"), newline='', encoding='utf-8') as f:
+            records[model] = [r for r in map(mapper, csv.DictReader(f)) if r is not None]
+
+    def run():
+        rows = 0
+        for model, _name, _mapper in tables:
+            result = load_records(model, records[model])
+            rows += result.inserted + result.updated + result.unchanged
+        return rows
+    return run
+
+
+STAGES = {
+    'extract_next_data': extract_next_data,
+    'extract_html': extract_html,
+    'normalize': normalize,
+    'write_insert': write,
+    'write_unchanged': write,
+}
+
+
+def _worker(stage: str, db_path: str, kwargs: Dict, results):
+    # models opens (and migrates) NCAA_DB_PATH when first imported, and the
+    # *_init mappers import it, so every stage gets a scratch database
+    os.environ['NCAA_DB_PATH'] = db_path
+    try:
+        run = STAGES[stage](**kwargs)
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        rows = run()
+        seconds = time.perf_counter() - started
+    except Exception:
+        # report it rather than leave run_stage waiting on the queue
+        results.put({'error': traceback.format_exc()})
+        return
+    peak = peak_rss_mb()
+    results.put({
+        'rows': rows,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+        'peak_rss_mb': round(peak, 1),
+        'rss_growth_mb': round(peak - rss_before, 1),
+    })
+
+
+def run_stage(stage: str, db_path: str, **kwargs) -> Dict:
+    """Run ``stage`` in a fresh process, with ``NCAA_DB_PATH`` set to
+    ``db_path``, and return its measurements, or ``{'error': ...}`` if the
+    stage raised or its process died."""
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    proc = ctx.Process(target=_worker, args=(stage, db_path, kwargs, results))
+    proc.start()
+    while True:
+        try:
+            result = results.get(timeout=1)
+            break
+        except queue.Empty:
+            # killed (OOM, signal) before it could put anything
+            if not proc.is_alive() and results.empty():
+                result = {'error': f"worker exited with status {proc.exitcode}"}
+                break
+    proc.join()
+    return result
+
+
+def check(results: Dict[str, Dict], baseline_path: str, tolerance: float,
+          min_rates: Dict[str, float]) -> List[str]:
+    """Threshold violations as printable lines."""
+    failures = []
+    baseline = {}
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)['stages']
+    for key, r in results.items():
+        if 'error' in r:
+            failures.append(f"{key}: crashed")
+            continue
+        old = baseline.get(key)
+        if old and 'error' in old:
+            old = None
+        if old and old['rows_per_sec'] and r['rows_per_sec'] < old['rows_per_sec'] * (1 - tolerance / 100):
+            failures.append(f"{key}: {r['rows_per_sec']} rows/s, baseline {old['rows_per_sec']}")
+        if old and r['peak_rss_mb'] > old['peak_rss_mb'] * (1 + tolerance / 100):
+            failures.append(f"{key}: peak RSS {r['peak_rss_mb']} MB, baseline {old['peak_rss_mb']}")
+        floor = min_rates.get(key, min_rates.get(stage_name(key)))
+        if floor is not None and r['rows_per_sec'] < floor:
+            failures.append(f"{key}: {r['rows_per_sec']} rows/s, minimum {floor:g}")
+    for name in unknown_stages(min_rates, results):
+        failures.append(f"--min-rate {name}: no such stage in this run")
+    return failures
+
+
+def stage_name(key: str) -> str:
+    """``extract_html[lxml]`` or ``normalize x10`` -> the stage it ran."""
+    return key.split(' ')[0].split('[')[0]
+
+
+def unknown_stages(min_rates: Dict[str, float], keys) -> List[str]:
+    """``min_rates`` names matching neither a stage nor a result key, so a
+    typo can't quietly switch a threshold off."""
+    known = set(keys) | {stage_name(key) for key in keys}
+    return sorted(name for name in min_rates if name not in known)
+
+
+def parse_min_rate(value: str):
+    stage, _, rate = value.partition('=')
+    if stage_name(stage) not in STAGES:
+        raise argparse.ArgumentTypeError(
+            f"unknown stage {stage!r}; expected one of {', '.join(STAGES)}")
+    try:
+        return stage, float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected STAGE=ROWS_PER_SEC, got {value!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', help='directory of saved team pages (*.html)')
+    parser.add_argument('--pages', type=int, default=50, help='generated pages when no --fixtures')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10],
+                        help='CSV sizes, as multiples of the real data')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--output', default='bench_ingest.json')
+    parser.add_argument('--baseline', help='earlier --output file to compare against')
+    parser.add_argument('--tolerance', type=float, default=25,
+                        help='allowed slowdown / RSS growth against --baseline, percent')
+    parser.add_argument('--min-rate', type=parse_min_rate, action='append', default=[],
+                        metavar='STAGE=ROWS_PER_SEC')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_ingest_') as tmp:
+        # (result key, stage, NCAA_DB_PATH, stage arguments)
+        scratch_db = os.path.join(tmp, 'scratch.db')
+        jobs = []
+        if 'extract_next_data' in args.stages:
+            jobs.append(('extract_next_data', 'extract_next_data', scratch_db,
+                         dict(fixtures=args.fixtures, pages=args.pages)))
+        if 'extract_html' in args.stages:
+            for backend in available_backends():
+                jobs.append((f"extract_html[{backend}]", 'extract_html', scratch_db,
+                             dict(fixtures=args.fixtures, pages=args.pages, backend=backend)))
+        for scale in args.scales:
+            csv_dir = os.path.join(tmp, f"x{scale:g}")
+            # write_insert and write_unchanged share one database per scale
+            db_path = os.path.join(tmp, f"x{scale:g}.db")
+            for stage in ('normalize', 'write_insert', 'write_unchanged'):
+                if stage in args.stages:
+                    jobs.append((f"{stage} x{scale:g}", stage,
+                                 scratch_db if stage == 'normalize' else db_path,
+                                 dict(csv_dir=csv_dir)))
+        unknown = unknown_stages(dict(args.min_rate), [key for key, *_rest in jobs])
+        if unknown:
+            parser.error(f"--min-rate for stages this run doesn't have: {', '.join(unknown)}")
+
+        for scale in args.scales:
+            synthetic_db.write_csvs(os.path.join(tmp, f"x{scale:g}"), scale)
+
+        print(f"{'stage':<30}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'peak MB':>10}{'+MB':>8}")
+        results = {}
+        for key, stage, stage_db, kwargs in jobs:
+            r = results[key] = run_stage(stage, stage_db, **kwargs)
+            if 'error' in r:
+                print(f"{key:<30}CRASHED\n{r['error'].rstrip()}")
+                continue
+            print(f"{key:<30}{r['rows']:>10}{r['seconds']:>10.3f}{r['rows_per_sec']:>12.0f}"
+                  f"{r['peak_rss_mb']:>10.1f}{r['rss_growth_mb']:>8.1f}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'fixtures': args.fixtures or f"{args.pages} generated pages",
+                   'stages': results}, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    failures = check(results, args.baseline, args.tolerance, dict(args.min_rate))
+    for line in failures:
+        print(f"FAIL {line}")
+    if args.baseline or args.min_rate or failures:
+        print("FAILED" if failures else "PASSED")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Micro-benchmark for ``__NEXT_DATA__`` extraction.
+
+Compares the original regex + full ``json.loads`` approach with
+``next_data.load_page_props`` (full decode, and ``pageProps`` subtrees only),
+reporting per-page parse time and peak allocated memory.
+
+    python -m benchmarks.bench_next_data [--fixtures DIR] [--repeat N]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import time
+import tracemalloc
+
+import next_data
+from benchmarks.fixtures import load_pages
+
+STATS_KEYS = ("skaterStats", "goalieStats")
+
+
+def legacy_page_props(html):
+    m = re.search(r'<script[^>]+id="__NEXT_DATA__"[^>]*>([\s\S]+?)</script>', html)
+    if not m:
+        return None
+    return json.loads(m.group(1)).get("props", {}).get("pageProps", {})
+
+
+def stdlib_page_props(html):
+    data = next_data.find_next_data(html)
+    if data is None:
+        return None
+    return json.loads(data).get("props", {}).get("pageProps", {})
+
+
+METHODS = [
+    ("regex + json (before)", legacy_page_props),
+    ("scan + json", stdlib_page_props),
+    ("scan + " + ("orjson" if next_data.orjson else "json (no orjson)"),
+     next_data.load_page_props),
+    ("scan + subtrees", lambda html: next_data.load_page_props(html, keys=STATS_KEYS)),
+]
+
+
+def measure(fn, html, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(html)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="Directory of saved team pages (*.html)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per page")
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures)
+    if not pages:
+        parser.error(f"no *.html pages found in {args.fixtures}")
+    avg_kb = sum(len(html) for _name, html in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {avg_kb:.0f} KB average\n")
+
+    # all methods must agree on the sections the scrapers read
+    for _name, html in pages:
+        expected = legacy_page_props(html) or {}
+        for label, fn in METHODS:
+            got = fn(html) or {}
+            for key in STATS_KEYS:
+                assert got.get(key) == expected.get(key), (label, key)
+
+    print(f"{'method':<26}{'ms/page':>10}{'peak KB':>10}")
+    for label, fn in METHODS:
+        results = [measure(fn, html, args.repeat) for _name, html in pages]
+        ms = statistics.mean(t for t, _peak in results) * 1000
+        peak_kb = max(peak for _t, peak in results) / 1024
+        print(f"{label:<26}{ms:>10.3f}{peak_kb:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
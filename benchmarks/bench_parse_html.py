@@ -0,0 +1,83 @@
+"""Parity check and throughput benchmark for the roster HTML parser backends.
+
+Every available backend of ``parse_html.parse_roster_html`` must return the
+same rows as the original full-tree ``html.parser`` parse; the script exits
+non-zero if any differ, then reports rows per second for each backend.
+
+    python -m benchmarks.bench_parse_html [--fixtures DIR] [--repeat N]
+"""
+
+import argparse
+import importlib.util
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+import parse_html
+from benchmarks.fixtures import load_pages
+
+
+def legacy_parse_roster_html(html, team):
+    """The original implementation: full soup, then filter rows."""
+    soup = BeautifulSoup(html, "html.parser")
+    rows = []
+    for tr in soup.find_all('tr', class_=parse_html.ROSTER_ROW_CLASS):
+        if tr.find('span', class_=parse_html.SECTION_CLASS):
+            continue
+        cols = tr.find_all('td')
+        if len(cols) < 11:
+            continue
+        name = cols[3].find('a').get_text(strip=True)
+        cells = [td.get_text(strip=True) for td in cols]
+        rows.append(parse_html._player_row(cells, name, team))
+    return rows
+
+
+def available_backends():
+    modules = {'html.parser': None, 'lxml': 'lxml', 'selectolax': 'selectolax'}
+    return [b for b in parse_html.BACKENDS
+            if modules[b] is None or importlib.util.find_spec(modules[b])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="Directory of saved roster pages (*.html)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over all pages")
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures)
+    if not pages:
+        parser.error(f"no *.html pages found in {args.fixtures}")
+    backends = available_backends()
+    methods = [("html.parser, full tree (before)", legacy_parse_roster_html)]
+    # the bs4 backends only build the strained roster rows; selectolax
+    # parses the whole page in C
+    methods += [(b if b == 'selectolax' else f"{b}, strained",
+                 lambda html, team, b=b: parse_html.parse_roster_html(html, team, b))
+                for b in backends]
+
+    mismatches = 0
+    for name, html in pages:
+        expected = legacy_parse_roster_html(html, name)
+        for label, fn in methods[1:]:
+            if fn(html, name) != expected:
+                print(f"MISMATCH: {label} on {name}")
+                mismatches += 1
+    if mismatches:
+        sys.exit(1)
+    print(f"parity OK across {', '.join(backends)} on {len(pages)} pages\n")
+
+    print(f"{'backend':<34}{'rows/s':>10}")
+    for label, fn in methods:
+        rows = 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for name, html in pages:
+                rows += len(fn(html, name))
+        elapsed = time.perf_counter() - start
+        print(f"{label:<34}{rows / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark response building and serialization for the API endpoints.
+
+For a sample request to each endpoint, compares FastAPI's default path
+(``jsonable_encoder`` + ``JSONResponse``) with ``json_response.FastJSONResponse``
+and reports the time per response.  For the roster endpoint it also compares
+building the payload from ORM instances (the original ``select(Bio, ...)``
+code) with building it from plain result rows (``main.group_roster``).
+Reads the database named by ``NCAA_DB_PATH`` (``ncaa_hockey.db`` by default).
+
+    python -m benchmarks.bench_serialization [--repeat N]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+import json_response
+import main
+from models import Bio, Goalie_Stats, Player_Stats, read_engine
+
+
+def sample_paths(conn):
+    team = conn.execute(text(
+        "SELECT team FROM bio GROUP BY team ORDER BY count(*) DESC LIMIT 1")).scalar()
+    first, last = conn.execute(text(
+        "SELECT first_name, last_name FROM bio WHERE team = :team AND position != 'G' LIMIT 1"),
+        {"team": team}).first()
+    return [
+        "/teams",
+        f"/team/{team}/players",
+        f"/team/{team}/roster",
+        f"/player/{first}/{last}?team={team}",
+        "/players?limit=500",
+        "/leaders/TP?limit=100",
+        "/search?q=jo",
+    ]
+
+
+def default_render(payload):
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def fast_render(payload):
+    return json_response.FastJSONResponse(payload).body
+
+
+RENDERERS = [
+    ("jsonable_encoder + json (before)", default_render),
+    ("FastJSONResponse, " + ("orjson" if json_response.orjson else "json (no orjson)"), fast_render),
+]
+
+
+def legacy_roster(team_name):
+    """The roster payload built from ORM instances, as first written."""
+    with Session(read_engine) as session:
+        rows = session.exec(
+            select(Bio, Player_Stats, Goalie_Stats)
+            .outerjoin(Player_Stats, (Player_Stats.player_id == Bio.player_id) & (Player_Stats.team == Bio.team))
+            .outerjoin(Goalie_Stats, (Goalie_Stats.player_id == Bio.player_id) & (Goalie_Stats.team == Bio.team))
+            .where(Bio.team == team_name)
+            .order_by(Bio.position)
+        ).all()
+        roster = {}
+        for bio, skater, goalie in rows:
+            bio_data = {name: getattr(bio, name) for name in main.PLAYER_FIELDS}
+            if bio.position == 'G':
+                stats, fields = goalie, main.GOALIE_STATS_FIELDS
+            else:
+                stats, fields = skater, main.SKATER_STATS_FIELDS
+            stats_data = {name: getattr(stats, name) for name in fields} if stats else None
+            roster.setdefault(bio.position or "Unknown", []).append({"bio": bio_data, "stats": stats_data})
+        for players in roster.values():
+            players.sort(key=lambda p: f"{p['bio']['first_name']} {p['bio']['last_name']}")
+        return {"team": team_name, "players_by_position": roster}
+
+
+def row_roster(team_name):
+    with Session(read_engine) as session:
+        rows = session.exec(main.team_roster_query(team_name)).mappings().all()
+        return main.group_roster(team_name, rows)
+
+
+def timed(fn, arg, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs per response")
+    args = parser.parse_args()
+
+    with read_engine.connect() as conn:
+        paths = sample_paths(conn)
+    client = TestClient(main.app)
+
+    print(f"{'response':<34}{'KB':>7}" + "".join(f"{label[:34]:>36}" for label, _fn in RENDERERS))
+    for path in paths:
+        payload = client.get(path).json()
+        bodies = [fn(payload) for _label, fn in RENDERERS]
+        # both must produce the same document
+        assert all(json.loads(body) == payload for body in bodies), path
+        cells = "".join(f"{timed(fn, payload, args.repeat) * 1e6:>33.1f} us"
+                        for _label, fn in RENDERERS)
+        print(f"{path[:34]:<34}{len(bodies[0]) / 1024:>7.1f}{cells}")
+
+    team = paths[2].split("/")[2]
+    assert legacy_roster(team) == row_roster(team)
+    print(f"\nroster payload for {team}, query + shaping:")
+    for label, fn in [("ORM instances (before)", legacy_roster), ("result rows", row_roster)]:
+        print(f"  {label:<24}{timed(fn, team, max(args.repeat // 10, 5)) * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main_()
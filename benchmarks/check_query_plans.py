@@ -0,0 +1,107 @@
+"""Check that every query the API runs is answered from an index.
+
+Calls each endpoint of ``main.app`` with sample arguments taken from the
+database, captures the SQL sent through ``read_engine``, and runs
+``EXPLAIN QUERY PLAN`` on each distinct statement.  A plan step that scans
+a table without using an index fails the check (exit status 1), and
+``tests/test_query_plans.py`` runs the same check under pytest.
+
+    python -m benchmarks.check_query_plans
+"""
+
+import re
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+import main
+from models import read_engine
+
+
+def sample_paths(conn):
+    """Return request paths (with query strings) covering every endpoint."""
+    team = conn.execute(text("SELECT team FROM bio ORDER BY player_id LIMIT 1")).scalar()
+    goalie = conn.execute(text(
+        "SELECT first_name, last_name, team FROM bio WHERE position = 'G' LIMIT 1")).first()
+    skater = conn.execute(text(
+        "SELECT first_name, last_name, team FROM bio WHERE position != 'G' LIMIT 1")).first()
+    paths = ["/teams", f"/team/{team}/players", f"/team/{team}/roster", f"/team/{team}/summary"]
+    for first, last, player_team in filter(None, (goalie, skater)):
+        paths.append(f"/player/{first}/{last}?team={player_team}")
+    paths += [
+        "/leaders/TP",
+        f"/leaders/TP?team={team}",
+        "/leaders/G?position=D&cursor=10",
+        "/leaders/save_pct",
+        "/leaders/save_pct?min_gp=0",
+        f"/leaders/GAA?team={team}&min_gp=5",
+        "/leaders/TP?cursor=20&fields=rank,first_name,last_name,value",
+        "/players?limit=20",
+        "/players?cursor=100&fields=first_name,last_name",
+        f"/players?team={team}&cursor=1",
+        "/players?position=G",
+        f"/players?team={team}&position=D",
+        "/search?q=jo",
+        f"/search?q={skater[1] if skater else 'smith'}&fuzzy=true",
+    ]
+    return paths
+
+
+def table_scans(plan_rows):
+    """Plan steps like ``SCAN bio`` (a full table scan).  ``SCAN ... USING
+    [COVERING] INDEX`` walks an index and is fine, as is a virtual table
+    scan that passes a constraint (``INDEX 0:M...``, an FTS5 MATCH)."""
+    return [detail for *_ids, detail in plan_rows
+            if detail.startswith("SCAN ") and "USING" not in detail
+            and not detail.startswith("SCAN CONSTANT ROW")
+            and not re.search(r"VIRTUAL TABLE INDEX \d+:\S", detail)]
+
+
+def query_plans(verbose: bool = False):
+    """Request every ``sample_paths`` path and return ``(statement, plan,
+    scans)`` for each distinct statement the API ran."""
+    statements = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.setdefault(statement, parameters)
+
+    with read_engine.connect() as conn:
+        paths = sample_paths(conn)
+
+    event.listen(read_engine, "before_cursor_execute", capture)
+    try:
+        client = TestClient(main.app)
+        for path in paths:
+            resp = client.get(path)
+            if verbose:
+                print(f"GET {path} -> {resp.status_code}")
+    finally:
+        event.remove(read_engine, "before_cursor_execute", capture)
+
+    results = []
+    raw = read_engine.raw_connection()
+    try:
+        for statement, parameters in statements.items():
+            plan = raw.cursor().execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            results.append((statement, plan, table_scans(plan)))
+    finally:
+        raw.close()
+    return results
+
+
+def main_():
+    results = query_plans(verbose=True)
+    failures = 0
+    for statement, plan, scans in results:
+        failures += bool(scans)
+        print(f"\n[{'FAIL' if scans else 'ok'}] {' '.join(statement.split())}")
+        for *_ids, detail in plan:
+            print(f"    {detail}")
+
+    print(f"\n{len(results)} statements, {failures} with table scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,111 @@
+"""Synthetic and saved page fixtures shared by the benchmark scripts.
+
+Saved pages (e.g. ``curl``ed team pages) can be dropped into a directory and
+passed with ``--fixtures``; otherwise pages shaped like EliteProspects team
+pages are generated so the benchmarks run offline.
+"""
+
+import glob
+import json
+import os
+import random
+from typing import List, Tuple
+
+
+def _player(rng: random.Random, idx: int) -> dict:
+    return {
+        "id": 100000 + idx,
+        "name": f"Player{idx} Surname{rng.randint(0, 9999)}",
+        "position": rng.choice(["F", "D", "G"]),
+        "age": rng.randint(18, 25),
+        "yearOfBirth": rng.randint(1999, 2006),
+        "placeOfBirth": rng.choice(["Boston, MA, USA", "Toronto, ON, CAN", "Oslo, NOR"]),
+        "nationality": {"name": rng.choice(["USA", "Canada", "Norway"])},
+        "height": {"imperial": "6'1\"", "metrics": 185},
+        "weight": {"imperial": rng.randint(160, 220), "metrics": 90},
+        "shoots": rng.choice(["L", "R"]),
+    }
+
+
+def make_next_data(n_players: int = 30, filler_items: int = 800, seed: int = 0) -> dict:
+    """Return a ``__NEXT_DATA__`` payload with roster, skater and goalie
+    sections plus unrelated page data of roughly the size a real team page
+    carries (news, transactions, league tables)."""
+    rng = random.Random(seed)
+    players = [_player(rng, i) for i in range(n_players)]
+    roster = [{"player": p, "jerseyNumber": i + 1} for i, p in enumerate(players)]
+    skaters = [{
+        "player": {"name": p["name"]},
+        "regularStats": {"GP": rng.randint(0, 40), "G": rng.randint(0, 20),
+                         "A": rng.randint(0, 30), "PTS": rng.randint(0, 50),
+                         "PIM": rng.randint(0, 40), "PM": rng.randint(-10, 10)},
+    } for p in players if p["position"] != "G"]
+    goalies = [{
+        "player": {"name": p["name"]},
+        "regularStats": {"GP": rng.randint(0, 40), "GAA": round(rng.uniform(1.5, 4), 2),
+                         "SVP": round(rng.uniform(0.88, 0.94), 3), "W": rng.randint(0, 20),
+                         "L": rng.randint(0, 20), "T": rng.randint(0, 5), "SO": rng.randint(0, 5),
+                         "TOI": "1200:00", "SVS": rng.randint(100, 900)},
+    } for p in players if p["position"] == "G"]
+    filler = [{
+        "id": i,
+        "title": f"Story {i} " + "lorem ipsum " * 8,
+        "tags": [f"tag{j}" for j in range(5)],
+        "stats": {"views": rng.randint(0, 10 ** 6)},
+    } for i in range(filler_items)]
+    return {
+        "props": {"pageProps": {
+            "news": filler,
+            "rosterList": {"tableData": {"edges": roster}},
+            "skaterStats": {"stats": {"edges": skaters}},
+            "goalieStats": {"stats": {"edges": goalies}},
+            "transactions": filler[: filler_items // 2],
+        }},
+        "page": "/team/[id]/[slug]",
+        "buildId": "bench",
+    }
+
+
+def roster_table_html(payload: dict) -> str:
+    """Render the roster of a payload as the legacy ``SortTable`` markup
+    that ``parse_html.parse_roster_html`` understands."""
+    rows = ['<tr class="SortTable_tr__L9yVC"><td colspan="11">'
+            '<span class="SortTable_section__qZQT6">Forwards</span></td></tr>']
+    edges = payload["props"]["pageProps"]["rosterList"]["tableData"]["edges"]
+    for edge in edges:
+        p = edge["player"]
+        cells = [
+            "", str(edge["jerseyNumber"]), '<img src="flag.png"/>',
+            f'<a href="/player/{p["id"]}">{p["name"]} ({p["position"]})</a>',
+            str(p["age"]), str(p["yearOfBirth"]), p["placeOfBirth"],
+            p["height"]["imperial"].replace('"', "&quot;"),
+            f'{p["weight"]["imperial"]} lbs', p["shoots"], "",
+        ]
+        rows.append('<tr class="SortTable_tr__L9yVC">'
+                    + "".join(f"<td><span>{c}</span></td>" for c in cells) + "</tr>")
+    return '<table class="SortTable_table">' + "".join(rows) + "</table>"
+
+
+def make_team_page(n_players: int = 30, filler_items: int = 800, seed: int = 0) -> str:
+    """Return a full team page: navigation markup, the roster table and the
+    ``__NEXT_DATA__`` script tag."""
+    payload = make_next_data(n_players, filler_items, seed)
+    nav = "".join(f'<li><a class="Nav_link" href="/league/{i}">League {i}</a></li>'
+                  for i in range(400))
+    return ("<!DOCTYPE html><html><head><title>Team</title></head><body>"
+            f"<nav><ul>{nav}</ul></nav><main>{roster_table_html(payload)}</main>"
+            '<script id="__NEXT_DATA__" type="application/json">'
+            f"{json.dumps(payload)}</script></body></html>")
+
+
+def load_pages(fixtures_dir: str = None, count: int = 10) -> List[Tuple[str, str]]:
+    """Return ``(name, html)`` pairs from ``fixtures_dir``/*.html, or
+    ``count`` generated pages when no directory is given."""
+    if fixtures_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+            with open(path, encoding="utf-8") as f:
+                pages.append((os.path.basename(path), f.read()))
+        return pages
+    return [(f"synthetic-{i}", make_team_page(seed=i)) for i in range(count)]
+
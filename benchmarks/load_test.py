@@ -0,0 +1,171 @@
+"""Load test the API in its sync and async database modes.
+
+For each mode a ``uvicorn`` server is started with ``NCAA_API_MODE`` set
+accordingly, and for each client count that many concurrent clients request
+a mix of ``/teams``, ``/team/{team}/players`` and ``/player/...`` paths for
+``--duration`` seconds.  Requests per second and latency percentiles are
+reported per run.  The response cache is disabled unless ``--cache`` is
+given, so the numbers measure the database path rather than cache hits.
+
+    python -m benchmarks.load_test --clients 50 500 --duration 15
+    python -m benchmarks.load_test --url http://localhost:8000   # running server
+
+The load generator shares the machine with the server, so compare the modes
+against each other rather than reading the numbers as absolute capacity.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def start_server(mode: str, port: int, db_path: Optional[str] = None, cache: bool = False,
+                 env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    server_env = dict(os.environ, NCAA_API_MODE=mode, **(env or {}))
+    if db_path:
+        server_env["NCAA_DB_PATH"] = os.path.abspath(db_path)
+    if not cache:
+        server_env["NCAA_CACHE_MAX_MB"] = "0"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--backlog", "2048"],
+        cwd=REPO_ROOT, env=server_env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/teams", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start within 30s")
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def sample_paths(base_url: str, players_per_team: int = 3) -> List[str]:
+    """Build a request mix from the server's own data."""
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        teams = client.get("/teams").json()["teams"]
+        paths = ["/teams"]
+        for team in teams:
+            paths.append(f"/team/{team}/players")
+            groups = client.get(f"/team/{team}/players").json()["players_by_position"]
+            names = [name for group in groups.values() for name in group]
+            for name in names[:players_per_team]:
+                first, _, last = name.partition(" ")
+                paths.append(f"/player/{first}/{last}?team={team}")
+    return paths
+
+
+async def _client(client: httpx.AsyncClient, paths: List[str], offset: int,
+                  deadline: float, latencies: List[float], errors: List[int]):
+    i = offset
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            resp = await client.get(path)
+            ok = resp.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors[0] += 1
+
+
+async def _run(base_url: str, paths: List[str], clients: int, duration: float) -> Dict:
+    latencies: List[float] = []
+    errors = [0]
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.monotonic()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _client(client, paths, n * 7, deadline, latencies, errors) for n in range(clients)
+        ))
+        elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "seconds": round(elapsed, 2),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def run_load(base_url: str, paths: List[str], clients: int, duration: float) -> Dict:
+    """Run ``clients`` concurrent clients against ``base_url`` for
+    ``duration`` seconds; returns throughput and latency figures."""
+    return asyncio.run(_run(base_url, paths, clients, duration))
+
+
+def print_result(label: str, result: Dict):
+    print(f"{label:<8} {result['clients']:>7} {result['requests']:>9} {result['errors']:>6} "
+          f"{result['rps']:>9} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one per mode")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    parser.add_argument("--clients", nargs="+", type=int, default=[50, 500])
+    parser.add_argument("--duration", type=float, default=10, help="seconds per run")
+    parser.add_argument("--db", help="database file for the started servers (default: NCAA_DB_PATH)")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--cache", action="store_true", help="leave the API response cache enabled")
+    args = parser.parse_args()
+
+    header = (f"{'mode':<8} {'clients':>7} {'requests':>9} {'errors':>6} "
+              f"{'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    if args.url:
+        paths = sample_paths(args.url)
+        print(header)
+        for clients in args.clients:
+            print_result("server", run_load(args.url, paths, clients, args.duration))
+        return
+
+    print(header)
+    for mode in args.modes:
+        proc = start_server(mode, args.port, args.db, args.cache)
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            paths = sample_paths(base_url)
+            for clients in args.clients:
+                print_result(mode, run_load(base_url, paths, clients, args.duration))
+        finally:
+            stop_server(proc)
+
+
+if __name__ == "__main__":
+    main()
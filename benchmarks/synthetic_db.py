@@ -0,0 +1,202 @@
+"""Synthetic league data at a multiple of the real size.
+
+The real database has 63 teams of about 28 players.  ``--scale N`` keeps
+rosters that size and generates ``63 * N`` teams, so per-team requests
+stay realistic while the tables (and anything that scans them) grow N
+times.  Rows have the same columns as the scraper CSVs and go through the
+loaders' record mappers, and are generated from a seed, so a given scale
+always produces the same data.
+
+    python -m benchmarks.synthetic_db --scale 100 --db .bench/synthetic_x100.db
+    python -m benchmarks.synthetic_db --scale 10 --csv-dir .bench/csv_x10
+"""
+
+import argparse
+import csv
+import os
+import random
+import time
+from typing import Dict, Iterator, List, Tuple
+
+REAL_TEAMS = 63
+ROSTER_SIZE = 28
+TEAMS_PER_BATCH = 200
+
+PLAYER_COLUMNS = ['first_name', 'last_name', 'team', 'number', 'position', 'age', 'born',
+                  'birth_place', 'country', 'height', 'weight', 'shoots']
+SKATER_COLUMNS = ['first_name', 'last_name', 'GP', 'G', 'A', 'TP', 'PIM', '+/-', 'team']
+GOALIE_COLUMNS = ['first_name', 'last_name', 'GP', 'GAA', 'save_pct', 'W', 'L', 'T', 'SO',
+                  'TOI', 'SVS', 'team']
+
+FIRST_NAMES = [
+    'Aidan', 'Alex', 'Ben', 'Brady', 'Caleb', 'Carter', 'Chris', 'Cole', 'Connor', 'Dylan',
+    'Ethan', 'Evan', 'Finn', 'Gavin', 'Hunter', 'Isaac', 'Jack', 'Jake', 'Jonah', 'Josh',
+    'Kyle', 'Liam', 'Logan', 'Lucas', 'Luke', 'Mason', 'Matt', 'Max', 'Nate', 'Nick',
+    'Noah', 'Owen', 'Ryan', 'Sam', 'Sean', 'Seth', 'Teddy', 'Tyler', 'Will', 'Zach',
+]
+LAST_NAMES = [
+    'Anderson', 'Bergstrom', 'Brennan', 'Carlson', 'Doherty', 'Dubois', 'Eriksson', 'Fitzgerald',
+    'Gagnon', 'Hanson', 'Hughes', 'Johansson', 'Kowalski', 'Lindqvist', 'MacDonald', 'Murphy',
+    'Nilsson', 'Novak', "O'Brien", 'Olson', 'Peterson', 'Quinn', 'Richards', 'Sullivan',
+    'Svoboda', 'Thompson', 'Tremblay', 'Virtanen', 'Walsh', 'Wyttenbach',
+]
+BIRTH_PLACES = [
+    ('Grand Rapids, MN', 'USA'), ('Boston, MA', 'USA'), ('Detroit, MI', 'USA'),
+    ('Toronto, ON', 'Canada'), ('Calgary, AB', 'Canada'), ('Stockholm', 'Sweden'),
+    ('Helsinki', 'Finland'), ('Prague', 'Czechia'), ('Duluth, MN', 'USA'), ('Buffalo, NY', 'USA'),
+]
+TEAM_KINDS = ['Univ.', 'College', 'State Univ.', 'Tech']
+POSITIONS = ['G'] * 3 + ['D'] * 9 + ['F'] * 16
+
+
+def team_name(index: int) -> str:
+    return f"{LAST_NAMES[index % len(LAST_NAMES)]} {TEAM_KINDS[index % len(TEAM_KINDS)]} {index:05d}"
+
+
+def synthetic_team(rng: random.Random, team: str, roster_size: int = ROSTER_SIZE
+                   ) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """``(players, skaters, goalies)`` CSV rows for one team."""
+    players, skaters, goalies = [], [], []
+    names = set()
+    for i in range(roster_size):
+        while True:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            if (first, last) not in names:
+                break
+            last = f"{last}-{rng.choice(LAST_NAMES)}"
+            if (first, last) not in names:
+                break
+        names.add((first, last))
+        position = POSITIONS[i % len(POSITIONS)]
+        place, country = rng.choice(BIRTH_PLACES)
+        born = rng.randint(2000, 2006)
+        players.append({
+            'first_name': first, 'last_name': last, 'team': team,
+            'number': str(rng.randint(1, 99)), 'position': position,
+            'age': str(2025 - born), 'born': str(born), 'birth_place': place, 'country': country,
+            'height': f"{rng.randint(5, 6)}'{rng.randint(0, 11)}\"",
+            'weight': str(rng.randint(160, 220)), 'shoots': rng.choice('LR'),
+        })
+        gp = rng.randint(0, 40)
+        if position == 'G':
+            saves = rng.randint(0, 1000)
+            goals_against = rng.randint(0, 120)
+            goalies.append({
+                'first_name': first, 'last_name': last, 'team': team, 'GP': str(gp),
+                'GAA': f"{rng.uniform(1.5, 4.5):.2f}",
+                'save_pct': f"{saves / max(saves + goals_against, 1):.3f}".lstrip('0'),
+                'W': str(rng.randint(0, gp)), 'L': str(rng.randint(0, gp)), 'T': str(rng.randint(0, 4)),
+                'SO': str(rng.randint(0, 5)), 'TOI': str(gp * 60), 'SVS': str(saves),
+            })
+        else:
+            goals, assists = rng.randint(0, 25), rng.randint(0, 35)
+            skaters.append({
+                'first_name': first, 'last_name': last, 'team': team, 'GP': str(gp),
+                'G': str(goals), 'A': str(assists), 'TP': str(goals + assists),
+                'PIM': str(rng.randint(0, 60)), '+/-': str(rng.randint(-20, 25)),
+            })
+    return players, skaters, goalies
+
+
+def synthetic_teams(scale: float, seed: int = 0, roster_size: int = ROSTER_SIZE
+                    ) -> Iterator[Tuple[List[Dict], List[Dict], List[Dict]]]:
+    """Yield ``synthetic_team`` rows for ``REAL_TEAMS * scale`` teams."""
+    rng = random.Random(seed)
+    for index in range(max(1, round(REAL_TEAMS * scale))):
+        yield synthetic_team(rng, team_name(index), roster_size)
+
+
+def write_csvs(directory: str, scale: float, seed: int = 0) -> Dict[str, str]:
+    """Write players.csv, skater_stats.csv and goalie_stats.csv; returns
+    their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {name: os.path.join(directory, f"{name}.csv")
+             for name in ('players', 'skater_stats', 'goalie_stats')}
+    files = [open(path, 'w', newline='', encoding='utf-8') for path in paths.values()]
+    try:
+        writers = [csv.DictWriter(f, fieldnames=columns) for f, columns in
+                   zip(files, (PLAYER_COLUMNS, SKATER_COLUMNS, GOALIE_COLUMNS))]
+        for writer in writers:
+            writer.writeheader()
+        for rows in synthetic_teams(scale, seed):
+            for writer, table_rows in zip(writers, rows):
+                writer.writerows(table_rows)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def build_db(path: str, scale: float, seed: int = 0):
+    """Create the database at ``path`` and fill it with synthetic rows.
+
+    ``models`` binds its engine to ``NCAA_DB_PATH`` on import, so this must
+    run in a process that hasn't imported it for another database yet.
+    """
+    if os.path.exists(path):
+        raise SystemExit(f"{path} already exists")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    os.environ['NCAA_DB_PATH'] = path
+    from sqlalchemy.dialects.sqlite import insert
+
+    from bio_init import bio_record
+    from bulk_load import NAME_KEY, content_hash, finish_ingest, player_ids
+    from goalie_init import goalie_record
+    from models import Bio, Goalie_Stats, Player_Stats, engine, rebuild_leaderboard
+    from player_init import skater_record
+
+    started = time.perf_counter()
+    batches = [[], [], []]
+    teams = set()
+    total = 0
+
+    def flush():
+        bios, skaters, goalies = ([r for r in map(fn, rows) if r is not None] for fn, rows in
+                                  zip((bio_record, skater_record, goalie_record), batches))
+        with engine.begin() as conn:
+            for table, records in ((Bio, bios), (Player_Stats, skaters), (Goalie_Stats, goalies)):
+                if table is not Bio:
+                    ids = player_ids(conn, {tuple(r[c] for c in NAME_KEY) for r in records})
+                    for r in records:
+                        r['player_id'] = ids[tuple(r[c] for c in NAME_KEY)]
+                # same columns, in the same order, as upsert_rows hashes
+                columns = list(records[0])
+                for r in records:
+                    r['content_hash'] = content_hash(r, columns)
+                conn.execute(insert(table.__table__), records)
+        for batch in batches:
+            batch.clear()
+
+    for index, rows in enumerate(synthetic_teams(scale, seed), 1):
+        for batch, table_rows in zip(batches, rows):
+            batch.extend(table_rows)
+        teams.add(rows[0][0]['team'])
+        total += len(rows[0])
+        if index % TEAMS_PER_BATCH == 0:
+            flush()
+            print(f"{index} teams, {total} players ({time.perf_counter() - started:.0f}s)")
+    if batches[0]:
+        flush()
+    with engine.begin() as conn:
+        finish_ingest(conn, teams)
+        rebuild_leaderboard(conn)
+    print(f"Wrote {total} players on {len(teams)} teams to {path} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--scale', type=float, default=10, help='multiple of the real data size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help='database file to create')
+    parser.add_argument('--csv-dir', help='write the three CSVs to this directory instead')
+    args = parser.parse_args()
+    if args.csv_dir:
+        paths = write_csvs(args.csv_dir, args.scale, args.seed)
+        print('Wrote ' + ', '.join(paths.values()))
+    else:
+        build_db(args.db or f".bench/synthetic_x{args.scale:g}.db", args.scale, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import csv
-from sqlmodel import Session, select
-from models import engine, Bio
+from models import Bio
+from bulk_load import DEFAULT_BATCH_SIZE, load_records
 
 
 def parse_int(v):
@@ -10,51 +10,44 @@ def parse_int(v):
         return None
 
 
-def load_players(csv_path="players.csv"):
-    inserted = 0
-    updated = 0
+def bio_record(row):
+    """Map a players.csv row to Bio column values, or None if the row has
+    no usable name.  A missing team is stored as ``''``, as the player_id
+    migration does."""
+    first = (row.get('first_name') or '').strip()
+    last = (row.get('last_name') or '').strip()
+    team = row.get('team') or ''
+    if not first or not last:
+        return None
+    return {
+        'first_name': first,
+        'last_name': last,
+        'team': team,
+        'number': row.get('number') or None,
+        'position': row.get('position') or None,
+        'age': parse_int(row.get('age')),
+        'born': row.get('born') or None,
+        'birth_place': row.get('birth_place') or row.get('birthplace') or None,
+        'country': row.get('country') or None,
+        'height': row.get('height') or None,
+        'weight': row.get('weight') or None,
+        'shoots': row.get('shoots') or None,
+    }
+
+
+def load_players(csv_path="players.csv", batch_size=DEFAULT_BATCH_SIZE):
     with open(csv_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
-        with Session(engine) as session:
-            for row in reader:
-                first = row.get('first_name', '').strip()
-                last = row.get('last_name', '').strip()
-                if not first or not last:
-                    continue
-
-                stmt = select(Bio).where(Bio.first_name == first, Bio.last_name == last)
-                existing = session.exec(stmt).first()
-
-                bio = Bio(
-                    first_name=first,
-                    last_name=last,
-                    team=row.get('team') or None,
-                    number=row.get('number') or None,
-                    position=row.get('position') or None,
-                    age=parse_int(row.get('age', '').strip()),
-                    born=row.get('born') or None,
-                    birth_place=row.get('birth_place') or row.get('birthplace') or None,
-                    country=row.get('country') or None,
-                    height=row.get('height') or None,
-                    weight=row.get('weight') or None,
-                    shoots=row.get('shoots') or None,
-                )
-
-                if existing:
-                    # update fields
-                    # use model_dump() per SQLModel 0.0.14 deprecation
-                    for k, v in bio.model_dump().items():
-                        setattr(existing, k, v)
-                    session.add(existing)
-                    updated += 1
-                else:
-                    session.add(bio)
-                    inserted += 1
-
-            session.commit()
-
-    print(f"Bio: inserted={inserted}, updated={updated}")
+        result = load_records(Bio, map(bio_record, reader), batch_size=batch_size)
+
+    print(f"Bio: inserted={result.inserted}, updated={result.updated}, "
+          f"unchanged={result.unchanged}, skipped={result.skipped}")
 
 
 if __name__ == '__main__':
-    load_players('players.csv')
+    import argparse
+    parser = argparse.ArgumentParser(description='Load players.csv into the Bio table')
+    parser.add_argument('csv_path', nargs='?', default='players.csv')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    load_players(args.csv_path, args.batch_size)
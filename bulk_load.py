@@ -0,0 +1,267 @@
+"""Chunked ``INSERT ... ON CONFLICT DO UPDATE`` loader shared by the
+``*_init.py`` scripts.
+
+Instead of a ``SELECT`` per CSV row and an ORM object per player, rows are
+written a batch at a time with ``executemany``.  One ``SELECT`` per batch
+fetches the stored versions of the batch's keys; every row carries a
+``content_hash`` of its values, so rows whose hash matches are skipped
+entirely and only real changes are written.  Each insert or change is also
+recorded in ``Change_Log``, which keeps ``CHANGE_LOG_DAYS`` of history.
+"""
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import SQLModel
+
+from models import (Bio, Change_Log, Db_Version, Goalie_Stats, Player_Stats, Team, engine,
+                    rebuild_leaderboard, utcnow)
+from team_summary import backfill_team_summary, refresh_team_summary
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Change_Log rows older than this are pruned at the end of each run (0 keeps
+# them all); consumers only need the changes since they last looked
+CHANGE_LOG_DAYS = float(os.environ.get('NCAA_CHANGE_LOG_DAYS', 30))
+
+NAME_KEY = ('first_name', 'last_name', 'team')
+
+# conflict target per table; stats rows are matched to their Bio row by
+# name and team first (see ``assign_player_ids``)
+UPSERT_KEYS = {
+    Bio: NAME_KEY,
+    Player_Stats: ('player_id', 'team'),
+    Goalie_Stats: ('player_id', 'team'),
+}
+
+# position given to the stub Bio row created for a stats row without one
+STUB_POSITIONS = {Player_Stats: None, Goalie_Stats: 'G'}
+
+
+class UpsertResult(NamedTuple):
+    inserted: int
+    updated: int
+    unchanged: int
+    teams: Set[str]  # teams whose rows were inserted or changed
+    skipped: int = 0  # rows a ``*_record`` mapper rejected (None)
+
+
+def chunked(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def player_ids(conn, keys: Iterable[tuple]) -> Dict[tuple, int]:
+    """Map ``(first_name, last_name, team)`` keys to ``Bio.player_id``."""
+    bio = Bio.__table__
+    name_cols = [bio.c[c] for c in NAME_KEY]
+    rows = conn.execute(
+        bio.select().with_only_columns(*name_cols, bio.c.player_id)
+        .where(tuple_(*name_cols).in_(set(keys)))
+    )
+    return {(first, last, team): pid for first, last, team, pid in rows}
+
+
+def assign_player_ids(conn, batch: List[Dict], position=None):
+    """Set ``player_id`` on stats rows from their Bio row, creating stub
+    Bio rows (name, team and ``position`` only) for players the roster
+    scrape didn't return; a later bio load fills in the rest."""
+    keys = {tuple(r[c] for c in NAME_KEY) for r in batch}
+    ids = player_ids(conn, keys)
+    missing = keys - ids.keys()
+    if missing:
+        stmt = insert(Bio.__table__).on_conflict_do_nothing()
+        conn.execute(stmt, [dict(zip(NAME_KEY, k), position=position) for k in missing])
+        ids.update(player_ids(conn, missing))
+    for r in batch:
+        r['player_id'] = ids[tuple(r[c] for c in NAME_KEY)]
+
+
+def content_hash(row: Dict, columns: Sequence[str]) -> str:
+    values = [row.get(c) for c in columns]
+    data = json.dumps(values, separators=(',', ':'), default=str)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def upsert_rows(model: type[SQLModel], rows: Iterable[Optional[Dict]],
+                key: Optional[Sequence[str]] = None,
+                batch_size: int = DEFAULT_BATCH_SIZE,
+                conn=None) -> UpsertResult:
+    """Insert or update ``rows`` (dicts of column values) into ``model``'s
+    table, keyed on the ``key`` columns (``UPSERT_KEYS`` by default),
+    skipping rows that are unchanged.
+
+    A key repeated within ``rows`` counts as an update (or as unchanged if
+    its values are identical), matching the old per-row loaders where the
+    second occurrence overwrote the first.  ``None`` entries (rows the
+    ``*_record`` mappers found no name in) are skipped and counted.
+
+    Without ``conn`` the rows are written in a transaction of their own;
+    pass a connection to make them part of the caller's transaction.
+    """
+    if conn is None:
+        with engine.begin() as conn:
+            return upsert_rows(model, rows, key, batch_size, conn)
+
+    table = model.__table__
+    key = key or UPSERT_KEYS[model]
+    key_cols = [table.c[k] for k in key]
+    inserted = updated = unchanged = skipped = 0
+    teams = set()
+
+    def present(rows):
+        nonlocal skipped
+        for r in rows:
+            if r is None:
+                skipped += 1
+            else:
+                yield r
+
+    for batch in chunked(present(rows), batch_size):
+        if 'player_id' in key:
+            assign_player_ids(conn, batch, STUB_POSITIONS.get(model))
+        columns = [c for c in batch[0] if c != 'content_hash']
+        stored = {
+            tuple(r[k] for k in key): r
+            for r in conn.execute(
+                table.select().where(tuple_(*key_cols).in_(
+                    {tuple(r[k] for k in key) for r in batch}
+                ))
+            ).mappings()
+        }
+        writes = []
+        changes = []
+        for r in batch:
+            k = tuple(r[c] for c in key)
+            new = dict(r, content_hash=content_hash(r, columns))
+            old = stored.get(k)
+            if old is not None and old['content_hash'] == new['content_hash']:
+                unchanged += 1
+                continue
+            stored[k] = new
+            writes.append(new)
+            if old is None:
+                inserted += 1
+                changed = None
+            else:
+                updated += 1
+                changed = [c for c in columns if old[c] != new[c]]
+                if not changed:
+                    # only the hash was missing (rows loaded before hashing)
+                    continue
+            # team is part of every upsert key, so a changed row stays on its team
+            team = new.get('team')
+            teams.add(team)
+            changes.append({
+                'table_name': table.name,
+                'player_id': new.get('player_id') or (old or {}).get('player_id'),
+                'first_name': new['first_name'],
+                'last_name': new['last_name'],
+                'team': team,
+                'change': 'insert' if old is None else 'update',
+                'changed_columns': ','.join(changed) if changed else None,
+                'changed_at': utcnow(),
+            })
+
+        if writes:
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=key_cols,
+                set_={c: stmt.excluded[c] for c in writes[0] if c not in key},
+            )
+            conn.execute(stmt, writes)
+        if changes:
+            # new Bio rows only get their id from the insert above
+            unknown = [c for c in changes if c['player_id'] is None]
+            if unknown:
+                ids = player_ids(conn, [(c['first_name'], c['last_name'], c['team'])
+                                        for c in unknown])
+                for c in unknown:
+                    c['player_id'] = ids.get((c['first_name'], c['last_name'], c['team']))
+            conn.execute(insert(Change_Log.__table__), changes)
+    teams.discard(None)
+    return UpsertResult(inserted, updated, unchanged, teams, skipped)
+
+
+def sync_teams(conn, teams: Iterable[str]):
+    """Refresh the ``Team`` catalog rows of ``teams`` from ``Bio``."""
+    teams = list(teams)
+    if not teams:
+        return
+    bio = Bio.__table__
+    counts = conn.execute(
+        bio.select().with_only_columns(bio.c.team, func.count())
+        .where(bio.c.team.in_(teams)).group_by(bio.c.team)
+    ).all()
+    stmt = insert(Team.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Team.__table__.c.name],
+        set_={'player_count': stmt.excluded.player_count},
+    )
+    conn.execute(stmt, [{'name': team, 'player_count': n} for team, n in counts])
+
+
+def bump_generation(conn):
+    version = Db_Version.__table__
+    conn.execute(version.update().where(version.c.id == 1).values(
+        generation=version.c.generation + 1, updated_at=utcnow()))
+
+
+def finish_ingest(conn, teams: Set[str]):
+    """Post-load bookkeeping, run in the loader's transaction once rows for
+    ``teams`` have changed: update the team catalog and those teams'
+    summaries and bump the database generation so API caches drop their
+    stale entries.
+
+    The leaderboard is not re-ranked here: ranks are league-wide, so that
+    is a pass over every stats row.  Loaders call ``finish_run`` (or
+    ``rebuild_leaderboard`` in the same transaction) once per run instead.
+    """
+    if not teams:
+        return
+    sync_teams(conn, teams)
+    if not backfill_team_summary(conn):
+        refresh_team_summary(conn, teams)
+    bump_generation(conn)
+
+
+def prune_change_log(conn, days: float = CHANGE_LOG_DAYS) -> int:
+    """Delete ``Change_Log`` rows older than ``days``; returns how many."""
+    if days <= 0:
+        return 0
+    log = Change_Log.__table__
+    cutoff = utcnow() - timedelta(days=days)
+    return conn.execute(log.delete().where(log.c.changed_at < cutoff)).rowcount
+
+
+def finish_run(conn):
+    """Re-rank the leaderboard after a run that loaded teams in separate
+    transactions, bump the generation again so cached ``/leaders``
+    responses are dropped, and prune ``Change_Log``."""
+    rebuild_leaderboard(conn)
+    bump_generation(conn)
+    prune_change_log(conn)
+
+
+def load_records(model: type[SQLModel], records: Iterable[Optional[Dict]],
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> UpsertResult:
+    """``upsert_rows`` plus ``finish_ingest``, the leaderboard rebuild and
+    ``Change_Log`` pruning in one transaction."""
+    with engine.begin() as conn:
+        result = upsert_rows(model, records, batch_size=batch_size, conn=conn)
+        finish_ingest(conn, result.teams)
+        if result.teams:
+            rebuild_leaderboard(conn)
+        prune_change_log(conn)
+    return result
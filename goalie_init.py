@@ -1,6 +1,6 @@
 import csv
-from sqlmodel import Session, select
-from models import engine, Goalie_Stats
+from models import Goalie_Stats
+from bulk_load import DEFAULT_BATCH_SIZE, load_records
 
 
 def parse_int(v):
@@ -17,50 +17,44 @@ def parse_float(v):
         return None
 
 
-def load_goalies(csv_path='goalie_stats.csv'):
-    inserted = 0
-    updated = 0
+def goalie_record(row):
+    """Map a goalie_stats.csv row to Goalie_Stats column values, or None if
+    the row has no usable name.  A missing team is stored as ``''``, as the
+    player_id migration does."""
+    first = (row.get('first_name') or '').strip()
+    last = (row.get('last_name') or '').strip()
+    team = row.get('team') or ''
+    if not first or not last:
+        return None
+    return {
+        'first_name': first,
+        'last_name': last,
+        'GP': parse_int(row.get('GP')),
+        'GAA': parse_float(row.get('GAA')),
+        'save_pct': parse_float(row.get('save_pct')),
+        'W': parse_int(row.get('W')),
+        'L': parse_int(row.get('L')),
+        'T': parse_int(row.get('T')),
+        'SO': parse_int(row.get('SO')),
+        'TOI': row.get('TOI') or None,
+        'SVS': parse_int(row.get('SVS')),
+        'team': team,
+    }
+
+
+def load_goalies(csv_path='goalie_stats.csv', batch_size=DEFAULT_BATCH_SIZE):
     with open(csv_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
-        with Session(engine) as session:
-            for row in reader:
-                first = row.get('first_name', '').strip()
-                last = row.get('last_name', '').strip()
-                if not first or not last:
-                    continue
-
-                stmt = select(Goalie_Stats).where(Goalie_Stats.first_name == first, Goalie_Stats.last_name == last)
-                existing = session.exec(stmt).first()
-
-                gs = Goalie_Stats(
-                    first_name=first,
-                    last_name=last,
-                    GP=parse_int(row.get('GP', '').strip()),
-                    GAA=parse_float(row.get('GAA', '').strip()),
-                    save_pct=parse_float(row.get('save_pct', '').strip()),
-                    W=parse_int(row.get('W', '').strip()),
-                    L=parse_int(row.get('L', '').strip()),
-                    T=parse_int(row.get('T', '').strip()),
-                    SO=parse_int(row.get('SO', '').strip()),
-                    TOI=row.get('TOI') or None,
-                    SVS=parse_int(row.get('SVS', '').strip()),
-                    team=row.get('team') or None,
-                )
-
-                if existing:
-                    # switched to model_dump to avoid deprecation warning
-                    for k, v in gs.model_dump().items():
-                        setattr(existing, k, v)
-                    session.add(existing)
-                    updated += 1
-                else:
-                    session.add(gs)
-                    inserted += 1
-
-            session.commit()
+        result = load_records(Goalie_Stats, map(goalie_record, reader), batch_size=batch_size)
 
-    print(f"Goalie_Stats: inserted={inserted}, updated={updated}")
+    print(f"Goalie_Stats: inserted={result.inserted}, updated={result.updated}, "
+          f"unchanged={result.unchanged}, skipped={result.skipped}")
 
 
 if __name__ == '__main__':
-    load_goalies('goalie_stats.csv')
+    import argparse
+    parser = argparse.ArgumentParser(description='Load goalie_stats.csv into the Goalie_Stats table')
+    parser.add_argument('csv_path', nargs='?', default='goalie_stats.csv')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    load_goalies(args.csv_path, args.batch_size)
@@ -0,0 +1,32 @@
+"""JSON response class for the API.
+
+FastAPI runs a returned dict through ``jsonable_encoder`` (which walks and
+copies every value) and then the stdlib ``json`` encoder.  The handlers only
+ever return dicts, lists, strings, numbers and ``None`` built straight from
+SQL result rows, so neither step is needed: they return a
+``FastJSONResponse`` instead, which FastAPI sends as is, and the body is
+encoded with ``orjson`` when it is installed.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` the way ``JSONResponse`` does (compact, UTF-8)."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,152 @@
+"""Single-pass crawler that collects rosters, skater stats and goalie stats.
+
+The standalone scrapers each walk the NCAA league page and fetch their own
+copy of every team page.  This module fetches the league page once, then each
+team's roster page and stats page once, decodes each ``__NEXT_DATA__``
+payload a single time and hands it to every extractor that needs it.
+"""
+
+import functools
+import json
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from next_data import load_page_props
+from scrape_all_teams import (
+    BASE_URL,
+    add_cache_arguments,
+    apply_cache_arguments,
+    cached_rows,
+    extract_roster,
+    get_ncaa_team_links,
+    iter_pages,
+    team_stats_url,
+    write_players_csv,
+)
+from scrape_report import ScrapeReport, add_report_arguments, default_report_path
+from scrape_skater_stats import extract_skater_stats, write_skater_csv
+from scrape_goalie_stats import extract_goalie_stats, write_goalie_csv
+
+
+class TeamCrawl(NamedTuple):
+    team: str
+    players: List[Dict]
+    skaters: List[Dict]
+    goalies: List[Dict]
+
+
+_PAGE_KEYS = {
+    'roster': ('rosterList',),
+    'stats': ('skaterStats', 'goalieStats'),
+}
+
+
+def _page_props(team: str, label: str, resp) -> Dict:
+    """Return the decoded ``pageProps`` of a fetched page, or ``{}`` after
+    logging why the page could not be used."""
+    if isinstance(resp, Exception):
+        print(f"  error fetching {label} page for {team}: {resp}")
+        return {}
+    if resp.status_code != 200:
+        print(f"  failed to fetch {label} page for {team} ({resp.status_code})")
+        return {}
+    try:
+        return load_page_props(resp.text, keys=_PAGE_KEYS[label]) or {}
+    except json.JSONDecodeError as exc:
+        print(f"  JSON decode error on {label} page for {team}: {exc}")
+        return {}
+
+
+def _with_team(players: List[Dict], team: str) -> List[Dict]:
+    for p in players:
+        p['team'] = team
+    return players
+
+
+def crawl_league(concurrency: int = 1, rate: float = 0.0,
+                 base_url: str = BASE_URL,
+                 report: Optional[ScrapeReport] = None) -> Iterator[TeamCrawl]:
+    """Yield one ``TeamCrawl`` per NCAA team, in league-page order.
+
+    ``concurrency`` and ``rate`` are passed through to ``iter_pages``.
+    Fetches and extractions are recorded in ``report`` if one is given.
+    """
+    if report is None:
+        report = ScrapeReport('crawl_league')
+    teams = get_ncaa_team_links(base_url)
+    # links without an id and slug have no stats page to fetch
+    stats_urls = [team_stats_url(href, base_url) for _name, href in teams]
+    urls = []
+    for (_name, href), stats_url in zip(teams, stats_urls):
+        urls.append(base_url + href)
+        if stats_url:
+            urls.append(stats_url)
+
+    pages = iter_pages(urls, concurrency, rate)
+    for (name, _href), stats_url in zip(teams, stats_urls):
+        _url, roster_resp = next(pages)
+        report.page(name, 'roster', roster_resp)
+        players = report.extract(name, 'roster', lambda: cached_rows(
+            roster_resp, 'roster', name, lambda: _with_team(
+                extract_roster(_page_props(name, 'roster', roster_resp)), name)))
+
+        skaters, goalies = [], []
+        if stats_url:
+            _url, stats_resp = next(pages)
+            report.page(name, 'stats', stats_resp)
+            # decoded lazily and at most once (so its time counts towards
+            # 'skaters'); unchanged cached pages skip it
+            stats_props = functools.cache(lambda: _page_props(name, 'stats', stats_resp))
+            skaters = report.extract(name, 'skaters', lambda: cached_rows(
+                stats_resp, 'skaters', name, lambda: extract_skater_stats(stats_props(), name)))
+            goalies = report.extract(name, 'goalies', lambda: cached_rows(
+                stats_resp, 'goalies', name, lambda: extract_goalie_stats(stats_props(), name)))
+        print(f"{name}: {len(players)} players, {len(skaters)} skaters, "
+              f"{len(goalies)} goalies")
+        yield TeamCrawl(name, players, skaters, goalies)
+
+
+def crawl_to_csv(players_csv: str = 'players.csv',
+                 skaters_csv: str = 'skater_stats.csv',
+                 goalies_csv: str = 'goalie_stats.csv',
+                 concurrency: int = 1, rate: float = 0.0,
+                 base_url: str = BASE_URL, report_path: Optional[str] = None):
+    """Crawl the league once and write all three CSV files, and a JSON run
+    report to ``report_path`` if given."""
+    report = ScrapeReport('crawl_to_csv', concurrency=concurrency, rate=rate, base_url=base_url)
+    players, skaters, goalies = [], [], []
+    for crawl in crawl_league(concurrency, rate, base_url, report):
+        players.extend(crawl.players)
+        skaters.extend(crawl.skaters)
+        goalies.extend(crawl.goalies)
+    write_players_csv(players, players_csv)
+    write_skater_csv(skaters, skaters_csv)
+    write_goalie_csv(goalies, goalies_csv)
+    if report_path:
+        report.write(report_path)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Scrape rosters, skater stats and goalie stats in one pass')
+    parser.add_argument('--players', default='players.csv', help='Roster CSV to write')
+    parser.add_argument('--skaters', default='skater_stats.csv', help='Skater stats CSV to write')
+    parser.add_argument('--goalies', default='goalie_stats.csv', help='Goalie stats CSV to write')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Pages to fetch in parallel (1 = sequential)')
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help='Max requests per second to the host (0 = no limit)')
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help='Site root, e.g. a local mirror for testing')
+    add_cache_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    apply_cache_arguments(args)
+    crawl_to_csv(args.players, args.skaters, args.goalies,
+                 concurrency=args.concurrency, rate=args.rate,
+                 base_url=args.base_url.rstrip('/'),
+                 report_path=default_report_path(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,103 +1,548 @@
-from fastapi import FastAPI
+import os
+import re
+
+from typing import Optional
+
+from fastapi import FastAPI, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
+from starlette.routing import Match
+from sqlalchemy import func, text
 from sqlmodel import Session, select
-from models import Bio, Player_Stats, Goalie_Stats, engine
+from models import Bio, Player_Stats, Goalie_Stats, Team, Team_Summary, Db_Version, Leaderboard, LEADER_STATS, SEARCH_TABLES, engine, read_engine, make_async_engine
+from json_response import FastJSONResponse
+from response_cache import ResponseCache, etag_matches
+from metrics import MetricsMiddleware, RequestMetrics
+from team_summary import backfill_team_summary
+
+# handlers return FastJSONResponse themselves so FastAPI skips
+# jsonable_encoder; the default class only documents that in OpenAPI
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# models creates the tables at import; a database loaded before
+# Team_Summary existed gets its team rollups here
+with engine.begin() as conn:
+    backfill_team_summary(conn)
+
+# "sync" runs the handlers in FastAPI's threadpool on read_engine; "async"
+# serves them from the event loop through an aiosqlite engine
+API_MODE = os.environ.get("NCAA_API_MODE", "sync")
+if API_MODE not in ("sync", "async"):
+    raise ValueError(f"NCAA_API_MODE must be 'sync' or 'async', not {API_MODE!r}")
+if API_MODE == "async":
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    async_read_engine = make_async_engine()
+
+# API responses only change when a loader runs, so they are cached until the
+# database generation moves on (see response_cache.py)
+CACHED_PREFIXES = ("/teams", "/team/", "/player", "/leaders/", "/search")
+response_cache = ResponseCache(
+    max_bytes=int(float(os.environ.get("NCAA_CACHE_MAX_MB", 32)) * 1024 * 1024),
+    ttl=float(os.environ.get("NCAA_CACHE_TTL", 3600)),
+)
+
+GENERATION_QUERY = select(Db_Version.generation).where(Db_Version.id == 1)
+
+def current_generation() -> int:
+    with read_engine.connect() as conn:
+        return conn.execute(GENERATION_QUERY).scalar() or 0
+
+async def current_generation_async() -> int:
+    async with async_read_engine.connect() as conn:
+        return (await conn.execute(GENERATION_QUERY)).scalar() or 0
+
+@app.middleware("http")
+async def cache_responses(request: Request, call_next):
+    if request.method != "GET" or not request.url.path.startswith(CACHED_PREFIXES):
+        return await call_next(request)
+
+    if API_MODE == "async":
+        generation = await current_generation_async()
+    else:
+        generation = await run_in_threadpool(current_generation)
+    key = f"{request.url.path}?{request.url.query}"
+    entry = response_cache.get(key, generation)
+    if entry is None:
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = response_cache.put(key, generation, body, response.headers.get("content-type"))
+
+    # no-cache: clients may store the response but must revalidate, which
+    # is a cheap 304 as long as the data hasn't changed
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, headers=headers, media_type=entry.media_type)
+
+# Latency per route and SQL statements per request, served on /metrics.
+# NCAA_QUERY_BUDGET is the statement count above which a request is logged
+# as an N+1 suspect; NCAA_SLOW_QUERY_MS turns on the slow-query log.
+slow_query_ms = os.environ.get("NCAA_SLOW_QUERY_MS")
+request_metrics = RequestMetrics(
+    query_budget=int(os.environ.get("NCAA_QUERY_BUDGET", 10)),
+    slow_query_ms=float(slow_query_ms) if slow_query_ms else None,
+)
+request_metrics.instrument(async_read_engine.sync_engine if API_MODE == "async" else read_engine)
+request_metrics.callback("ncaa_response_cache_hits_total", "Response cache hits.",
+                         lambda: response_cache.hits, kind="counter")
+request_metrics.callback("ncaa_response_cache_misses_total", "Response cache misses.",
+                         lambda: response_cache.misses, kind="counter")
+request_metrics.callback("ncaa_response_cache_bytes", "Size of the cached responses.",
+                         lambda: response_cache.size)
+
+def route_label(scope) -> str:
+    """The route template (``/team/{team_name}/roster``) rather than the
+    path, so each route is one series.  Cache hits never reach the router,
+    so the route is looked up here for those."""
+    route = scope.get("route")
+    if route is None:
+        route = next((r for r in app.routes if r.matches(scope)[0] == Match.FULL), None)
+    if isinstance(route, APIRoute):
+        return route.path
+    return route.name if route is not None else "unmatched"
+
+# added after cache_responses, so it wraps it and cache hits (and the
+# generation lookup) are measured too
+app.add_middleware(MetricsMiddleware, metrics=request_metrics, label=route_label)
+
+async def get_metrics():
+    return Response(request_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Queries and response shaping are shared by the sync and async handlers.
+# Queries select plain columns and responses are built from the result rows,
+# so no ORM instances are created on the read path.
+
+PLAYER_FIELDS = [c.name for c in Bio.__table__.columns if c.name != "content_hash"]
+SKATER_STATS_FIELDS = ["GP", "G", "A", "TP", "PIM", "plus_minus"]
+GOALIE_STATS_FIELDS = ["GP", "GAA", "save_pct", "W", "L", "T", "SO", "TOI", "SVS"]
+TEAM_SUMMARY_FIELDS = [c.name for c in Team_Summary.__table__.columns]
+LEADER_FIELDS = ["rank", "team_rank", "player_id", "first_name", "last_name",
+                 "team", "position", "GP", "value"]
+# a save % or GAA over a game or two is not a leader; these boards leave out
+# goalies with fewer games unless min_gp= says otherwise (min_gp=0 for all)
+LEADER_MIN_GP = {"GAA": 10, "save_pct": 10}
+
+def field_columns(model, fields: list, prefix: str = ""):
+    table = model.__table__
+    return [table.c[name].label(prefix + name) for name in fields]
+
+def teams_query():
+    return select(Team.name).order_by(Team.name)
+
+def team_players_query(team_name: str):
+    return select(Bio.first_name, Bio.last_name, Bio.position).where(Bio.team == team_name)
+
+def bio_query(first_name: str, last_name: str, team: str):
+    return (select(*field_columns(Bio, PLAYER_FIELDS))
+            .where(Bio.first_name == first_name, Bio.last_name == last_name, Bio.team == team))
+
+def stats_query(bio):
+    # Stats fields depend on position
+    if bio["position"] == 'G':
+        model, fields = Goalie_Stats, GOALIE_STATS_FIELDS
+    else:
+        model, fields = Player_Stats, SKATER_STATS_FIELDS
+    return (select(*field_columns(model, fields))
+            .where(model.player_id == bio["player_id"], model.team == bio["team"]))
+
+def team_summary_query(team_name: str):
+    # precomputed at load time by team_summary.refresh_team_summary
+    return select(*field_columns(Team_Summary, TEAM_SUMMARY_FIELDS)).where(Team_Summary.team == team_name)
+
+def team_roster_query(team_name: str):
+    # one row per player with both stats tables outer-joined on the stats
+    # primary key; group_roster picks the one matching the position
+    return (
+        select(*field_columns(Bio, PLAYER_FIELDS),
+               *field_columns(Player_Stats, ["player_id", *SKATER_STATS_FIELDS], "skater_"),
+               *field_columns(Goalie_Stats, ["player_id", *GOALIE_STATS_FIELDS], "goalie_"))
+        .outerjoin(Player_Stats, (Player_Stats.player_id == Bio.player_id) & (Player_Stats.team == Bio.team))
+        .outerjoin(Goalie_Stats, (Goalie_Stats.player_id == Bio.player_id) & (Goalie_Stats.team == Bio.team))
+        .where(Bio.team == team_name)
+        .order_by(Bio.position)
+    )
+
+# fields= on list endpoints can select from these; list endpoints page with
+# a keyset cursor (the last key of the previous page) instead of an offset,
+# so every page is one index range read no matter how deep into the list it is
+def parse_fields(fields: Optional[str], allowed: list) -> list:
+    """Column names from a comma-separated ``fields=`` value, or all of
+    ``allowed`` when it is missing.  Raises ValueError for unknown names."""
+    if not fields:
+        return list(allowed)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+def projection(table, key: str, fields: list):
+    # the key is always selected since the next cursor comes from it
+    return [table.c[name] for name in dict.fromkeys([key, *fields])]
+
+def players_query(team: Optional[str], position: Optional[str], fields: list,
+                  cursor: int, limit: int):
+    bio = Bio.__table__
+    query = select(*projection(bio, "player_id", fields))
+    if team is not None:
+        query = query.where(bio.c.team == team)
+    if position is not None:
+        query = query.where(bio.c.position == position)
+    # one extra row tells whether there is a next page
+    return query.where(bio.c.player_id > cursor).order_by(bio.c.player_id).limit(limit + 1)
+
+def leader_min_gp(stat: str, min_gp: Optional[int]) -> int:
+    return LEADER_MIN_GP.get(stat, 0) if min_gp is None else min_gp
+
+def leader_filters(stat: str, team: Optional[str], position: Optional[str], min_gp: int):
+    board = Leaderboard.__table__
+    conditions = [board.c.stat == stat]
+    if team is not None:
+        conditions.append(board.c.team == team)
+    if position is not None:
+        conditions.append(board.c.position == position)
+    if min_gp > 0:
+        conditions.append(board.c.GP >= min_gp)
+    return conditions
+
+def rank_column(team: Optional[str], position: Optional[str], min_gp: int) -> Optional[str]:
+    """The precomputed rank that is the rank within the filtered list, or
+    None when the list is filtered some other way and is ranked per page."""
+    if position is None and min_gp <= 0:
+        return "rank" if team is None else "team_rank"
+    return None
+
+def leaders_query(stat: str, team: Optional[str], position: Optional[str],
+                  min_gp: int, fields: list, cursor: int, limit: int):
+    # each filter combination walks one of the (stat, ..., ordinal) indexes
+    board = Leaderboard.__table__
+    # value and the precomputed ranks are what the page is ranked from
+    columns = projection(board, "ordinal", [*fields, "value", "rank", "team_rank"])
+    return (select(*columns)
+            .where(*leader_filters(stat, team, position, min_gp), board.c.ordinal > cursor)
+            .order_by(board.c.ordinal).limit(limit + 1))
+
+def leaders_before_query(stat: str, team: Optional[str], position: Optional[str],
+                         min_gp: int, cursor: int, value: float):
+    """How many rows of the filtered list come before ``cursor``, and how
+    many of those tie ``value`` (the first value on the page)."""
+    board = Leaderboard.__table__
+    return (select(func.count(), func.count().filter(board.c.value == value))
+            .where(*leader_filters(stat, team, position, min_gp), board.c.ordinal <= cursor))
+
+# Prefix search reads bio_fts in rowid order so LIMIT stops the scan early
+# (ranking every match by bm25 costs 100ms+ for a one-letter prefix at 1M
+# players); name matches are fetched first and team/birth place matches fill
+# the remaining slots.  Fuzzy search ORs the query's trigrams against
+# bio_trigram and ranks by bm25, i.e. by how many (and how rare) trigrams a
+# name shares with the query.
+PREFIX_SEARCH_SQL = text(
+    "SELECT b.player_id, b.first_name, b.last_name, b.team, b.position "
+    "FROM bio_fts JOIN bio b ON b.player_id = bio_fts.rowid "
+    "WHERE bio_fts MATCH :match LIMIT :limit"
+)
+FUZZY_SEARCH_SQL = text(
+    "SELECT b.player_id, b.first_name, b.last_name, b.team, b.position "
+    "FROM bio_trigram JOIN bio b ON b.player_id = bio_trigram.rowid "
+    "WHERE bio_trigram MATCH :match ORDER BY bio_trigram.rank LIMIT :limit"
+)
+
+def search_match(q: str, fuzzy: bool) -> Optional[str]:
+    """FTS5 query for user input: every word as a prefix, or with
+    ``fuzzy`` any trigram of any word.  None if nothing is searchable."""
+    words = re.findall(r"\w+", q.lower())
+    if fuzzy:
+        trigrams = {w[i:i + 3] for w in words for i in range(len(w) - 2)}
+        return " OR ".join(f'"{t}"' for t in sorted(trigrams)) or None
+    return " AND ".join(f'"{w}"*' for w in words) or None
+
+def search_queries(match: str, fuzzy: bool, limit: int):
+    """``(sql, params)`` pairs to run in order until ``limit`` rows are found."""
+    if fuzzy:
+        return [(FUZZY_SEARCH_SQL, {"match": match, "limit": limit})]
+    return [
+        (PREFIX_SEARCH_SQL, {"match": f"{{first_name last_name}} : ({match})", "limit": limit}),
+        (PREFIX_SEARCH_SQL, {"match": match, "limit": 2 * limit}),
+    ]
 
-app = FastAPI()
+def add_results(results: list, rows, limit: int) -> bool:
+    """Append unseen rows to ``results``; True once it holds ``limit``."""
+    seen = {r["player_id"] for r in results}
+    for row in rows:
+        if len(results) >= limit:
+            break
+        if row["player_id"] not in seen:
+            results.append(dict(row))
+    return len(results) >= limit
+
+def group_players(team_name: str, players) -> dict:
+    # Group players by position
+    players_by_position = {}
+    for player in players:
+        position = player.position or "Unknown"
+        full_name = f"{player.first_name} {player.last_name}"
+        if position not in players_by_position:
+            players_by_position[position] = []
+        players_by_position[position].append(full_name)
+
+    # Sort players within each position
+    for position in players_by_position:
+        players_by_position[position].sort()
+
+    return {"team": team_name, "players_by_position": players_by_position}
+
+def player_details(bio, stats) -> dict:
+    return {"bio": dict(bio), "stats": dict(stats) if stats is not None else None}
+
+def group_roster(team_name: str, rows) -> dict:
+    roster_by_position = {}
+    for row in rows:
+        bio = {name: row[name] for name in PLAYER_FIELDS}
+        if bio["position"] == 'G':
+            prefix, fields = "goalie_", GOALIE_STATS_FIELDS
+        else:
+            prefix, fields = "skater_", SKATER_STATS_FIELDS
+        stats = None
+        if row[prefix + "player_id"] is not None:
+            stats = {name: row[prefix + name] for name in fields}
+        position = bio["position"] or "Unknown"
+        roster_by_position.setdefault(position, []).append({"bio": bio, "stats": stats})
+
+    # same order as /team/{team}/players
+    for players in roster_by_position.values():
+        players.sort(key=lambda p: f"{p['bio']['first_name']} {p['bio']['last_name']}")
+
+    return {"team": team_name, "players_by_position": roster_by_position}
+
+def page(rows, fields: list, key: str, limit: int):
+    """``(items, next_cursor)`` from a query that fetched ``limit + 1`` rows."""
+    items = [{name: row._mapping[name] for name in fields} for row in rows[:limit]]
+    next_cursor = rows[limit - 1]._mapping[key] if len(rows) > limit else None
+    return items, next_cursor
+
+def players_response(team: Optional[str], position: Optional[str], fields: list,
+                     limit: int, rows) -> dict:
+    players, next_cursor = page(rows, fields, "player_id", limit)
+    return {"team": team, "position": position, "limit": limit,
+            "next_cursor": next_cursor, "players": players}
+
+def page_ranks(rows, column: Optional[str], before) -> list:
+    """Ranks (ties share one) of a leaders page within the filtered list.
+    ``before`` is ``(rows before the page, how many tie its first value)``."""
+    if column is not None:
+        return [row._mapping[column] for row in rows]
+    position, tied = before
+    rank = position - tied + 1 if tied else None
+    previous = rows[0]._mapping["value"] if tied else None
+    ranks = []
+    for row in rows:
+        position += 1
+        value = row._mapping["value"]
+        if rank is None or value != previous:
+            rank = position
+        previous = value
+        ranks.append(rank)
+    return ranks
+
+def leaders_response(stat: str, team: Optional[str], position: Optional[str],
+                     min_gp: int, fields: list, limit: int, rows, before=(0, 0)) -> dict:
+    leaders, next_cursor = page(rows, fields, "ordinal", limit)
+    if "rank" in fields:
+        ranks = page_ranks(rows[:limit], rank_column(team, position, min_gp), before)
+        for leader, rank in zip(leaders, ranks):
+            leader["rank"] = rank
+    return {"stat": stat, "team": team, "position": position, "min_gp": min_gp,
+            "limit": limit, "next_cursor": next_cursor, "leaders": leaders}
+
+def search_response(q: str, fuzzy: bool, results: list) -> dict:
+    return {"q": q, "fuzzy": fuzzy, "results": results}
+
+def unknown_stat(stat: str) -> dict:
+    return {"error": f"Unknown stat: {stat}", "stats": list(LEADER_STATS)}
+
+def unknown_fields(error: ValueError, allowed: list) -> dict:
+    return {"error": str(error), "fields": allowed}
+
+def fuzzy_unavailable() -> dict:
+    return {"error": "Fuzzy search needs SQLite 3.34+ (the FTS5 trigram tokenizer)"}
+
+# --- sync handlers ---
 
-@app.get("/teams")
 def get_teams():
-    print("Teams endpoint called")
-    with Session(engine) as session:
-        # Query unique teams from Bio table
-        teams_bio = session.exec(select(Bio.team).where(Bio.team.isnot(None)).distinct()).all()
-        # Query unique teams from Player_Stats table
-        teams_player = session.exec(select(Player_Stats.team).where(Player_Stats.team.isnot(None)).distinct()).all()
-        # Query unique teams from Goalie_Stats table
-        teams_goalie = session.exec(select(Goalie_Stats.team).where(Goalie_Stats.team.isnot(None)).distinct()).all()
-        
-        # Combine and get unique teams
-        all_teams = set(teams_bio + teams_player + teams_goalie)
-        print(f"Found {len(all_teams)} teams")
-        return {"teams": sorted(list(all_teams))}
-
-@app.get("/team/{team_name}/players")
+    with Session(read_engine) as session:
+        teams = session.exec(teams_query()).all()
+        return FastJSONResponse({"teams": list(teams)})
+
 def get_team_players(team_name: str):
-    with Session(engine) as session:
+    with Session(read_engine) as session:
         # Query players from Bio table for the team
-        players = session.exec(select(Bio.first_name, Bio.last_name, Bio.position).where(Bio.team == team_name)).all()
-        
-        # Group players by position
-        players_by_position = {}
-        for player in players:
-            position = player.position or "Unknown"
-            full_name = f"{player.first_name} {player.last_name}"
-            if position not in players_by_position:
-                players_by_position[position] = []
-            players_by_position[position].append(full_name)
-        
-        # Sort players within each position
-        for position in players_by_position:
-            players_by_position[position].sort()
-        
-        return {"team": team_name, "players_by_position": players_by_position}
-
-@app.get("/player/{first_name}/{last_name}")
+        players = session.exec(team_players_query(team_name)).all()
+        return FastJSONResponse(group_players(team_name, players))
+
+def get_team_roster(team_name: str):
+    with Session(read_engine) as session:
+        rows = session.exec(team_roster_query(team_name)).mappings().all()
+        return FastJSONResponse(group_roster(team_name, rows))
+
+def get_team_summary(team_name: str):
+    with Session(read_engine) as session:
+        summary = session.exec(team_summary_query(team_name)).mappings().first()
+        if not summary:
+            return FastJSONResponse({"error": "Team not found"})
+        return FastJSONResponse(dict(summary))
+
+def get_players(team: Optional[str] = None, position: Optional[str] = None,
+                fields: Optional[str] = None, cursor: int = Query(0, ge=0),
+                limit: int = Query(50, ge=1, le=500)):
+    try:
+        columns = parse_fields(fields, PLAYER_FIELDS)
+    except ValueError as e:
+        return FastJSONResponse(unknown_fields(e, PLAYER_FIELDS))
+    with Session(read_engine) as session:
+        rows = session.exec(players_query(team, position, columns, cursor, limit)).all()
+        return FastJSONResponse(players_response(team, position, columns, limit, rows))
+
+def get_leaders(stat: str, team: Optional[str] = None, position: Optional[str] = None,
+                min_gp: Optional[int] = Query(None, ge=0), fields: Optional[str] = None,
+                cursor: int = Query(0, ge=0), limit: int = Query(25, ge=1, le=100)):
+    if stat not in LEADER_STATS:
+        return FastJSONResponse(unknown_stat(stat))
+    try:
+        columns = parse_fields(fields, LEADER_FIELDS)
+    except ValueError as e:
+        return FastJSONResponse(unknown_fields(e, LEADER_FIELDS))
+    min_gp = leader_min_gp(stat, min_gp)
+    with Session(read_engine) as session:
+        rows = session.exec(leaders_query(stat, team, position, min_gp, columns, cursor, limit)).all()
+        before = (0, 0)
+        if cursor and rows and "rank" in columns and rank_column(team, position, min_gp) is None:
+            query = leaders_before_query(stat, team, position, min_gp, cursor, rows[0].value)
+            before = session.exec(query).one()
+        return FastJSONResponse(leaders_response(stat, team, position, min_gp, columns, limit, rows, before))
+
+def search_players(q: str = Query(..., min_length=1), fuzzy: bool = False,
+                   limit: int = Query(10, ge=1, le=50)):
+    if fuzzy and "bio_trigram" not in SEARCH_TABLES:
+        return FastJSONResponse(fuzzy_unavailable(), status_code=501)
+    match = search_match(q, fuzzy)
+    if match is None:
+        return FastJSONResponse(search_response(q, fuzzy, []))
+    results = []
+    with read_engine.connect() as conn:
+        for sql, params in search_queries(match, fuzzy, limit):
+            if add_results(results, conn.execute(sql, params).mappings(), limit):
+                break
+    return FastJSONResponse(search_response(q, fuzzy, results))
+
 def get_player_details(first_name: str, last_name: str, team: str):
-    with Session(engine) as session:
-        # Get bio info
-        bio = session.exec(select(Bio).where(Bio.first_name == first_name, Bio.last_name == last_name, Bio.team == team)).first()
+    with Session(read_engine) as session:
+        bio = session.exec(bio_query(first_name, last_name, team)).mappings().first()
         if not bio:
-            return {"error": "Player not found"}
-        
-        bio_data = {
-            "first_name": bio.first_name,
-            "last_name": bio.last_name,
-            "team": bio.team,
-            "number": bio.number,
-            "position": bio.position,
-            "age": bio.age,
-            "born": bio.born,
-            "birth_place": bio.birth_place,
-            "country": bio.country,
-            "height": bio.height,
-            "weight": bio.weight,
-            "shoots": bio.shoots
-        }
-        
-        # Get stats based on position
-        if bio.position == 'G':
-            stats = session.exec(select(Goalie_Stats).where(Goalie_Stats.first_name == first_name, Goalie_Stats.last_name == last_name)).first()
-            if stats:
-                stats_data = {
-                    "GP": stats.GP,
-                    "GAA": stats.GAA,
-                    "save_pct": stats.save_pct,
-                    "W": stats.W,
-                    "L": stats.L,
-                    "T": stats.T,
-                    "SO": stats.SO,
-                    "TOI": stats.TOI,
-                    "SVS": stats.SVS
-                }
-            else:
-                stats_data = None
-        else:
-            stats = session.exec(select(Player_Stats).where(Player_Stats.first_name == first_name, Player_Stats.last_name == last_name)).first()
-            if stats:
-                stats_data = {
-                    "GP": stats.GP,
-                    "G": stats.G,
-                    "A": stats.A,
-                    "TP": stats.TP,
-                    "PIM": stats.PIM,
-                    "plus_minus": stats.plus_minus
-                }
-            else:
-                stats_data = None
-        
-        return {"bio": bio_data, "stats": stats_data}
+            return FastJSONResponse({"error": "Player not found"})
+        stats = session.exec(stats_query(bio)).mappings().first()
+        return FastJSONResponse(player_details(bio, stats))
+
+# --- async handlers ---
+
+async def get_teams_async():
+    async with AsyncSession(async_read_engine) as session:
+        teams = (await session.exec(teams_query())).all()
+        return FastJSONResponse({"teams": list(teams)})
+
+async def get_team_players_async(team_name: str):
+    async with AsyncSession(async_read_engine) as session:
+        players = (await session.exec(team_players_query(team_name))).all()
+        return FastJSONResponse(group_players(team_name, players))
+
+async def get_team_roster_async(team_name: str):
+    async with AsyncSession(async_read_engine) as session:
+        rows = (await session.exec(team_roster_query(team_name))).mappings().all()
+        return FastJSONResponse(group_roster(team_name, rows))
+
+async def get_team_summary_async(team_name: str):
+    async with AsyncSession(async_read_engine) as session:
+        summary = (await session.exec(team_summary_query(team_name))).mappings().first()
+        if not summary:
+            return FastJSONResponse({"error": "Team not found"})
+        return FastJSONResponse(dict(summary))
+
+async def get_players_async(team: Optional[str] = None, position: Optional[str] = None,
+                            fields: Optional[str] = None, cursor: int = Query(0, ge=0),
+                            limit: int = Query(50, ge=1, le=500)):
+    try:
+        columns = parse_fields(fields, PLAYER_FIELDS)
+    except ValueError as e:
+        return FastJSONResponse(unknown_fields(e, PLAYER_FIELDS))
+    async with AsyncSession(async_read_engine) as session:
+        rows = (await session.exec(players_query(team, position, columns, cursor, limit))).all()
+        return FastJSONResponse(players_response(team, position, columns, limit, rows))
+
+async def get_leaders_async(stat: str, team: Optional[str] = None, position: Optional[str] = None,
+                            min_gp: Optional[int] = Query(None, ge=0), fields: Optional[str] = None,
+                            cursor: int = Query(0, ge=0), limit: int = Query(25, ge=1, le=100)):
+    if stat not in LEADER_STATS:
+        return FastJSONResponse(unknown_stat(stat))
+    try:
+        columns = parse_fields(fields, LEADER_FIELDS)
+    except ValueError as e:
+        return FastJSONResponse(unknown_fields(e, LEADER_FIELDS))
+    min_gp = leader_min_gp(stat, min_gp)
+    async with AsyncSession(async_read_engine) as session:
+        query = leaders_query(stat, team, position, min_gp, columns, cursor, limit)
+        rows = (await session.exec(query)).all()
+        before = (0, 0)
+        if cursor and rows and "rank" in columns and rank_column(team, position, min_gp) is None:
+            query = leaders_before_query(stat, team, position, min_gp, cursor, rows[0].value)
+            before = (await session.exec(query)).one()
+        return FastJSONResponse(leaders_response(stat, team, position, min_gp, columns, limit, rows, before))
+
+async def search_players_async(q: str = Query(..., min_length=1), fuzzy: bool = False,
+                               limit: int = Query(10, ge=1, le=50)):
+    if fuzzy and "bio_trigram" not in SEARCH_TABLES:
+        return FastJSONResponse(fuzzy_unavailable(), status_code=501)
+    match = search_match(q, fuzzy)
+    if match is None:
+        return FastJSONResponse(search_response(q, fuzzy, []))
+    results = []
+    async with async_read_engine.connect() as conn:
+        for sql, params in search_queries(match, fuzzy, limit):
+            if add_results(results, (await conn.execute(sql, params)).mappings(), limit):
+                break
+    return FastJSONResponse(search_response(q, fuzzy, results))
+
+async def get_player_details_async(first_name: str, last_name: str, team: str):
+    async with AsyncSession(async_read_engine) as session:
+        bio = (await session.exec(bio_query(first_name, last_name, team))).mappings().first()
+        if not bio:
+            return FastJSONResponse({"error": "Player not found"})
+        stats = (await session.exec(stats_query(bio))).mappings().first()
+        return FastJSONResponse(player_details(bio, stats))
+
+if API_MODE == "async":
+    app.get("/teams")(get_teams_async)
+    app.get("/team/{team_name}/players")(get_team_players_async)
+    app.get("/team/{team_name}/roster")(get_team_roster_async)
+    app.get("/team/{team_name}/summary")(get_team_summary_async)
+    app.get("/player/{first_name}/{last_name}")(get_player_details_async)
+    app.get("/players")(get_players_async)
+    app.get("/leaders/{stat}")(get_leaders_async)
+    app.get("/search")(search_players_async)
+else:
+    app.get("/teams")(get_teams)
+    app.get("/team/{team_name}/players")(get_team_players)
+    app.get("/team/{team_name}/roster")(get_team_roster)
+    app.get("/team/{team_name}/summary")(get_team_summary)
+    app.get("/player/{first_name}/{last_name}")(get_player_details)
+    app.get("/players")(get_players)
+    app.get("/leaders/{stat}")(get_leaders)
+    app.get("/search")(search_players)
+app.get("/metrics")(get_metrics)
 
 app.mount("/", StaticFiles(directory = "static", html = True), name = "static")
 
-# uvicorn main:app --reload --host 0.0.0.0 --port 8000
\ No newline at end of file
+# uvicorn main:app --reload --host 0.0.0.0 --port 8000
+# NCAA_API_MODE=async uvicorn main:app --host 0.0.0.0 --port 8000
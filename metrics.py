@@ -0,0 +1,238 @@
+"""Request and SQL metrics for the API, in Prometheus text format.
+
+``instrument(engine)`` hooks SQLAlchemy's cursor events so every statement
+is counted and timed, both overall and against the request that issued
+it.  ``RequestMetrics.track()`` opens that per-request scope (a
+``ContextVar``, which FastAPI copies into the threadpool that runs sync
+handlers and which the async engine's greenlets share).  When a request
+finishes, its latency goes into a per-route histogram and a request that
+ran more than ``query_budget`` statements is logged as an N+1 suspect.
+
+With ``slow_query_ms`` set, statements slower than that are logged along
+with their ``EXPLAIN QUERY PLAN``.
+
+No client library is needed; ``render()`` writes the text exposition
+format directly.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+# statements per request
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Iterable[float]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (+Inf last), sum]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        for label_values, (counts, total) in series:
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labels, k)} {v:g}" for k, v in values)
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+class RequestStats:
+    """Statements run on behalf of one request."""
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (no extra task or body streaming, unlike
+    ``@app.middleware``) that times each HTTP request.  ``label(scope)``
+    names the route a request belongs to."""
+
+    def __init__(self, app, metrics: "RequestMetrics", label):
+        self.app = app
+        self.metrics = metrics
+        self.label = label
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = self.metrics.track()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            self.metrics.finish(stats, scope["method"], self.label(scope), scope["path"],
+                                status, time.perf_counter() - started)
+
+
+class RequestMetrics:
+    def __init__(self, query_budget: int = 10, slow_query_ms: Optional[float] = None):
+        self.query_budget = query_budget
+        self.slow_query_seconds = slow_query_ms / 1000 if slow_query_ms is not None else None
+        self.request_seconds = Histogram(
+            "ncaa_http_request_duration_seconds", "Time to serve a request, by route.",
+            ("method", "route", "status"), LATENCY_BUCKETS)
+        self.request_queries = Histogram(
+            "ncaa_http_request_queries", "SQL statements run per request, by route.",
+            ("route",), COUNT_BUCKETS)
+        self.query_seconds = Histogram(
+            "ncaa_db_query_duration_seconds", "Time to execute one SQL statement.",
+            (), QUERY_BUCKETS)
+        self.n_plus_one = Counter(
+            "ncaa_n_plus_one_suspects_total",
+            "Requests that ran more SQL statements than the query budget.", ("route",))
+        self.slow_queries = Counter(
+            "ncaa_slow_queries_total", "SQL statements slower than the slow-query threshold.")
+        self.callbacks: Dict[str, Tuple[str, str, callable]] = {}
+
+    # --- requests ---
+
+    def track(self) -> RequestStats:
+        """Start counting statements for the current request."""
+        stats = RequestStats()
+        _current.set(stats)
+        return stats
+
+    def finish(self, stats: RequestStats, method: str, route: str, path: str,
+               status: int, seconds: float):
+        self.request_seconds.observe(seconds, method, route, str(status))
+        self.request_queries.observe(stats.queries, route)
+        if stats.queries > self.query_budget:
+            self.n_plus_one.inc(route)
+            print(f"N+1 suspect: {method} {path} ran {stats.queries} queries "
+                  f"({stats.query_seconds * 1000:.1f} ms) for a budget of {self.query_budget}")
+
+    # --- SQL ---
+
+    def instrument(self, engine):
+        """Count and time every statement ``engine`` executes (pass
+        ``AsyncEngine.sync_engine`` for an async engine)."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._failed_execute)
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @staticmethod
+    def _failed_execute(context):
+        if context.connection is not None and context.cursor is not None:
+            context.connection.info.get("query_started", [None]).pop()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        seconds = time.perf_counter() - started
+        self.query_seconds.observe(seconds)
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += seconds
+        if self.slow_query_seconds is not None and seconds >= self.slow_query_seconds:
+            self.slow_queries.inc()
+            self._log_slow_query(conn, statement, parameters, seconds)
+
+    @staticmethod
+    def _log_slow_query(conn, statement: str, parameters, seconds: float):
+        print(f"Slow query ({seconds * 1000:.1f} ms): {' '.join(statement.split())}")
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        # on the raw DBAPI connection, so the EXPLAIN itself isn't counted
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            for _id, _parent, _unused, detail in cursor.fetchall():
+                print(f"    {detail}")
+        except Exception as e:
+            print(f"    EXPLAIN QUERY PLAN failed: {e}")
+        finally:
+            cursor.close()
+
+    # --- exposition ---
+
+    def callback(self, name: str, help_text: str, read, kind: str = "gauge"):
+        """Report ``read()`` at every scrape, for values kept elsewhere."""
+        self.callbacks[name] = (help_text, kind, read)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.request_seconds, self.request_queries, self.query_seconds,
+                       self.n_plus_one, self.slow_queries):
+            lines.extend(metric.render())
+        for name, (help_text, kind, read) in self.callbacks.items():
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {read():g}"])
+        return "\n".join(lines) + "\n"
@@ -1,12 +1,16 @@
+import os
+from datetime import datetime, timezone
 from typing import Optional
 from sqlmodel import SQLModel, Field, create_engine
-from sqlalchemy import PrimaryKeyConstraint
+from sqlalchemy import Index, PrimaryKeyConstraint, UniqueConstraint, event, inspect, text
+from sqlalchemy.exc import OperationalError
 
 
 class Bio(SQLModel, table=True):
-	first_name: str = Field(index=True)
-	last_name: str = Field(index=True)
-	team: Optional[str] = None
+	player_id: Optional[int] = Field(default=None, primary_key=True)
+	first_name: str
+	last_name: str
+	team: str
 	number: Optional[str] = None
 	position: Optional[str] = None
 	age: Optional[int] = None
@@ -16,25 +20,43 @@ class Bio(SQLModel, table=True):
 	height: Optional[str] = None
 	weight: Optional[str] = None
 	shoots: Optional[str] = None
+	content_hash: Optional[str] = None
     
-	__table_args__ = (PrimaryKeyConstraint("first_name", "last_name"),)
+	# a player is identified by name *and* team, so namesakes on different
+	# teams no longer overwrite each other; the second index covers the
+	# team page query (team/position -> names) without touching the table
+	__table_args__ = (
+		UniqueConstraint("first_name", "last_name", "team", name="uq_bio_name_team"),
+		Index("ix_bio_team_position", "team", "position", "first_name", "last_name"),
+		# keyset pages of /players?team= and ?position=, ordered by player_id
+		Index("ix_bio_team_id", "team", "player_id"),
+		Index("ix_bio_position_id", "position", "player_id"),
+	)
 
 class Player_Stats(SQLModel, table=True):
-	first_name: str = Field(index=True)
-	last_name: str = Field(index=True)
+	player_id: int = Field(foreign_key="bio.player_id")
+	team: str
+	# names are copied from Bio for display and CSV round trips
+	first_name: str
+	last_name: str
 	GP: Optional[int] = None
 	G: Optional[int] = None
 	A: Optional[int] = None
 	TP: Optional[int] = None
 	PIM: Optional[int] = None
 	plus_minus: Optional[int] = Field(default=None, description="Plus/minus")
-	team: Optional[str] = None
+	content_hash: Optional[str] = None
     
-	__table_args__ = (PrimaryKeyConstraint("first_name", "last_name"),)
+	__table_args__ = (
+		PrimaryKeyConstraint("player_id", "team"),
+		Index("ix_player_stats_team", "team"),
+	)
 
 class Goalie_Stats(SQLModel, table=True):
-	first_name: str = Field(index=True)
-	last_name: str = Field(index=True)
+	player_id: int = Field(foreign_key="bio.player_id")
+	team: str
+	first_name: str
+	last_name: str
 	GP: Optional[int] = None
 	GAA: Optional[float] = None
 	save_pct: Optional[float] = None
@@ -44,9 +66,344 @@ class Goalie_Stats(SQLModel, table=True):
 	SO: Optional[int] = None
 	TOI: Optional[str] = None
 	SVS: Optional[int] = None
-	team: Optional[str] = None
+	content_hash: Optional[str] = None
     
-	__table_args__ = (PrimaryKeyConstraint("first_name", "last_name"),)
+	__table_args__ = (
+		PrimaryKeyConstraint("player_id", "team"),
+		Index("ix_goalie_stats_team", "team"),
+	)
 
-engine = create_engine("sqlite:///ncaa_hockey.db")
-SQLModel.metadata.create_all(engine)
\ No newline at end of file
+def utcnow() -> datetime:
+	return datetime.now(timezone.utc)
+
+class Change_Log(SQLModel, table=True):
+	"""One row per inserted or changed player row, written by the loaders.
+
+	Rows are keyed by team as well as player, so a player who changes team
+	shows up as an insert on the new team rather than as a move.
+	"""
+	id: Optional[int] = Field(default=None, primary_key=True)
+	table_name: str
+	player_id: Optional[int] = Field(default=None, index=True)
+	first_name: str
+	last_name: str
+	team: Optional[str] = Field(default=None, index=True)
+	change: str = Field(description="insert or update")
+	changed_columns: Optional[str] = Field(default=None, description="Comma-separated column names")
+	changed_at: datetime = Field(default_factory=utcnow, index=True)
+
+
+class Team(SQLModel, table=True):
+	"""Catalog of teams, maintained by the loaders so ``/teams`` doesn't
+	have to scan the player tables."""
+	name: str = Field(primary_key=True)
+	player_count: int = 0
+
+class Db_Version(SQLModel, table=True):
+	"""Single row whose ``generation`` every load that changes data bumps,
+	in the same transaction.  In-process API caches compare against it."""
+	id: int = Field(default=1, primary_key=True)
+	generation: int = 0
+	updated_at: Optional[datetime] = None
+
+# Stats ranked in the ``Leaderboard`` table: name -> (table, column, whether
+# higher is better).  Names match the keys of the /player stats payload.
+LEADER_STATS = {
+	"G": ("player_stats", "G", True),
+	"A": ("player_stats", "A", True),
+	"TP": ("player_stats", "TP", True),
+	"PIM": ("player_stats", "PIM", True),
+	"plus_minus": ("player_stats", "plus_minus", True),
+	"GAA": ("goalie_stats", "GAA", False),
+	"save_pct": ("goalie_stats", "save_pct", True),
+	"W": ("goalie_stats", "W", True),
+	"SO": ("goalie_stats", "SO", True),
+	"SVS": ("goalie_stats", "SVS", True),
+}
+
+class Leaderboard(SQLModel, table=True):
+	"""Precomputed rankings, one row per player and ``LEADER_STATS`` entry,
+	rebuilt by ``rebuild_leaderboard`` once per load that changes data.
+
+	``rank``/``team_rank`` are league and team ranks (ties share a rank);
+	``ordinal`` is a unique row number in ranking order that the indexes
+	below are sorted on, so a leaders request is an index range read.
+	"""
+	stat: str
+	player_id: int
+	team: str
+	first_name: str
+	last_name: str
+	position: Optional[str] = None
+	GP: Optional[int] = None
+	value: float
+	rank: int
+	team_rank: int
+	ordinal: int
+
+	__table_args__ = (
+		PrimaryKeyConstraint("stat", "player_id", "team"),
+		Index("ix_leaderboard_stat_ordinal", "stat", "ordinal"),
+		Index("ix_leaderboard_stat_team", "stat", "team", "ordinal"),
+		Index("ix_leaderboard_stat_position", "stat", "position", "ordinal"),
+	)
+
+class Team_Summary(SQLModel, table=True):
+	"""Per-team totals and rates, one row per team with stats, recomputed
+	by ``team_summary.refresh_team_summary`` for the teams a load changed.
+
+	``games`` is the most games any skater played (the stats don't record
+	the team's own count); the per-game rates divide by it.  ``gaa`` is the
+	goalies' GAA weighted by time on ice and ``save_pct`` is saves over
+	saves plus goals against, both over goalies with TOI recorded.
+	"""
+	team: str = Field(primary_key=True)
+	skaters: int = 0
+	goalies: int = 0
+	games: Optional[int] = None
+	goals: int = 0
+	assists: int = 0
+	points: int = 0
+	pim: int = 0
+	goals_per_game: Optional[float] = None
+	points_per_game: Optional[float] = None
+	pim_per_game: Optional[float] = None
+	goalie_minutes: Optional[float] = None
+	goals_against: Optional[int] = None
+	saves: Optional[int] = None
+	save_pct: Optional[float] = None
+	gaa: Optional[float] = None
+
+def rebuild_leaderboard(conn):
+	"""Recompute every ``Leaderboard`` row from the stats tables with
+	window functions.  Ranks are league-wide, so a change on one team can
+	move players on every other; the whole table is rebuilt."""
+	conn.execute(text("DELETE FROM leaderboard"))
+	for stat, (table, column, descending) in LEADER_STATS.items():
+		order = f's."{column}" {"DESC" if descending else "ASC"}'
+		conn.execute(text(
+			"INSERT INTO leaderboard (stat, player_id, team, first_name, last_name, position, "
+			'"GP", value, rank, team_rank, ordinal) '
+			f'SELECT :stat, s.player_id, s.team, s.first_name, s.last_name, b.position, s."GP", s."{column}", '
+			f"RANK() OVER (ORDER BY {order}), "
+			f"RANK() OVER (PARTITION BY s.team ORDER BY {order}), "
+			f"ROW_NUMBER() OVER (ORDER BY {order}, s.last_name, s.first_name, s.player_id) "
+			f"FROM {table} s JOIN bio b ON b.player_id = s.player_id "
+			f'WHERE s."{column}" IS NOT NULL'
+		), {"stat": stat})
+
+
+def _migrate_to_player_ids(engine):
+	"""Rebuild a database created before ``player_id`` existed.
+
+	The old tables were keyed on ``(first_name, last_name)`` alone.  They are
+	renamed out of the way, the new tables created, bios copied over (every
+	one gets a ``player_id``), stats rows without a matching bio get a stub
+	bio so they keep their data, and the stats are re-keyed by
+	``(player_id, team)``.  Content hashes are left empty so the next load
+	recomputes them.  Runs in a single transaction.
+	"""
+	inspector = inspect(engine)
+	if not inspector.has_table("bio"):
+		return
+	if "player_id" in {c["name"] for c in inspector.get_columns("bio")}:
+		return
+
+	old_indexes = [index["name"] for name in ("bio", "player_stats", "goalie_stats")
+				   for index in inspector.get_indexes(name)]
+	bio_cols = "number, position, age, born, birth_place, country, height, weight, shoots"
+	skater_cols = '"GP", "G", "A", "TP", "PIM", plus_minus'
+	goalie_cols = '"GP", "GAA", save_pct, "W", "L", "T", "SO", "TOI", "SVS"'
+	with engine.begin() as conn:
+		for name in ("bio", "player_stats", "goalie_stats"):
+			conn.execute(text(f"ALTER TABLE {name} RENAME TO {name}_old"))
+		for index in old_indexes:
+			conn.execute(text(f'DROP INDEX IF EXISTS "{index}"'))
+		SQLModel.metadata.create_all(conn, tables=[
+			Bio.__table__, Player_Stats.__table__, Goalie_Stats.__table__,
+		])
+		conn.execute(text(
+			f"INSERT INTO bio (first_name, last_name, team, {bio_cols}) "
+			f"SELECT first_name, last_name, COALESCE(team, ''), {bio_cols} FROM bio_old"
+		))
+		for name, cols, position in (("player_stats", skater_cols, "NULL"),
+									 ("goalie_stats", goalie_cols, "'G'")):
+			conn.execute(text(
+				"INSERT OR IGNORE INTO bio (first_name, last_name, team, position) "
+				f"SELECT first_name, last_name, COALESCE(team, ''), {position} FROM {name}_old"
+			))
+			select_cols = ", ".join(f"s.{c}" for c in cols.split(", "))
+			conn.execute(text(
+				f"INSERT INTO {name} (player_id, team, first_name, last_name, {cols}) "
+				f"SELECT b.player_id, b.team, s.first_name, s.last_name, {select_cols} "
+				f"FROM {name}_old s JOIN bio b ON b.first_name = s.first_name "
+				"AND b.last_name = s.last_name AND b.team = COALESCE(s.team, '')"
+			))
+		for name in ("bio", "player_stats", "goalie_stats"):
+			conn.execute(text(f"DROP TABLE {name}_old"))
+	print("Migrated database to player_id schema")
+
+
+def _add_missing_columns(engine):
+	"""Add nullable columns and indexes that exist on the models but not
+	yet in an older database file (``create_all`` only creates missing
+	tables)."""
+	inspector = inspect(engine)
+	with engine.begin() as conn:
+		for table in SQLModel.metadata.sorted_tables:
+			if not inspector.has_table(table.name):
+				continue
+			present = {c["name"] for c in inspector.get_columns(table.name)}
+			for column in table.columns:
+				if column.name not in present and column.nullable:
+					ddl = column.type.compile(engine.dialect)
+					conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {ddl}'))
+			for index in table.indexes:
+				index.create(conn, checkfirst=True)
+
+def _init_catalog(engine):
+	"""Create the ``Db_Version`` row and fill ``Team`` and ``Leaderboard``
+	for databases loaded before those tables existed.  (``Team_Summary`` is
+	filled by ``team_summary.backfill_team_summary``, which needs pandas.)"""
+	with engine.begin() as conn:
+		conn.execute(text("INSERT OR IGNORE INTO db_version (id, generation) VALUES (1, 0)"))
+		if conn.execute(text("SELECT 1 FROM team LIMIT 1")).first() is None:
+			conn.execute(text(
+				"INSERT INTO team (name, player_count) "
+				"SELECT team, count(*) FROM bio GROUP BY team"
+			))
+		if conn.execute(text("SELECT 1 FROM leaderboard LIMIT 1")).first() is None:
+			rebuild_leaderboard(conn)
+
+# Full-text search over Bio.  Both are external-content FTS5 tables (they
+# store only the index; rows are read from bio) kept in sync by triggers, so
+# every loader write updates them in the same transaction.  bio_fts has
+# prefix indexes for autocomplete; bio_trigram indexes name trigrams for
+# fuzzy matching.  The trigram tokenizer needs SQLite 3.34+; without it
+# bio_trigram is left out and fuzzy search is unavailable.
+SEARCH_INDEXES = {
+	"bio_fts": (("first_name", "last_name", "team", "birth_place"),
+				"tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'"),
+	"bio_trigram": (("first_name", "last_name"), "tokenize='trigram'"),
+}
+
+def _has_trigram_tokenizer(engine) -> bool:
+	"""Whether this SQLite's FTS5 has the trigram tokenizer."""
+	with engine.connect() as conn:
+		try:
+			conn.execute(text("CREATE VIRTUAL TABLE temp.trigram_probe USING fts5(x, tokenize='trigram')"))
+		except OperationalError:
+			return False
+		conn.execute(text("DROP TABLE temp.trigram_probe"))
+		return True
+
+def _init_search(engine) -> frozenset:
+	"""Create the search tables and their triggers, and index existing
+	rows the first time.  Returns the names of the usable tables."""
+	available = set(SEARCH_INDEXES)
+	if not _has_trigram_tokenizer(engine):
+		available.discard("bio_trigram")
+	with engine.begin() as conn:
+		for name, (columns, options) in SEARCH_INDEXES.items():
+			triggers = [f"{name}_ai", f"{name}_ad", f"{name}_au"]
+			if name not in available:
+				# a file indexed by a newer SQLite: its triggers would make
+				# every write to bio fail here, so drop them (the table is
+				# reindexed once a SQLite with the tokenizer opens it)
+				for trigger in triggers:
+					conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+				continue
+			found = conn.execute(text(
+				"SELECT count(*) FROM sqlite_master WHERE name IN (:name, :ai, :ad, :au)"
+			), dict(zip(("name", "ai", "ad", "au"), [name] + triggers))).scalar()
+			if found == 4:
+				continue
+			cols = ", ".join(columns)
+			new = ", ".join(f"new.{c}" for c in columns)
+			old = ", ".join(f"old.{c}" for c in columns)
+			conn.execute(text(
+				f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({cols}, "
+				f"content='bio', content_rowid='player_id', {options})"
+			))
+			conn.execute(text(
+				f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON bio BEGIN "
+				f"INSERT INTO {name} (rowid, {cols}) VALUES (new.player_id, {new}); END"
+			))
+			conn.execute(text(
+				f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON bio BEGIN "
+				f"INSERT INTO {name} ({name}, rowid, {cols}) VALUES ('delete', old.player_id, {old}); END"
+			))
+			conn.execute(text(
+				f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {cols} ON bio BEGIN "
+				f"INSERT INTO {name} ({name}, rowid, {cols}) VALUES ('delete', old.player_id, {old}); "
+				f"INSERT INTO {name} (rowid, {cols}) VALUES (new.player_id, {new}); END"
+			))
+			conn.execute(text(f"INSERT INTO {name} ({name}) VALUES ('rebuild')"))
+	return frozenset(available)
+
+# Database settings, overridable through the environment.  WAL lets API reads
+# proceed while a loader is writing; the other pragmas trade a little
+# durability on power loss (synchronous=NORMAL) for far fewer fsyncs, and
+# keep hot pages in memory.  cache_size is negative, i.e. KiB rather than pages.
+DB_PATH = os.environ.get("NCAA_DB_PATH", "ncaa_hockey.db")
+SQLITE_PRAGMAS = {
+	"journal_mode": os.environ.get("NCAA_DB_JOURNAL_MODE", "wal"),
+	"synchronous": os.environ.get("NCAA_DB_SYNCHRONOUS", "normal"),
+	"mmap_size": int(os.environ.get("NCAA_DB_MMAP_SIZE", 256 * 1024 * 1024)),
+	"cache_size": int(os.environ.get("NCAA_DB_CACHE_SIZE", -64 * 1024)),
+	"temp_store": os.environ.get("NCAA_DB_TEMP_STORE", "memory"),
+	"busy_timeout": int(os.environ.get("NCAA_DB_BUSY_TIMEOUT_MS", 5000)),
+}
+READ_POOL_SIZE = int(os.environ.get("NCAA_DB_READ_POOL_SIZE", 8))
+
+
+def _install_pragmas(target, settings: dict, readonly: bool):
+	@event.listens_for(target, "connect")
+	def _apply_pragmas(dbapi_conn, _record):
+		cursor = dbapi_conn.cursor()
+		for name, value in settings.items():
+			# the journal mode is a property of the file; leave it to the writer
+			if readonly and name == "journal_mode":
+				continue
+			cursor.execute(f"PRAGMA {name}={value}")
+		if readonly:
+			cursor.execute("PRAGMA query_only=1")
+		cursor.close()
+
+def make_engine(path: str = DB_PATH, readonly: bool = False, pragmas: Optional[dict] = None):
+	"""Create an engine whose connections get ``SQLITE_PRAGMAS`` applied.
+
+	Read-only engines are pooled for the API and refuse writes with
+	``PRAGMA query_only``; the writer engine is for the loaders.
+	"""
+	settings = dict(SQLITE_PRAGMAS, **(pragmas or {}))
+	kwargs = {"pool_size": READ_POOL_SIZE, "max_overflow": READ_POOL_SIZE} if readonly else {}
+	new_engine = create_engine(f"sqlite:///{path}", **kwargs)
+	_install_pragmas(new_engine, settings, readonly)
+	return new_engine
+
+def make_async_engine(path: str = DB_PATH, readonly: bool = True, pragmas: Optional[dict] = None):
+	"""``make_engine`` for asyncio code, on the ``aiosqlite`` driver.
+
+	Queries run on aiosqlite's worker threads, so the event loop is never
+	blocked and no threadpool slot is held while SQLite works.  Requires
+	``aiosqlite`` (an optional dependency, only needed for
+	``NCAA_API_MODE=async``).
+	"""
+	from sqlalchemy.ext.asyncio import create_async_engine
+
+	settings = dict(SQLITE_PRAGMAS, **(pragmas or {}))
+	kwargs = {"pool_size": READ_POOL_SIZE, "max_overflow": READ_POOL_SIZE} if readonly else {}
+	new_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **kwargs)
+	_install_pragmas(new_engine.sync_engine, settings, readonly)
+	return new_engine
+
+engine = make_engine()
+_migrate_to_player_ids(engine)
+SQLModel.metadata.create_all(engine)
+_add_missing_columns(engine)
+_init_catalog(engine)
+SEARCH_TABLES = _init_search(engine)
+
+# pooled read-only engine used by the API
+read_engine = make_engine(readonly=True)
\ No newline at end of file
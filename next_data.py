@@ -0,0 +1,146 @@
+"""Fast extraction of the Next.js ``__NEXT_DATA__`` payload from a page.
+
+EliteProspects pages embed everything we scrape as JSON in a
+``<script id="__NEXT_DATA__">`` tag.  Rather than running a regex over the
+whole document, the tag is located with plain substring searches, and the
+JSON is decoded with ``orjson`` when it is installed.  Callers that only need
+a few ``pageProps`` entries can ask for just those subtrees; the rest of the
+(much larger) payload is then never turned into Python objects.
+"""
+
+import json
+from typing import Dict, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+_MARKER = 'id="__NEXT_DATA__"'
+_PAGE_PROPS = '"pageProps":'
+
+_decoder = json.JSONDecoder()
+
+
+def loads(data):
+    """``json.loads`` using orjson when available.
+
+    Both backends raise a subclass of ``json.JSONDecodeError`` on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def find_next_data(html: str) -> Optional[str]:
+    """Return the raw JSON text of the ``__NEXT_DATA__`` script tag, or
+    ``None`` when the page doesn't have one."""
+    marker = html.find(_MARKER)
+    if marker == -1:
+        return None
+    tag_start = html.rfind('<script', 0, marker)
+    if tag_start == -1 or '>' in html[tag_start:marker]:
+        return None
+    body_start = html.find('>', marker)
+    if body_start == -1:
+        return None
+    body_end = html.find('</script>', body_start)
+    if body_end == -1 or body_end == body_start + 1:
+        return None
+    return html[body_start + 1:body_end]
+
+
+# every byte except quotes and brackets, for ``_siblings_between``
+_NOT_STRUCTURE = bytes(b for b in range(128) if b not in b'"{}[]')
+
+
+def _siblings_between(data: str, start: int, end: int) -> bool:
+    """Whether ``data[start:end]`` holds only complete values, i.e. its
+    brackets outside strings pair off.  ``start`` must be outside a string.
+
+    Everything runs in C: non-ASCII text is dropped by the encode, escaped
+    backslashes and quotes are dropped next so every remaining quote
+    delimits a string, then the brackets between each pair of quotes (the
+    strings) are dropped and matched pairs removed until none are left.
+    """
+    chunk = data[start:end].encode('ascii', 'ignore')
+    if b'\\' in chunk:
+        chunk = chunk.replace(b'\\\\', b'').replace(b'\\"', b'')
+    # dropping an empty "" pair doesn't change which side of a string
+    # anything else is on, and makes the split below much shorter
+    chunk = chunk.translate(None, _NOT_STRUCTURE).replace(b'""', b'')
+    brackets = b''.join(chunk.split(b'"')[::2])
+    while brackets:
+        paired = brackets.replace(b'{}', b'').replace(b'[]', b'')
+        if paired == brackets:
+            return False
+        brackets = paired
+    return True
+
+
+def _load_subtrees(data: str, keys: Iterable[str]) -> Optional[Dict]:
+    """Decode only ``pageProps[key]`` for each key.
+
+    Each value is located by searching for ``"key":`` after the start of
+    ``pageProps``.  A match counts only if everything between it and the
+    previous value is complete sibling entries (``_siblings_between``), so
+    a nested or later key of the same name is never taken for
+    ``pageProps[key]``.  Keys that don't occur are left out, like
+    ``dict.get`` on a full parse would see.  Returns ``None`` if anything
+    looks off so the caller can fall back to a full parse.
+
+    Values are decoded in place with the stdlib ``raw_decode``.  orjson only
+    takes a complete document, and finding where a value ends from Python
+    costs more than ``raw_decode`` takes to decode it; the full parse and
+    the fallback use orjson.
+    """
+    props_at = data.find(_PAGE_PROPS)
+    if props_at == -1:
+        return None
+    pos = props_at + len(_PAGE_PROPS)
+    while data[pos:pos + 1].isspace():
+        pos += 1
+    if data[pos:pos + 1] != '{':
+        return None
+    pos += 1
+    found = sorted((data.find(f'"{key}":', pos), key) for key in keys)
+    props = {}
+    for at, key in found:
+        if at == -1:
+            continue
+        # a key starts an entry, after the brace or a comma, and must be in
+        # pageProps itself rather than in a value nested in it
+        before = at - 1
+        while before >= 0 and data[before].isspace():
+            before -= 1
+        if at < pos or data[before:before + 1] not in ('{', ',') or not _siblings_between(data, pos, at):
+            return None
+        start = at + len(key) + 3
+        while data[start:start + 1].isspace():
+            start += 1
+        try:
+            props[key], pos = _decoder.raw_decode(data, start)
+        except ValueError:
+            return None
+    return props
+
+
+def load_page_props(html: str, keys: Optional[Iterable[str]] = None) -> Optional[Dict]:
+    """Return the ``pageProps`` dict of a page, or ``None`` when the page
+    has no ``__NEXT_DATA__`` tag.
+
+    With ``keys``, only those entries of ``pageProps`` are decoded and the
+    returned dict contains nothing else.  Decoding errors propagate.
+    """
+    data = find_next_data(html)
+    if data is None:
+        return None
+    if keys:
+        props = _load_subtrees(data, keys)
+        if props is not None:
+            return props
+    payload = loads(data)
+    props = payload.get("props", {}).get("pageProps", {})
+    if keys:
+        return {key: props[key] for key in keys if key in props}
+    return props
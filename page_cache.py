@@ -0,0 +1,215 @@
+"""Persistent on-disk cache for scraped pages.
+
+Bodies are stored content-addressed (by SHA-256 of the bytes) under
+``bodies/``; a small JSON record per URL under ``urls/`` remembers which body
+the URL last returned together with its ``ETag``/``Last-Modified`` headers so
+the next run can send a conditional request.  Rows extracted from a body are
+stored under ``parsed/`` keyed by the same hash, so a ``304 Not Modified`` (or
+a 200 with an unchanged body) doesn't need to be parsed again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageCache:
+    """Conditional-GET cache for ``requests`` sessions.
+
+    ``ttl`` is how long (seconds) an entry may go without being fetched or
+    revalidated before it is dropped; ``max_bytes`` caps the total size of
+    stored bodies and parsed rows, evicting the least recently used first.
+    The cap holds during a run too: a write that takes the cache past it
+    prunes down to ``PRUNE_TO`` of ``max_bytes``, so a long crawl prunes
+    now and then rather than after every page.
+    """
+
+    PRUNE_TO = 0.9
+
+    def __init__(self, directory: str = '.page_cache', ttl: float = 7 * 86400,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # bytes in bodies/ and parsed/, known once prune() has counted them
+        self._bytes: Optional[int] = None
+        self._lock = threading.RLock()
+        for sub in ('urls', 'bodies', 'parsed'):
+            os.makedirs(os.path.join(directory, sub), exist_ok=True)
+
+    # -- file helpers -----------------------------------------------------
+
+    def _path(self, sub: str, name: str) -> str:
+        return os.path.join(self.directory, sub, name)
+
+    def _write(self, path: str, data: bytes):
+        # write to a temp file first so concurrent readers never see a
+        # partially written entry
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _read_json(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    # -- url records ------------------------------------------------------
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Return the stored record for ``url`` unless it has expired."""
+        path = self._path('urls', _sha256(url.encode()) + '.json')
+        meta = self._read_json(path)
+        if meta is None:
+            return None
+        if time.time() - meta.get('validated_at', 0) > self.ttl:
+            self._remove(path)
+            return None
+        if not os.path.exists(self._path('bodies', meta['body_hash'])):
+            return None
+        return meta
+
+    def _save_meta(self, meta: Dict):
+        path = self._path('urls', _sha256(meta['url'].encode()) + '.json')
+        self._write(path, json.dumps(meta).encode())
+
+    def body(self, meta: Dict) -> bytes:
+        path = self._path('bodies', meta['body_hash'])
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)
+        return data
+
+    def get(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        """``session.get`` with conditional headers from the cache.
+
+        A 304 is turned back into a 200 carrying the cached body.  Successful
+        responses get ``from_cache`` and ``content_hash`` attributes; the
+        hash is what ``load_parsed``/``store_parsed`` are keyed on.
+        """
+        meta = self.lookup(url)
+        headers = dict(kwargs.pop('headers', None) or {})
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        resp = session.get(url, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and meta is not None:
+            resp.status_code = 200
+            resp._content = self.body(meta)
+            resp.encoding = meta.get('encoding') or resp.encoding
+            resp.from_cache = True
+            resp.content_hash = meta['body_hash']
+            meta['validated_at'] = time.time()
+            self._save_meta(meta)
+            return resp
+
+        resp.from_cache = False
+        if resp.status_code == 200:
+            content = resp.content
+            body_hash = _sha256(content)
+            body_path = self._path('bodies', body_hash)
+            is_new = not os.path.exists(body_path)
+            if is_new:
+                self._write(body_path, content)
+            resp.content_hash = body_hash
+            now = time.time()
+            self._save_meta({
+                'url': url,
+                'body_hash': body_hash,
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+                'encoding': resp.encoding,
+                'fetched_at': now,
+                'validated_at': now,
+            })
+            if is_new:
+                # after the record, so prune() sees the body as live
+                self._added(len(content))
+        return resp
+
+    # -- parsed rows ------------------------------------------------------
+
+    def _parsed_path(self, body_hash: str, kind: str, team: str) -> str:
+        key = _sha256(f"{kind}\0{team}".encode())[:16]
+        return self._path('parsed', f"{body_hash}.{key}.json")
+
+    def load_parsed(self, body_hash: str, kind: str, team: str) -> Optional[List[Dict]]:
+        path = self._parsed_path(body_hash, kind, team)
+        rows = self._read_json(path)
+        if rows is not None:
+            os.utime(path)
+        return rows
+
+    def store_parsed(self, body_hash: str, kind: str, team: str, rows: List[Dict]):
+        data = json.dumps(rows).encode()
+        self._write(self._parsed_path(body_hash, kind, team), data)
+        self._added(len(data))
+
+    # -- eviction ---------------------------------------------------------
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _added(self, nbytes: int):
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += nbytes
+                if self._bytes <= self.max_bytes:
+                    return
+            self.prune(int(self.max_bytes * self.PRUNE_TO))
+
+    def prune(self, target: Optional[int] = None):
+        """Drop expired URL records, bodies no longer referenced by any
+        record, and then least recently used entries until the cache fits
+        in ``target`` bytes (default ``max_bytes``)."""
+        with self._lock:
+            self._prune(self.max_bytes if target is None else target)
+
+    def _prune(self, target: int):
+        now = time.time()
+        live = set()
+        url_dir = os.path.join(self.directory, 'urls')
+        for name in os.listdir(url_dir):
+            path = os.path.join(url_dir, name)
+            meta = self._read_json(path)
+            if meta is None or now - meta.get('validated_at', 0) > self.ttl:
+                self._remove(path)
+            else:
+                live.add(meta['body_hash'])
+
+        entries = []
+        for sub in ('bodies', 'parsed'):
+            sub_dir = os.path.join(self.directory, sub)
+            for name in os.listdir(sub_dir):
+                path = os.path.join(sub_dir, name)
+                if name.split('.', 1)[0] not in live:
+                    self._remove(path)
+                    continue
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+        self._bytes = total
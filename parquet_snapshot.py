@@ -0,0 +1,291 @@
+"""Columnar snapshots of the database for league-wide analytics.
+
+``export`` writes ``bio``, ``player_stats`` and ``goalie_stats`` as
+zstd-compressed Parquet (``snapshot/bio/part-0.parquet``, ...), with
+column types taken from the SQLModel definitions.  Rows are streamed from
+SQLite in batches, sorted by team, so the row-group statistics on ``team``
+let a reader skip straight to the teams it filters on.
+``--partition-by-team`` writes one directory per team in the Hive layout
+(``snapshot/bio/team=Boston%20Univ./part-0.parquet``) instead.  With
+rosters of about 28 rows that is mostly Parquet footers, so it is larger
+and slower to scan than the single sorted file.  ``snapshot/_snapshot.json``
+records the database generation the files were taken from; exporting
+again while the generation is unchanged does nothing unless ``--force``.
+
+``query`` runs aggregate queries with DuckDB over a snapshot, which
+exposes the three tables as views of the same names.  It never opens the
+SQLite database.  Use one of the named ``ANALYTICS_QUERIES`` or ``--sql``;
+``team_scoring`` and ``team_goaltending`` compute the ``team_summary``
+columns of the same names.
+
+Needs ``pip install pyarrow`` for ``export`` and ``pip install duckdb`` for
+``query`` (both optional; nothing else in the project uses them).
+
+    python parquet_snapshot.py export --out snapshot
+    python parquet_snapshot.py query team_scoring
+    python parquet_snapshot.py query --sql "SELECT country, count(*) FROM bio GROUP BY 1 ORDER BY 2 DESC"
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+
+SNAPSHOT_TABLES = ('bio', 'player_stats', 'goalie_stats')
+# bookkeeping for the loaders, not data
+EXCLUDED_COLUMNS = {'content_hash'}
+MANIFEST = '_snapshot.json'
+DEFAULT_BATCH_SIZE = 50_000
+ROW_GROUP_SIZE = 64 * 1024
+
+ANALYTICS_QUERIES = {
+    # the same definitions as team_summary.compute_team_summary: games is
+    # the most games any skater played, and the rates are per team game
+    'team_scoring': """
+        SELECT team,
+               count(*) AS skaters,
+               max(GP) AS games,
+               coalesce(sum(G), 0) AS goals,
+               coalesce(sum(A), 0) AS assists,
+               coalesce(sum(TP), 0) AS points,
+               coalesce(sum(PIM), 0) AS pim,
+               round(coalesce(sum(G), 0) / nullif(max(GP), 0), 3) AS goals_per_game,
+               round(coalesce(sum(TP), 0) / nullif(max(GP), 0), 3) AS points_per_game,
+               round(coalesce(sum(PIM), 0) / nullif(max(GP), 0), 3) AS pim_per_game
+        FROM player_stats
+        GROUP BY team
+        ORDER BY points DESC, team
+    """,
+    # TOI is minutes ("1788") or minutes:seconds ("1200:30"), as in
+    # team_summary.toi_minutes; goals against stay fractional until the
+    # team totals are rounded
+    'team_goaltending': """
+        WITH parsed AS (
+            SELECT team, GAA, SVS,
+                   regexp_extract(TOI, '^[[:space:]]*([0-9]+(?:[.][0-9]+)?)(?::([0-9]+))?[[:space:]]*$',
+                                  ['minutes', 'seconds']) AS toi
+            FROM goalie_stats
+        ), g AS (
+            SELECT team, SVS, minutes, GAA * minutes / 60 AS against
+            FROM (SELECT team, GAA, SVS,
+                         TRY_CAST(toi.minutes AS DOUBLE)
+                         + coalesce(TRY_CAST(toi.seconds AS DOUBLE), 0) / 60 AS minutes
+                  FROM parsed)
+        )
+        SELECT team,
+               count(*) AS goalies,
+               round(sum(minutes) FILTER (WHERE against IS NOT NULL), 1) AS goalie_minutes,
+               round(sum(against)) AS goals_against,
+               sum(SVS) AS saves,
+               round(sum(SVS) FILTER (WHERE against IS NOT NULL)
+                     / nullif(sum(SVS + against), 0), 3) AS save_pct,
+               round(sum(against) * 60
+                     / nullif(sum(minutes) FILTER (WHERE against IS NOT NULL), 0), 2) AS gaa
+        FROM g
+        GROUP BY team
+        ORDER BY gaa NULLS LAST, team
+    """,
+    'countries': """
+        SELECT country,
+               count(*) AS players,
+               count(DISTINCT team) AS teams,
+               round(avg(age), 1) AS avg_age
+        FROM bio
+        GROUP BY country
+        ORDER BY players DESC, country
+    """,
+    'top_scorers': """
+        SELECT s.first_name, s.last_name, s.team, b.position, s.GP, s.G, s.A, s.TP
+        FROM player_stats s JOIN bio b USING (player_id, team)
+        ORDER BY s.TP DESC, s.G DESC, s.last_name, s.first_name
+        LIMIT 25
+    """,
+}
+
+
+def arrow_schema(model):
+    """Arrow schema for ``model``'s table, minus ``EXCLUDED_COLUMNS``."""
+    import pyarrow as pa
+    from sqlalchemy import Float, Integer
+
+    def arrow_type(column):
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        if isinstance(column.type, Float):
+            return pa.float64()
+        return pa.string()
+
+    return pa.schema([
+        pa.field(c.name, arrow_type(c), nullable=c.nullable)
+        for c in model.__table__.columns if c.name not in EXCLUDED_COLUMNS
+    ])
+
+
+def record_batches(conn, model, schema, batch_size: int) -> Iterator:
+    """Stream ``model``'s rows as Arrow record batches, ordered by team so
+    each partition is written in one go."""
+    import pyarrow as pa
+    from sqlalchemy import select
+
+    table = model.__table__
+    columns = [table.c[name] for name in schema.names]
+    result = conn.execution_options(yield_per=batch_size).execute(
+        select(*columns).order_by(table.c.team, table.c.player_id))
+    for rows in result.partitions():
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+            schema=schema)
+
+
+def read_manifest(snapshot_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _replace_dir(tmp: str, target: str):
+    """Swap a freshly written directory into place."""
+    old = target + '.old'
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(target):
+        os.rename(target, old)
+    os.rename(tmp, target)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def export_snapshot(out_dir: str = 'snapshot', batch_size: int = DEFAULT_BATCH_SIZE,
+                    compression: str = 'zstd', partition_by_team: bool = False,
+                    force: bool = False) -> Dict:
+    """Write the Parquet snapshot to ``out_dir`` and return its manifest."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from sqlalchemy import select
+
+    from models import Bio, Db_Version, Goalie_Stats, Player_Stats, read_engine
+
+    models = dict(zip(SNAPSHOT_TABLES, (Bio, Player_Stats, Goalie_Stats)))
+    with read_engine.connect() as conn:
+        generation = conn.execute(select(Db_Version.generation)).scalar() or 0
+        manifest = read_manifest(out_dir)
+        if (manifest and manifest.get('generation') == generation
+                and manifest.get('partition_by_team') == partition_by_team and not force):
+            print(f"Snapshot in {out_dir} is already at generation {generation}; nothing to do")
+            return manifest
+
+        os.makedirs(out_dir, exist_ok=True)
+        manifest = {
+            'generation': generation,
+            'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'compression': compression,
+            'partition_by_team': partition_by_team,
+            'tables': {},
+        }
+        partitioning = None
+        if partition_by_team:
+            partitioning = ds.partitioning(pa.schema([('team', pa.string())]), flavor='hive')
+        file_options = ds.ParquetFileFormat().make_write_options(compression=compression)
+        for name, model in models.items():
+            started = time.perf_counter()
+            schema = arrow_schema(model)
+            target = os.path.join(out_dir, name)
+            tmp = target + '.tmp'
+            shutil.rmtree(tmp, ignore_errors=True)
+            rows = [0]
+
+            def counted(batches):
+                for batch in batches:
+                    rows[0] += batch.num_rows
+                    yield batch
+
+            ds.write_dataset(
+                counted(record_batches(conn, model, schema, batch_size)), tmp,
+                schema=schema, format='parquet', partitioning=partitioning,
+                file_options=file_options, basename_template='part-{i}.parquet',
+                max_rows_per_group=ROW_GROUP_SIZE, min_rows_per_group=min(ROW_GROUP_SIZE, batch_size),
+                max_partitions=1_000_000, existing_data_behavior='error')
+            _replace_dir(tmp, target)
+            size = sum(os.path.getsize(os.path.join(d, f))
+                       for d, _dirs, files in os.walk(target) for f in files)
+            manifest['tables'][name] = {'rows': rows[0], 'bytes': size}
+            print(f"{name}: {rows[0]} rows, {size / 1024:.0f} KiB "
+                  f"in {time.perf_counter() - started:.2f}s")
+
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def connect_snapshot(snapshot_dir: str = 'snapshot'):
+    """A DuckDB connection with ``bio``, ``player_stats`` and
+    ``goalie_stats`` views over the snapshot's Parquet files."""
+    import duckdb
+
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"no snapshot in {snapshot_dir}; run `python parquet_snapshot.py export` first")
+    hive = 'true' if manifest.get('partition_by_team') else 'false'
+    con = duckdb.connect()
+    for name in SNAPSHOT_TABLES:
+        files = os.path.join(os.path.abspath(snapshot_dir), name, '**', '*.parquet').replace("'", "''")
+        con.execute(f"CREATE VIEW {name} AS "
+                    f"SELECT * FROM read_parquet('{files}', hive_partitioning = {hive})")
+    return con
+
+
+def run_query(con, sql: str):
+    """Return ``(column names, rows)`` for ``sql``."""
+    result = con.execute(sql)
+    return [d[0] for d in result.description], result.fetchall()
+
+
+def print_rows(columns, rows, limit: Optional[int] = None):
+    shown = rows[:limit] if limit else rows
+    cells = [[('' if v is None else str(v)) for v in row] for row in shown]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+    print('  '.join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in cells:
+        print('  '.join(v.ljust(w) for v, w in zip(row, widths)))
+    if len(shown) < len(rows):
+        print(f"... {len(rows) - len(shown)} more rows")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Parquet snapshots of the database and DuckDB analytics over them')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help='Write the Parquet snapshot')
+    export.add_argument('--out', default='snapshot', help='Snapshot directory')
+    export.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    export.add_argument('--compression', default='zstd', help='Parquet codec (zstd, snappy, gzip, none)')
+    export.add_argument('--partition-by-team', action='store_true',
+                        help='One directory of files per team (Hive layout) instead of one sorted file per table')
+    export.add_argument('--force', action='store_true', help='Export even if the snapshot is current')
+
+    query = sub.add_parser('query', help='Run an aggregate query over a snapshot with DuckDB')
+    query.add_argument('name', nargs='?', choices=sorted(ANALYTICS_QUERIES), help='Named query')
+    query.add_argument('--sql', help='Query to run instead of a named one')
+    query.add_argument('--snapshot', default='snapshot', help='Snapshot directory')
+    query.add_argument('--limit', type=int, default=50, help='Rows to print (0 = all)')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_snapshot(args.out, args.batch_size, args.compression,
+                        partition_by_team=args.partition_by_team, force=args.force)
+        return
+    if not args.name and not args.sql:
+        query.error('give a query name or --sql')
+    con = connect_snapshot(args.snapshot)
+    started = time.perf_counter()
+    columns, rows = run_query(con, args.sql or ANALYTICS_QUERIES[args.name])
+    elapsed = time.perf_counter() - started
+    print_rows(columns, rows, args.limit)
+    print(f"\n{len(rows)} rows in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
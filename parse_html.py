@@ -1,98 +1,201 @@
 """Utility for parsing roster HTML snippets and exporting CSV rows."""
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import itertools
 import re
 import csv
 import sys
 
+ROSTER_ROW_CLASS = 'SortTable_tr__L9yVC'
+SECTION_CLASS = 'SortTable_section__qZQT6'
+TEAM_LIST_SELECTOR = 'ul.ColumnsList_columnsList__c50AO a.TextLink_link__RhSiC'
 
-def parse_roster_html(html: str, team: str) -> list[dict]:
-    """Return list of player dicts extracted from the roster page HTML."""
-    soup = BeautifulSoup(html, "html.parser")
+# 'html.parser' is the pure-Python default; 'lxml' and 'selectolax' are much
+# faster but optional installs.  All three produce identical rows.
+BACKENDS = ('html.parser', 'lxml', 'selectolax')
+
+
+def _check_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown parser backend {backend!r}; expected one of {BACKENDS}")
+
+
+def _player_row(cells: list[str], name: str, team: str) -> dict:
+    """Build a player dict from the stripped text of a roster row's cells
+    and the text of the player link."""
+    number = cells[1]
+    m = re.match(r"(.+)\s+\((.)\)$", name)
+    position = ''
+    if m:
+        name = m.group(1).strip()
+        pos = m.group(2)
+        position = {'G':'G','D':'D','F':'F'}.get(pos, '')
+    first, last = name.split(' ',1)
+    age = cells[4]
+    born = cells[5]
+    birthplace = cells[6]
+    hp, country = ('', '')
+    if ',' in birthplace:
+        parts = [p.strip() for p in birthplace.rsplit(',',1)]
+        hp = parts[0]
+        country = parts[1]
+    height = cells[7]
+    weight = cells[8]
+    shoots = cells[9]
+    return {
+        'first_name': first,
+        'last_name': last,
+        'team': team,
+        'number': number,
+        'position': position,
+        'age': age,
+        'born': born,
+        'birth_place': hp,
+        'country': country,
+        'height': height,
+        'weight': weight,
+        'shoots': shoots,
+    }
+
+
+def _roster_rows_bs4(html: str, team: str, parser: str) -> list[dict]:
+    # only the roster rows are turned into a tree; the rest of the page is
+    # tokenized and thrown away
+    strainer = SoupStrainer('tr', class_=ROSTER_ROW_CLASS)
+    soup = BeautifulSoup(html, parser, parse_only=strainer)
     rows = []
-    for tr in soup.find_all('tr', class_='SortTable_tr__L9yVC'):
+    for tr in soup.find_all('tr', class_=ROSTER_ROW_CLASS):
         # skip section headers
-        if tr.find('span', class_='SortTable_section__qZQT6'):
+        if tr.find('span', class_=SECTION_CLASS):
             continue
         cols = tr.find_all('td')
         if len(cols) < 11:
             continue
-        number = cols[1].get_text(strip=True)
         # nationality column may contain flag images, ignore
-        player_cell = cols[3]
-        a = player_cell.find('a')
-        name = a.get_text(strip=True)
-        m = re.match(r"(.+)\s+\((.)\)$", name)
-        position = ''
-        if m:
-            name = m.group(1).strip()
-            pos = m.group(2)
-            position = {'G':'G','D':'D','F':'F'}.get(pos, '')
-        first, last = name.split(' ',1)
-        age = cols[4].get_text(strip=True)
-        born = cols[5].get_text(strip=True)
-        birthplace = cols[6].get_text(strip=True)
-        hp, country = ('', '')
-        if ',' in birthplace:
-            parts = [p.strip() for p in birthplace.rsplit(',',1)]
-            hp = parts[0]
-            country = parts[1]
-        height = cols[7].get_text(strip=True)
-        weight = cols[8].get_text(strip=True)
-        shoots = cols[9].get_text(strip=True)
-        rows.append({
-            'first_name': first,
-            'last_name': last,
-            'team': team,
-            'number': number,
-            'position': position,
-            'age': age,
-            'born': born,
-            'birth_place': hp,
-            'country': country,
-            'height': height,
-            'weight': weight,
-            'shoots': shoots,
-        })
+        name = cols[3].find('a').get_text(strip=True)
+        cells = [td.get_text(strip=True) for td in cols]
+        rows.append(_player_row(cells, name, team))
+    return rows
+
+
+def _roster_rows_selectolax(html: str, team: str) -> list[dict]:
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(html)
+    rows = []
+    for tr in tree.css(f'tr.{ROSTER_ROW_CLASS}'):
+        if tr.css_first(f'span.{SECTION_CLASS}') is not None:
+            continue
+        cols = tr.css('td')
+        if len(cols) < 11:
+            continue
+        name = cols[3].css_first('a').text(strip=True)
+        cells = [td.text(strip=True) for td in cols]
+        rows.append(_player_row(cells, name, team))
     return rows
 
 
+def parse_roster_html(html: str, team: str, backend: str = 'html.parser') -> list[dict]:
+    """Return list of player dicts extracted from the roster page HTML."""
+    _check_backend(backend)
+    if backend == 'selectolax':
+        return _roster_rows_selectolax(html, team)
+    return _roster_rows_bs4(html, team, backend)
+
 
 
-def extract_team_links(list_html: str) -> list[tuple[str,str]]:
+
+def extract_team_links(list_html: str, backend: str = 'html.parser') -> list[tuple[str,str]]:
     """Given the HTML of the NCAA team list, return (team_name, href) pairs."""
-    soup = BeautifulSoup(list_html, "html.parser")
+    _check_backend(backend)
     teams = []
-    for a in soup.select("ul.ColumnsList_columnsList__c50AO a.TextLink_link__RhSiC"):
+    if backend == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser
+        for a in LexborHTMLParser(list_html).css(TEAM_LIST_SELECTOR):
+            teams.append((a.text(strip=True), a.attributes.get('href') or ''))
+        return teams
+    soup = BeautifulSoup(list_html, backend, parse_only=SoupStrainer('ul'))
+    for a in soup.select(TEAM_LIST_SELECTOR):
         name = a.get_text(strip=True)
         href = a.get('href', '')
         teams.append((name, href))
     return teams
 
 
-def batch_parse(list_file: str, html_dir: str, output_csv: str = 'players.csv'):
+def _parse_file(job: tuple[str, str, str]) -> tuple[str, str, list[dict] | None]:
+    """Read and parse one roster file; runs in a worker process when
+    ``batch_parse`` is given ``workers > 1``.  Rows are ``None`` if the
+    file doesn't exist."""
+    name, html_path, backend = job
+    try:
+        with open(html_path, 'r', encoding='utf-8') as hf:
+            page = hf.read()
+    except FileNotFoundError:
+        return name, html_path, None
+    return name, html_path, parse_roster_html(page, name, backend)
+
+
+def _parse_files(jobs: list, workers: int):
+    """Yield ``_parse_file`` results in job order.
+
+    With several workers, at most ``2 * workers`` files are in flight, so
+    memory stays flat however many files there are and results can be
+    written as soon as the ones ahead of them are done.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield _parse_file(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        remaining = iter(jobs)
+        pending = deque(pool.submit(_parse_file, job)
+                        for job in itertools.islice(remaining, workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            job = next(remaining, None)
+            if job is not None:
+                pending.append(pool.submit(_parse_file, job))
+            yield result
+
+
+def batch_parse(list_file: str, html_dir: str, output_csv: str = 'players.csv',
+                backend: str = 'html.parser', workers: int = 1):
     with open(list_file, 'r', encoding='utf-8') as f:
         team_list_html = f.read()
-    teams = extract_team_links(team_list_html)
-    all_players = []
+    teams = extract_team_links(team_list_html, backend)
+    jobs = []
     for name, href in teams:
         slug = href.rstrip('/').split('/')[-1]
-        html_path = f"{html_dir}/{slug}.html"
-        try:
-            with open(html_path, 'r', encoding='utf-8') as hf:
-                page = hf.read()
-        except FileNotFoundError:
-            print(f"warning: roster html for '{name}' not found ({html_path})")
-            continue
-        players = parse_roster_html(page, name)
-        all_players.extend(players)
-    if all_players:
-        headers = list(all_players[0].keys())
-        with open(output_csv, 'w', newline='') as out:
-            writer = csv.DictWriter(out, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(all_players)
-        print(f"batch wrote {len(all_players)} players to {output_csv}")
+        jobs.append((name, f"{html_dir}/{slug}.html", backend))
+
+    missing = []
+    written = 0
+    out = None
+    writer = None
+    try:
+        for name, html_path, players in _parse_files(jobs, workers):
+            if players is None:
+                missing.append((name, html_path))
+                continue
+            if not players:
+                continue
+            if writer is None:
+                out = open(output_csv, 'w', newline='')
+                writer = csv.DictWriter(out, fieldnames=list(players[0].keys()))
+                writer.writeheader()
+            writer.writerows(players)
+            written += len(players)
+    finally:
+        if out is not None:
+            out.close()
+
+    if missing:
+        print(f"warning: roster html not found for {len(missing)} of {len(jobs)} teams:")
+        for name, html_path in missing:
+            print(f"  '{name}' ({html_path})")
+    if written:
+        print(f"batch wrote {written} players to {output_csv}")
     else:
         print("no players parsed")
 
@@ -104,14 +207,20 @@ def main():
     parser.add_argument('--html-dir', help='Directory where individual roster HTML files are stored')
     parser.add_argument('team', nargs='?', help='Single team name')
     parser.add_argument('html', nargs='?', help='HTML file for single team')
+    parser.add_argument('--parser', default='html.parser', choices=BACKENDS,
+                        help='HTML parser backend (lxml and selectolax are optional installs)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes to parse roster files with in batch mode')
+    parser.add_argument('--output', default='players.csv', help='CSV file to write in batch mode')
     args = parser.parse_args()
     if args.list and args.html_dir:
-        batch_parse(args.list, args.html_dir)
+        batch_parse(args.list, args.html_dir, args.output,
+                    backend=args.parser, workers=args.workers)
     elif args.team and args.html:
         team = args.team
         with open(args.html, 'r', encoding='utf-8') as f:
             html = f.read()
-        players = parse_roster_html(html, team)
+        players = parse_roster_html(html, team, args.parser)
         writer = csv.DictWriter(sys.stdout, fieldnames=list(players[0].keys()) if players else [])
         writer.writeheader()
         writer.writerows(players)
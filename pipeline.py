@@ -0,0 +1,144 @@
+"""Stream scraped data straight into the database, team by team.
+
+The classic refresh goes scraper -> CSV -> ``*_init.py`` -> database.  Here
+the rows produced by ``league_crawler.crawl_league`` are mapped with the same
+``bio_record``/``skater_record``/``goalie_record`` functions the CSV loaders
+use and upserted as soon as each team is scraped, one transaction per team,
+so the API serves a team's fresh data without waiting for the whole league.
+The leaderboard is league-wide and re-ranked once, after the last team
+(``bulk_load.finish_run``), so ``/leaders`` catches up at the end of the run.
+Writing the CSVs is an optional extra sink.
+"""
+
+import csv
+import os
+import time
+from typing import Dict, Optional
+
+from bio_init import bio_record
+from bulk_load import DEFAULT_BATCH_SIZE, UpsertResult, finish_ingest, finish_run, upsert_rows
+from goalie_init import goalie_record
+from league_crawler import TeamCrawl, crawl_league
+from models import Bio, Goalie_Stats, Player_Stats, engine
+from player_init import skater_record
+from scrape_all_teams import (
+    BASE_URL,
+    PLAYER_FIELDS,
+    add_cache_arguments,
+    apply_cache_arguments,
+)
+from scrape_goalie_stats import GOALIE_FIELDS
+from scrape_report import ScrapeReport, add_report_arguments, default_report_path
+from scrape_skater_stats import SKATER_FIELDS
+
+# (TeamCrawl field, model, row mapper, CSV file name, CSV columns)
+TABLES = [
+    ('players', Bio, bio_record, 'players.csv', PLAYER_FIELDS),
+    ('skaters', Player_Stats, skater_record, 'skater_stats.csv', SKATER_FIELDS),
+    ('goalies', Goalie_Stats, goalie_record, 'goalie_stats.csv', GOALIE_FIELDS),
+]
+
+
+class CsvSink:
+    """Append each team's rows to the three CSV files as they arrive,
+    dropping repeated (first/last/team) rows like the batch writers do."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._files = []
+        self._writers: Dict[str, csv.DictWriter] = {}
+        self._seen: Dict[str, set] = {}
+        for attr, _model, _record, filename, fields in TABLES:
+            f = open(os.path.join(directory, filename), 'w', newline='', encoding='utf-8')
+            self._files.append(f)
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            self._writers[attr] = writer
+            self._seen[attr] = set()
+
+    def write(self, crawl: TeamCrawl):
+        for attr, *_rest in TABLES:
+            seen = self._seen[attr]
+            for row in getattr(crawl, attr):
+                key = (row.get('first_name'), row.get('last_name'), row.get('team'))
+                if key not in seen:
+                    seen.add(key)
+                    self._writers[attr].writerow(row)
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+
+def load_team(crawl: TeamCrawl, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, UpsertResult]:
+    """Upsert one team's rows into all three tables in a single transaction.
+    Returns the ``UpsertResult`` per model name."""
+    results = {}
+    with engine.begin() as conn:
+        for attr, model, record, _filename, _fields in TABLES:
+            results[model.__name__] = upsert_rows(model, map(record, getattr(crawl, attr)),
+                                                  batch_size=batch_size, conn=conn)
+        finish_ingest(conn, set().union(*(r.teams for r in results.values())))
+    return results
+
+
+def run_pipeline(concurrency: int = 1, rate: float = 0.0, base_url: str = BASE_URL,
+                 csv_dir: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 report_path: Optional[str] = None):
+    sink = CsvSink(csv_dir) if csv_dir else None
+    totals = {model.__name__: [0, 0, 0, 0] for _attr, model, *_rest in TABLES}
+    report = ScrapeReport('pipeline', concurrency=concurrency, rate=rate, base_url=base_url)
+    changed = False
+    try:
+        for crawl in crawl_league(concurrency, rate, base_url, report):
+            started = time.perf_counter()
+            results = load_team(crawl, batch_size)
+            report.load(crawl.team, time.perf_counter() - started,
+                        sum(r.inserted + r.updated + r.unchanged for r in results.values()))
+            for name, result in results.items():
+                totals[name][0] += result.inserted
+                totals[name][1] += result.updated
+                totals[name][2] += result.unchanged
+                totals[name][3] += result.skipped
+                changed = changed or bool(result.teams)
+            if sink is not None:
+                sink.write(crawl)
+    finally:
+        if sink is not None:
+            sink.close()
+        # also after a failed crawl, for the teams that did load
+        if changed:
+            started = time.perf_counter()
+            with engine.begin() as conn:
+                finish_run(conn)
+            print(f"Re-ranked the leaderboard in {time.perf_counter() - started:.1f}s")
+    for name, (inserted, updated, unchanged, skipped) in totals.items():
+        print(f"{name}: inserted={inserted}, updated={updated}, unchanged={unchanged}, "
+              f"skipped={skipped}")
+    if report_path:
+        report.write(report_path)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Scrape the league and load it into the database without CSV files')
+    parser.add_argument('--csv-dir', help='Also write players/skater/goalie CSVs to this directory')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Pages to fetch in parallel (1 = sequential)')
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help='Max requests per second to the host (0 = no limit)')
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help='Site root, e.g. a local mirror for testing')
+    add_cache_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    apply_cache_arguments(args)
+    run_pipeline(args.concurrency, args.rate, args.base_url.rstrip('/'),
+                 csv_dir=args.csv_dir, batch_size=args.batch_size,
+                 report_path=default_report_path(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import csv
-from sqlmodel import Session, select
-from models import engine, Player_Stats
+from models import Player_Stats
+from bulk_load import DEFAULT_BATCH_SIZE, load_records
 
 
 def parse_int(v):
@@ -10,55 +10,42 @@ def parse_int(v):
         return None
 
 
-def load_skaters(csv_path='skater_stats.csv'):
-    inserted = 0
-    updated = 0
+def skater_record(row):
+    """Map a skater_stats.csv row to Player_Stats column values, or None if
+    the row has no usable name.  A missing team is stored as ``''``, as the
+    player_id migration does."""
+    first = (row.get('first_name') or '').strip()
+    last = (row.get('last_name') or '').strip()
+    team = row.get('team') or ''
+    if not first or not last:
+        return None
+    return {
+        'first_name': first,
+        'last_name': last,
+        'GP': parse_int(row.get('GP')),
+        'G': parse_int(row.get('G')),
+        'A': parse_int(row.get('A')),
+        'TP': parse_int(row.get('TP')),
+        'PIM': parse_int(row.get('PIM')),
+        # csv header uses '+/-' for plus/minus
+        'plus_minus': parse_int(row.get('+/-')),
+        'team': team,
+    }
+
+
+def load_skaters(csv_path='skater_stats.csv', batch_size=DEFAULT_BATCH_SIZE):
     with open(csv_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
-        with Session(engine) as session:
-            for row in reader:
-                first = row.get('first_name', '').strip()
-                last = row.get('last_name', '').strip()
-                if not first or not last:
-                    continue
-
-                stmt = select(Player_Stats).where(Player_Stats.first_name == first, Player_Stats.last_name == last)
-                existing = session.exec(stmt).first()
-
-                plus_minus = None
-                # csv header uses '+/-' for plus/minus
-                if '+/-' in row:
-                    try:
-                        plus_minus = int(row.get('+/-'))
-                    except Exception:
-                        plus_minus = None
-
-                ps = Player_Stats(
-                    first_name=first,
-                    last_name=last,
-                    GP=parse_int(row.get('GP', '').strip()),
-                    G=parse_int(row.get('G', '').strip()),
-                    A=parse_int(row.get('A', '').strip()),
-                    TP=parse_int(row.get('TP', '').strip()),
-                    PIM=parse_int(row.get('PIM', '').strip()),
-                    plus_minus=plus_minus,
-                    team=row.get('team') or None,
-                )
-
-                if existing:
-                    # use model_dump() instead of dict()
-                    for k, v in ps.model_dump().items():
-                        setattr(existing, k, v)
-                    session.add(existing)
-                    updated += 1
-                else:
-                    session.add(ps)
-                    inserted += 1
-
-            session.commit()
+        result = load_records(Player_Stats, map(skater_record, reader), batch_size=batch_size)
 
-    print(f"Player_Stats: inserted={inserted}, updated={updated}")
+    print(f"Player_Stats: inserted={result.inserted}, updated={result.updated}, "
+          f"unchanged={result.unchanged}, skipped={result.skipped}")
 
 
 if __name__ == '__main__':
-    load_skaters('skater_stats.csv')
+    import argparse
+    parser = argparse.ArgumentParser(description='Load skater_stats.csv into the Player_Stats table')
+    parser.add_argument('csv_path', nargs='?', default='skater_stats.csv')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    load_skaters(args.csv_path, args.batch_size)
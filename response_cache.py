@@ -0,0 +1,103 @@
+"""In-process cache for API response bodies.
+
+Entries are keyed by request path and query string and tagged with the
+database generation (``Db_Version.generation``) they were built from; an
+entry from an older generation is treated as a miss, so a loader run
+invalidates everything at once.  Eviction is least-recently-used once the
+cached bodies exceed ``max_bytes``, and entries also expire after ``ttl``
+seconds as a safety net.  Every entry carries a strong ETag (a hash of the
+body) for ``If-None-Match`` handling.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+# rough per-entry bookkeeping cost on top of the key and body
+_ENTRY_OVERHEAD = 200
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    media_type: Optional[str]
+    generation: int
+    stored_at: float
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an ``If-None-Match`` header value matches ``etag``
+    (weak comparison, as RFC 9110 prescribes for this header)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 3600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _cost(key: str, entry: CachedResponse) -> int:
+        return len(key) + len(entry.body) + _ENTRY_OVERHEAD
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= self._cost(key, entry)
+
+    def get(self, key: str, generation: int) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.generation != generation
+                                      or time.monotonic() - entry.stored_at > self.ttl):
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, generation: int, body: bytes,
+            media_type: Optional[str] = None) -> CachedResponse:
+        entry = CachedResponse(body, make_etag(body), media_type, generation, time.monotonic())
+        cost = self._cost(key, entry)
+        if cost > self.max_bytes:
+            return entry
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._size += cost
+            while self._size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,15 +1,27 @@
 import requests
 from bs4 import BeautifulSoup
+import asyncio
 import csv
-import re
-import json
-from typing import List, Dict, Optional
+import os
+from typing import Callable, List, Dict, Optional
+from urllib.parse import urlsplit
+
+from next_data import load_page_props
+from page_cache import PageCache
+from scrape_report import ScrapeReport, TimedHTTPAdapter, add_report_arguments, default_report_path, timed_fetch
 
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/86.0.4240.183 Safari/537.36"
 )
 
+BASE_URL = "https://www.eliteprospects.com"
+
+PLAYER_FIELDS = [
+    "first_name","last_name","team","number","position",
+    "age","born","birth_place","country","height","weight","shoots"
+]
+
 
 def extract_country(birthplace: str) -> (str, str):
     parts = [p.strip() for p in birthplace.split(",") if p.strip()]
@@ -26,15 +38,16 @@ def extract_country(birthplace: str) -> (str, str):
 def fetch_roster_from_next_data(html: str) -> List[Dict]:
     """Parse the Next.js `__NEXT_DATA__` JSON from a team page and return
     the list of player dicts in our CSV format."""
-    m = re.search(r'<script[^>]+id="__NEXT_DATA__"[^>]*>([\s\S]+?)</script>', html)
-    if not m:
+    page_props = load_page_props(html, keys=("rosterList",))
+    if page_props is None:
         return []
-    data = m.group(1)
-    try:
-        payload = requests.utils.json.loads(data)
-    except Exception:
-        payload = json.loads(data)
-    roster = payload.get("props", {}).get("pageProps", {}).get("rosterList", {})
+    return extract_roster(page_props)
+
+
+def extract_roster(page_props: Dict) -> List[Dict]:
+    """Turn the ``rosterList`` of an already decoded team page into player
+    dicts in our CSV format."""
+    roster = page_props.get("rosterList", {})
     edges = roster.get("tableData", {}).get("edges", [])
     players = []
     for edge in edges:
@@ -85,19 +98,70 @@ EXCLUDED_TEAMS = {
 }
 
 # create a session with retry logic shared by all requests
-from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 
+def _make_session(status_forcelist=(429, 500, 502, 503, 504),
+                  pool_maxsize: int = 10) -> requests.Session:
+    """Build a session with the retry policy shared by all scrapers."""
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=list(status_forcelist),
+        allowed_methods=["GET", "HEAD"],
+    )
+    # TimedHTTPAdapter: an HTTPAdapter that also times DNS and connect
+    adapter = TimedHTTPAdapter(max_retries=retries, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 # session configured once at import time
-_session = requests.Session()
-_retries = Retry(
-    total=3,
-    backoff_factor=1,
-    status_forcelist=[429, 500, 502, 503, 504],
-    allowed_methods=["GET", "HEAD"],
-)
-_session.mount("https://", HTTPAdapter(max_retries=_retries))
+_session = _make_session()
+
+# optional on-disk page cache; see ``enable_cache``
+_cache: Optional[PageCache] = None
+
+
+def enable_cache(directory: str, ttl: float = 7 * 86400,
+                 max_bytes: int = 256 * 1024 * 1024) -> PageCache:
+    """Route every fetch in this process through an on-disk ``PageCache``.
+
+    Setting ``SCRAPER_CACHE_DIR`` in the environment does the same for
+    scripts without a ``--cache-dir`` option.
+    """
+    global _cache
+    _cache = PageCache(directory, ttl=ttl, max_bytes=max_bytes)
+    _cache.prune()
+    return _cache
+
+
+if os.environ.get("SCRAPER_CACHE_DIR"):
+    enable_cache(os.environ["SCRAPER_CACHE_DIR"])
+
+
+def _get(session: requests.Session, url: str, **kwargs) -> requests.Response:
+    """``session.get``, through the page cache if enabled; the response (or
+    exception) carries a ``timing`` for the run report."""
+    if _cache is not None:
+        return timed_fetch(url, lambda: _cache.get(session, url, **kwargs))
+    return timed_fetch(url, lambda: session.get(url, **kwargs))
+
+
+def cached_rows(resp: requests.Response, kind: str, team: str,
+                extract: Callable[[], List[Dict]]) -> List[Dict]:
+    """Return ``extract()``, reusing the rows parsed from an identical page
+    body on an earlier run when the page cache is enabled."""
+    body_hash = getattr(resp, "content_hash", None)
+    if _cache is None or body_hash is None:
+        return extract()
+    rows = _cache.load_parsed(body_hash, kind, team)
+    if rows is None:
+        rows = extract()
+        _cache.store_parsed(body_hash, kind, team, rows)
+    return rows
 
 
 def _fetch(url: str, **kwargs) -> requests.Response:
@@ -110,16 +174,16 @@ def _fetch(url: str, **kwargs) -> requests.Response:
     """
     kwargs.setdefault("headers", {"User-Agent": USER_AGENT})
     kwargs.setdefault("timeout", 15)
-    return _session.get(url, **kwargs)
+    return _get(_session, url, **kwargs)
 
 
-def get_ncaa_team_links() -> List[tuple[str,str]]:
+def get_ncaa_team_links(base_url: str = BASE_URL) -> List[tuple[str,str]]:
     """Return list of (team_name, team_href) from the NCAA league page.
 
     The league page sometimes includes non‑NCAA organizations (U17, junior
     clubs, etc.).  We explicitly exclude those names using `EXCLUDED_TEAMS`.
     """
-    url = "https://www.eliteprospects.com/league/ncaa"
+    url = base_url + "/league/ncaa"
     resp = _fetch(url)
     resp.raise_for_status()
     soup = BeautifulSoup(resp.content, "html.parser")
@@ -149,29 +213,19 @@ def get_ncaa_team_links() -> List[tuple[str,str]]:
     return teams
 
 
-def scrape_all_teams(output_csv: str = 'players.csv'):
-    teams = get_ncaa_team_links()
-    all_players = []
-    base = "https://www.eliteprospects.com"
-    for name, href in teams:
-        print(f"Processing team: {name}")
-        url = base + href
-        try:
-            resp = _fetch(url)
-            if resp.status_code != 200:
-                print(f"  failed to fetch team page ({resp.status_code})")
-                continue
-        except requests.RequestException as exc:
-            # network error or timeout; log and skip this team
-            print(f"  error fetching team page: {exc}")
-            continue
+def team_stats_url(href: str, base_url: str = BASE_URL) -> Optional[str]:
+    """Stats page for a league-page team link ``/team/{id}/{slug}[/...]``:
+    ``{base_url}/team/{id}/{slug}/stats``, or None for links too short to
+    carry an id and slug."""
+    # Extract team_id and slug from href: /team/{id}/{slug}
+    parts = href.split('/')
+    if len(parts) < 4:
+        return None
+    return f"{base_url}/team/{parts[2]}/{parts[3]}/stats"
 
-        players = fetch_roster_from_next_data(resp.text)
-        for p in players:
-            p['team'] = name
-        all_players.extend(players)
-        print(f"  found {len(players)} players")
-    # deduplicate overall roster (first/last/team)
+
+def dedupe_rows(all_players: List[Dict]) -> tuple[List[Dict], int]:
+    """Drop repeated (first/last/team) entries, keeping the first one seen."""
     seen = set()
     unique = []
     duplicates_removed = 0
@@ -182,14 +236,14 @@ def scrape_all_teams(output_csv: str = 'players.csv'):
             unique.append(p)
         else:
             duplicates_removed += 1
-    all_players = unique
-    # write csv
-    headers = [
-        "first_name","last_name","team","number","position",
-        "age","born","birth_place","country","height","weight","shoots"
-    ]
+    return unique, duplicates_removed
+
+
+def write_players_csv(all_players: List[Dict], output_csv: str = 'players.csv'):
+    """Deduplicate the combined roster and write it to ``output_csv``."""
+    all_players, duplicates_removed = dedupe_rows(all_players)
     with open(output_csv, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
+        writer = csv.DictWriter(f, fieldnames=PLAYER_FIELDS)
         writer.writeheader()
         writer.writerows(all_players)
     print(f"wrote {len(all_players)} total players to {output_csv}")
@@ -197,5 +251,225 @@ def scrape_all_teams(output_csv: str = 'players.csv'):
         print(f"✓ Removed {duplicates_removed} duplicate entries")
 
 
+def _roster_for_team(name: str, resp: requests.Response) -> List[Dict]:
+    def extract():
+        players = fetch_roster_from_next_data(resp.text)
+        for p in players:
+            p['team'] = name
+        return players
+    return cached_rows(resp, 'roster', name, extract)
+
+
+class HostRateLimiter:
+    """Spaces out request start times per host and adapts to 429 responses.
+
+    Each host starts at ``rate`` requests per second (``0`` means unlimited).
+    A 429 doubles that host's spacing (up to ``max_interval`` seconds) and
+    honours ``Retry-After``; every success afterwards shrinks the spacing
+    back toward the configured rate.
+    """
+
+    def __init__(self, rate: float = 0.0, max_interval: float = 30.0):
+        self.base_interval = 1.0 / rate if rate > 0 else 0.0
+        self.max_interval = max_interval
+        self._interval: Dict[str, float] = {}
+        self._next_slot: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    def interval(self, host: str) -> float:
+        return self._interval.get(host, self.base_interval)
+
+    async def acquire(self, host: str):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval(host)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def penalize(self, host: str, retry_after: float = 0.0):
+        loop = asyncio.get_running_loop()
+        interval = min(max(self.interval(host) * 2, 0.5), self.max_interval)
+        self._interval[host] = interval
+        resume = loop.time() + max(retry_after, interval)
+        self._next_slot[host] = max(self._next_slot.get(host, 0.0), resume)
+
+    def reward(self, host: str):
+        if host in self._interval:
+            interval = max(self.base_interval, self._interval[host] * 0.9)
+            if interval <= max(self.base_interval, 0.05):
+                del self._interval[host]
+            else:
+                self._interval[host] = interval
+
+
+def _retry_after_seconds(resp: requests.Response) -> float:
+    value = resp.headers.get("Retry-After", "")
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return 0.0
+
+
+async def _fetch_async(session: requests.Session, url: str,
+                       limiter: HostRateLimiter,
+                       semaphore: asyncio.Semaphore,
+                       max_throttle_retries: int = 5) -> requests.Response:
+    """Fetch ``url`` in a worker thread, throttled by ``limiter``.
+
+    429s are handled here rather than by the ``Retry`` adapter so that the
+    limiter sees them and slows down every request to that host, not just
+    the one that was rejected.
+    """
+    host = urlsplit(url).netloc
+    async with semaphore:
+        for attempt in range(max_throttle_retries + 1):
+            await limiter.acquire(host)
+            resp = await asyncio.to_thread(
+                _get, session, url, headers={"User-Agent": USER_AGENT}, timeout=15
+            )
+            resp.timing.throttled = attempt
+            if resp.status_code != 429:
+                limiter.reward(host)
+                return resp
+            limiter.penalize(host, _retry_after_seconds(resp))
+        return resp
+
+
+async def _gather_pages(session: requests.Session, urls: List[str],
+                        limiter: HostRateLimiter,
+                        concurrency: int) -> List[object]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(url):
+        try:
+            return await _fetch_async(session, url, limiter, semaphore)
+        except requests.RequestException as exc:
+            return exc
+
+    return await asyncio.gather(*(one(u) for u in urls))
+
+
+def _make_crawl_session(concurrency: int) -> requests.Session:
+    # 429 is left out of the adapter's retry list; see ``_fetch_async``
+    return _make_session(status_forcelist=(500, 502, 503, 504),
+                         pool_maxsize=max(concurrency, 10))
+
+
+async def fetch_pages_async(urls: List[str], concurrency: int = 8,
+                            rate: float = 0.0) -> List[object]:
+    """Fetch every URL with at most ``concurrency`` requests in flight.
+
+    Results are returned in the same order as ``urls``; each entry is either
+    a ``requests.Response`` or the ``requests.RequestException`` raised
+    while fetching it.
+    """
+    session = _make_crawl_session(concurrency)
+    try:
+        return await _gather_pages(session, urls, HostRateLimiter(rate),
+                                   concurrency)
+    finally:
+        session.close()
+
+
+def iter_pages(urls: List[str], concurrency: int = 1, rate: float = 0.0):
+    """Yield ``(url, response_or_exception)`` for every URL, in order.
+
+    With ``concurrency`` of one this is a plain ``_fetch`` loop.  Otherwise
+    the URLs are fetched by the asyncio crawler a window at a time, so the
+    caller can process early pages without waiting for the whole list.
+    """
+    if concurrency <= 1:
+        for url in urls:
+            try:
+                yield url, _fetch(url)
+            except requests.RequestException as exc:
+                yield url, exc
+        return
+
+    session = _make_crawl_session(concurrency)
+    limiter = HostRateLimiter(rate)
+    loop = asyncio.new_event_loop()
+    window = concurrency * 4
+    try:
+        for start in range(0, len(urls), window):
+            chunk = urls[start:start + window]
+            results = loop.run_until_complete(
+                _gather_pages(session, chunk, limiter, concurrency)
+            )
+            yield from zip(chunk, results)
+    finally:
+        loop.close()
+        session.close()
+
+
+def scrape_all_teams(output_csv: str = 'players.csv', concurrency: int = 1,
+                     rate: float = 0.0, base_url: str = BASE_URL,
+                     report_path: Optional[str] = None):
+    """Scrape every NCAA roster and write ``output_csv``.
+
+    With ``concurrency`` greater than one the team pages are fetched by the
+    asyncio crawler (``rate`` caps requests per second to the host, ``0``
+    for no cap); the CSV written is identical to the sequential run.
+    ``report_path`` names a JSON run report to write (see scrape_report.py).
+    """
+    report = ScrapeReport('scrape_all_teams', concurrency=concurrency, rate=rate,
+                          base_url=base_url, cache=_cache is not None)
+    teams = get_ncaa_team_links(base_url)
+    urls = [base_url + href for _name, href in teams]
+    all_players = []
+    for (name, _href), (_url, resp) in zip(teams, iter_pages(urls, concurrency, rate)):
+        print(f"Processing team: {name}")
+        report.page(name, 'roster', resp)
+        if isinstance(resp, Exception):
+            # network error or timeout; log and skip this team
+            print(f"  error fetching team page: {resp}")
+            continue
+        if resp.status_code != 200:
+            print(f"  failed to fetch team page ({resp.status_code})")
+            continue
+
+        players = report.extract(name, 'roster', lambda: _roster_for_team(name, resp))
+        all_players.extend(players)
+        print(f"  found {len(players)} players")
+    write_players_csv(all_players, output_csv)
+    if report_path:
+        report.write(report_path)
+
+
+def add_cache_arguments(parser):
+    parser.add_argument('--cache-dir', help='Directory for the on-disk page cache')
+    parser.add_argument('--cache-ttl', type=float, default=7 * 86400,
+                        help='Seconds a cached page may go unvalidated before eviction')
+    parser.add_argument('--cache-max-mb', type=float, default=256,
+                        help='Size cap for the page cache in megabytes')
+
+
+def apply_cache_arguments(args):
+    if args.cache_dir:
+        enable_cache(args.cache_dir, ttl=args.cache_ttl,
+                     max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Scrape all NCAA rosters to CSV')
+    parser.add_argument('--output', default='players.csv', help='CSV file to write')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Team pages to fetch in parallel (1 = sequential)')
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help='Max requests per second to the host (0 = no limit)')
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help='Site root, e.g. a local mirror for testing')
+    add_cache_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    apply_cache_arguments(args)
+    scrape_all_teams(args.output, concurrency=args.concurrency,
+                     rate=args.rate, base_url=args.base_url.rstrip('/'),
+                     report_path=default_report_path(args))
+
+
 if __name__ == "__main__":
-    scrape_all_teams()
+    main()
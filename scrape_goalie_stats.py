@@ -1,10 +1,18 @@
 import requests
 import json
 import csv
-import re
-from bs4 import BeautifulSoup
 
-BASE_URL = "https://www.eliteprospects.com"
+from next_data import load_page_props
+from scrape_all_teams import (
+    cached_rows,
+    dedupe_rows,
+    get_ncaa_team_links,
+    iter_pages,
+    team_stats_url,
+)
+from scrape_report import ScrapeReport, default_report_path
+
+GOALIE_FIELDS = ['first_name', 'last_name', 'GP', 'GAA', 'save_pct', 'W', 'L', 'T', 'SO', 'TOI', 'SVS', 'team']
 
 
 def fetch_goalie_stats_from_next_data(html, team_name):
@@ -12,16 +20,25 @@ def fetch_goalie_stats_from_next_data(html, team_name):
     Extract goalie stats from __NEXT_DATA__ JSON on the stats page.
     Returns a list of dicts with: first_name, last_name, GP, GAA, save_pct, W, L, T, SO, TOI, SVS, team
     """
-    match = re.search(
-        r'<script[^>]+id="__NEXT_DATA__"[^>]*>([\s\S]+?)</script>',
-        html
-    )
-    if not match:
+    try:
+        page_props = load_page_props(html, keys=('goalieStats',))
+    except json.JSONDecodeError as e:
+        print(f"JSON decode error for {team_name}: {e}")
         return []
-    
+    except Exception as e:
+        print(f"Unexpected error extracting goalie stats for {team_name}: {e}")
+        return []
+    if page_props is None:
+        return []
+    return extract_goalie_stats(page_props, team_name)
+
+
+def extract_goalie_stats(page_props, team_name):
+    """
+    Build goalie stat rows from the already decoded ``pageProps`` of a team
+    stats page.
+    """
     try:
-        data = json.loads(match.group(1))
-        page_props = data.get('props', {}).get('pageProps', {})
         goalie_stats = page_props.get('goalieStats', {})
         stats_data = goalie_stats.get('stats', {})
         edges = stats_data.get('edges', [])
@@ -62,84 +79,65 @@ def fetch_goalie_stats_from_next_data(html, team_name):
         
         return results
     
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error for {team_name}: {e}")
-        return []
     except Exception as e:
         print(f"Unexpected error extracting goalie stats for {team_name}: {e}")
         return []
 
 
-def scrape_all_goalie_stats():
+def write_goalie_csv(all_stats, csv_path='/workspaces/DataBase_Project/goalie_stats.csv'):
     """
-    Scrape goalie stats for all NCAA teams and write to goalie_stats.csv
+    Deduplicate goalie rows (same first_name, last_name, team) and write them to csv_path
     """
-    print("Fetching NCAA team list...")
-    url = "https://www.eliteprospects.com/league/ncaa"
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    })
+    unique_stats, duplicates_removed = dedupe_rows(all_stats)
     
-    try:
-        resp = session.get(url, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.content, 'html.parser')
-        
-        # Extract team links
-        teams = []
-        excluded = {
-            'U.S. National U17 Team',
-            'Oshawa Generals',
-            'Seattle Jr. Kraken 18U AAA',
-            'Langley Rivermen',
-            'Red Deer Rebels',
-        }
-        
-        for a in soup.select("a.TextLink_link__RhSiC"):
-            text = a.get_text(strip=True)
-            href = a.get('href', '')
-            if href.startswith('/team/') and text not in excluded:
-                # Extract team_id and slug from href: /team/{id}/{slug}
-                parts = href.split('/')
-                if len(parts) >= 4:
-                    team_id = parts[2]
-                    team_slug = parts[3]
-                    teams.append((text, team_id, team_slug))
+    if unique_stats:
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=GOALIE_FIELDS)
+            writer.writeheader()
+            writer.writerows(unique_stats)
         
-        # optionally trim at Yale; kept for backwards compatibility but not
-        # strictly necessary since we cap the count below
-        cutoff = None
-        for idx, (name, _id, _slug) in enumerate(teams):
-            if name.lower() == 'yale':
-                cutoff = idx
-                break
-        if cutoff is not None:
-            teams = teams[: cutoff + 1]
-
-        # enforce maximum of 63 teams since NCAA men's hockey currently has
-        # 63 programs; avoids scraping junk beyond the official list
-        if len(teams) > 63:
-            print(f"Truncating team list to 63 entries (was {len(teams)})")
-            teams = teams[:63]
+        print(f"\n✓ Wrote {len(unique_stats)} goalie records to {csv_path}")
+        if duplicates_removed > 0:
+            print(f"✓ Removed {duplicates_removed} duplicate entries")
+    else:
+        print("\n✗ No goalie records found")
 
+
+def scrape_all_goalie_stats(report_path=None):
+    """
+    Scrape goalie stats for all NCAA teams and write to goalie_stats.csv
+
+    Writes a JSON run report to ``report_path`` (default: the
+    ``SCRAPER_REPORT`` environment variable) if one is given.
+    """
+    print("Fetching NCAA team list...")
+    try:
+        teams = get_ncaa_team_links()
         print(f"Found {len(teams)} NCAA teams\n")
-        
     except Exception as e:
         print(f"Error fetching team list: {e}")
         return
     
+    report = ScrapeReport('scrape_all_goalie_stats')
     all_stats = []
+    # links without an id and slug have no stats page
+    teams = [(name, team_stats_url(href)) for name, href in teams]
+    teams = [(name, url) for name, url in teams if url]
+    urls = [url + '?tab=goalies' for _name, url in teams]
     
-    for team_name, team_id, team_slug in teams:
-        url = f"{BASE_URL}/team/{team_id}/{team_slug}/stats?tab=goalies"
+    for (team_name, _stats_url), (_url, resp) in zip(teams, iter_pages(urls)):
         print(f"Scraping {team_name}...", end=" ", flush=True)
+        report.page(team_name, 'goalie stats', resp)
         
         try:
-            resp = session.get(url, timeout=10)
+            if isinstance(resp, Exception):
+                raise resp
             resp.raise_for_status()
             
-            stats = fetch_goalie_stats_from_next_data(resp.text, team_name)
+            # a page unchanged since the last run (304 or same body) reuses
+            # the rows parsed from it then
+            stats = report.extract(team_name, 'goalies', lambda: cached_rows(
+                resp, 'goalies', team_name, lambda: fetch_goalie_stats_from_next_data(resp.text, team_name)))
             all_stats.extend(stats)
             print(f"✓ ({len(stats)} goalies)")
         
@@ -147,34 +145,10 @@ def scrape_all_goalie_stats():
             print(f"✗ Error: {e}")
             continue
     
-    # Deduplicate entries (same first_name, last_name, team)
-    seen = set()
-    unique_stats = []
-    duplicates_removed = 0
-    
-    for stat in all_stats:
-        key = (stat['first_name'], stat['last_name'], stat['team'])
-        if key not in seen:
-            seen.add(key)
-            unique_stats.append(stat)
-        else:
-            duplicates_removed += 1
-    
-    # Write to CSV
-    if unique_stats:
-        csv_path = '/workspaces/DataBase_Project/goalie_stats.csv'
-        fieldnames = ['first_name', 'last_name', 'GP', 'GAA', 'save_pct', 'W', 'L', 'T', 'SO', 'TOI', 'SVS', 'team']
-        
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(unique_stats)
-        
-        print(f"\n✓ Wrote {len(unique_stats)} goalie records to {csv_path}")
-        if duplicates_removed > 0:
-            print(f"✓ Removed {duplicates_removed} duplicate entries")
-    else:
-        print("\n✗ No goalie records found")
+    write_goalie_csv(all_stats)
+    report_path = report_path or default_report_path()
+    if report_path:
+        report.write(report_path)
 
 
 if __name__ == '__main__':
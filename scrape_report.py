@@ -0,0 +1,261 @@
+"""Per-team telemetry for scraper runs, written out as a JSON run report.
+
+Every fetch made through ``scrape_all_teams._get`` is timed by
+``timed_fetch``, and the timing is attached to the response as
+``resp.timing`` (or to the exception, when the fetch failed), the same
+way ``PageCache`` tags responses with ``from_cache``:
+
+* ``connect`` - setting up the connections opened by this fetch: the
+  name lookup urllib3 makes, TCP, and the TLS handshake for HTTPS; zero
+  when a kept-alive connection is reused.  It comes from the connection
+  classes ``TimedHTTPAdapter`` installs.
+* ``wait`` - the rest of the time until the response headers arrived,
+  including any retries the ``Retry`` adapter made and their backoff.
+* ``transfer`` - reading the body (and, with the page cache, storing it).
+* ``bytes`` - bytes read off the wire (0 for a revalidated cached page),
+  ``retries`` - the adapter's ``resp.raw.retries.history``,
+  ``redirects`` - ``resp.history``, and ``throttled`` - 429s the asyncio
+  crawler waited out.
+
+A ``ScrapeReport`` collects those per team and page together with the
+time and row count of each extraction (and of the database write, for
+``pipeline.py``), and ``write`` saves totals, the
+slowest teams and the per-team detail, so two runs (say at different
+``--concurrency``) can be compared.
+"""
+
+import json
+import os
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+SLOWEST_TEAMS = 10
+
+TIMED_PHASES = ('connect', 'wait', 'transfer', 'total')
+
+
+class FetchTiming:
+    """Measurements for one page fetch (seconds, bytes, counts)."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.status: Optional[int] = None
+        self.from_cache = False
+        self.error: Optional[str] = None
+        self.connections = 0
+        self.connect = 0.0
+        self.wait = 0.0
+        self.transfer = 0.0
+        self.total = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.redirects = 0
+        self.throttled = 0
+
+    def to_dict(self) -> Dict:
+        return {key: round(value, 6) if isinstance(value, float) else value
+                for key, value in vars(self).items()}
+
+
+# the fetch in progress on this thread (or asyncio.to_thread worker)
+_current: ContextVar[Optional[FetchTiming]] = ContextVar('fetch_timing', default=None)
+
+
+class _TimedConnection:
+    """Adds the time spent setting up the connection to the fetch in
+    progress.
+
+    urllib3 resolves the host inside ``_new_conn``, together with the TCP
+    connect, so the lookup is counted as part of ``connect`` rather than
+    timed on its own.  Only done while a ``timed_fetch`` is in progress.
+    """
+
+    def connect(self):
+        timing = _current.get()
+        if timing is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            timing.connections += 1
+            timing.connect += time.perf_counter() - started
+
+
+class TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """``HTTPAdapter`` whose connections report their setup time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+def timed_fetch(url: str, fetch: Callable):
+    """Call ``fetch()`` (a ``session.get`` or ``PageCache.get``) and attach
+    a ``FetchTiming`` to the response, or to the exception it raises."""
+    timing = FetchTiming(url)
+    token = _current.set(timing)
+    started = time.perf_counter()
+    try:
+        resp = fetch()
+    except Exception as exc:
+        timing.total = time.perf_counter() - started
+        timing.error = str(exc)
+        exc.timing = timing
+        raise
+    finally:
+        _current.reset(token)
+    timing.total = time.perf_counter() - started
+    # requests sets ``elapsed`` once the headers are in, before the body is read
+    headers_at = min(resp.elapsed.total_seconds(), timing.total)
+    timing.wait = max(headers_at - timing.connect, 0.0)
+    timing.transfer = timing.total - headers_at
+    timing.status = resp.status_code
+    timing.from_cache = getattr(resp, 'from_cache', False)
+    timing.redirects = len(resp.history)
+    raw = resp.raw
+    if raw is not None and hasattr(raw, 'tell'):
+        timing.bytes = raw.tell()
+    retries = getattr(raw, 'retries', None)
+    if retries is not None:
+        timing.retries = len(retries.history)
+    resp.timing = timing
+    return resp
+
+
+class ScrapeReport:
+    """Collects ``FetchTiming``s and extraction times per team."""
+
+    def __init__(self, scraper: str, **settings):
+        self.scraper = scraper
+        self.settings = settings
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self.wall_seconds: Optional[float] = None
+        self.teams: Dict[str, Dict] = {}
+
+    def _team(self, team: str) -> Dict:
+        return self.teams.setdefault(team, {'pages': {}, 'extract': {}})
+
+    def page(self, team: str, label: str, resp):
+        """Record the fetch of ``team``'s ``label`` page; ``resp`` is the
+        response or the exception the fetch raised."""
+        timing = getattr(resp, 'timing', None)
+        if timing is None:
+            timing = FetchTiming(getattr(resp, 'url', None))
+            timing.error = str(resp) if isinstance(resp, Exception) else None
+        self._team(team)['pages'][label] = timing.to_dict()
+
+    def extract(self, team: str, kind: str, fn: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return ``fn()``, recording how long it took and how many rows it
+        produced as ``team``'s ``kind`` extraction."""
+        started = time.perf_counter()
+        rows = fn()
+        self._team(team)['extract'][kind] = {
+            'seconds': round(time.perf_counter() - started, 6),
+            'rows': len(rows),
+        }
+        return rows
+
+    def load(self, team: str, seconds: float, rows: int):
+        """Record writing ``team``'s rows to the database (``pipeline.py``)."""
+        self._team(team)['load'] = {'seconds': round(seconds, 6), 'rows': rows}
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict:
+        if self.wall_seconds is None:
+            self.finish()
+        totals = {f'{phase}_seconds': 0.0 for phase in TIMED_PHASES}
+        totals.update(pages=0, errors=0, from_cache=0, connections=0,
+                      bytes=0, retries=0, redirects=0, throttled=0,
+                      extract_seconds=0.0, load_seconds=0.0)
+        rows: Dict[str, int] = {}
+        teams = {}
+        for team, data in self.teams.items():
+            fetch = sum(p['total'] for p in data['pages'].values())
+            extract = sum(e['seconds'] for e in data['extract'].values())
+            for p in data['pages'].values():
+                totals['pages'] += 1
+                totals['errors'] += p['error'] is not None or p['status'] != 200
+                totals['from_cache'] += p['from_cache']
+                for key in ('connections', 'bytes', 'retries', 'redirects', 'throttled'):
+                    totals[key] += p[key]
+                for phase in TIMED_PHASES:
+                    totals[f'{phase}_seconds'] += p[phase]
+            for kind, e in data['extract'].items():
+                rows[kind] = rows.get(kind, 0) + e['rows']
+            totals['extract_seconds'] += extract
+            load = data.get('load', {}).get('seconds', 0.0)
+            totals['load_seconds'] += load
+            teams[team] = dict(data, fetch_seconds=round(fetch, 6), extract_seconds=round(extract, 6),
+                               load_seconds=load, seconds=round(fetch + extract + load, 6))
+        totals['fetch_seconds'] = totals.pop('total_seconds')
+        totals = {k: round(v, 6) if isinstance(v, float) else v for k, v in totals.items()}
+        totals['rows'] = rows
+        totals['pages_per_second'] = round(totals['pages'] / self.wall_seconds, 2) if self.wall_seconds else None
+
+        slowest = sorted(teams.items(), key=lambda item: -item[1]['seconds'])
+        return {
+            'scraper': self.scraper,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': round(self.wall_seconds, 3),
+            'settings': self.settings,
+            'totals': totals,
+            'slowest_teams': [
+                {'team': team, 'seconds': data['seconds'], 'fetch_seconds': data['fetch_seconds'],
+                 'extract_seconds': data['extract_seconds'], 'load_seconds': data['load_seconds'],
+                 'slowest_page': max(data['pages'], key=lambda label: data['pages'][label]['total'],
+                                     default=None)}
+                for team, data in slowest[:SLOWEST_TEAMS]
+            ],
+            'teams': teams,
+        }
+
+    def write(self, path: str):
+        report = self.to_dict()
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        t = report['totals']
+        print(f"Run report: {t['pages']} pages in {report['wall_seconds']}s "
+              f"({t['bytes'] / 1e6:.1f} MB, {t['retries']} retries, {t['errors']} errors); "
+              f"fetch {t['fetch_seconds']:.1f}s ("
+              f"connect {t['connect_seconds']:.2f}, wait {t['wait_seconds']:.1f}, "
+              f"transfer {t['transfer_seconds']:.1f}), extract {t['extract_seconds']:.2f}s"
+              + (f", load {t['load_seconds']:.1f}s" if t['load_seconds'] else "")
+              + f" -> {path}")
+
+
+def add_report_arguments(parser):
+    parser.add_argument('--report', help='Write a JSON run report with per-team timings to this file')
+
+
+def default_report_path(args=None) -> Optional[str]:
+    """``--report``, or ``SCRAPER_REPORT`` for scripts without the option."""
+    return getattr(args, 'report', None) or os.environ.get('SCRAPER_REPORT')
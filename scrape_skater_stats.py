@@ -1,13 +1,18 @@
 import requests
 import json
 import csv
-import re
-from bs4 import BeautifulSoup
 
-BASE_URL = "https://www.eliteprospects.com"
+from next_data import load_page_props
+from scrape_all_teams import (
+    cached_rows,
+    dedupe_rows,
+    get_ncaa_team_links,
+    iter_pages,
+    team_stats_url,
+)
+from scrape_report import ScrapeReport, default_report_path
 
-# Mapping of team names to slugs (will be populated dynamically)
-TEAM_MAPPING = {}
+SKATER_FIELDS = ['first_name', 'last_name', 'GP', 'G', 'A', 'TP', 'PIM', '+/-', 'team']
 
 
 def fetch_skater_stats_from_next_data(html, team_name):
@@ -15,16 +20,25 @@ def fetch_skater_stats_from_next_data(html, team_name):
     Extract skater stats from __NEXT_DATA__ JSON on the stats page.
     Returns a list of dicts with: first_name, last_name, GP, G, A, TP, PIM, +/-, team
     """
-    match = re.search(
-        r'<script[^>]+id="__NEXT_DATA__"[^>]*>([\s\S]+?)</script>',
-        html
-    )
-    if not match:
+    try:
+        page_props = load_page_props(html, keys=('skaterStats',))
+    except json.JSONDecodeError as e:
+        print(f"JSON decode error for {team_name}: {e}")
         return []
-    
+    except Exception as e:
+        print(f"Unexpected error extracting stats for {team_name}: {e}")
+        return []
+    if page_props is None:
+        return []
+    return extract_skater_stats(page_props, team_name)
+
+
+def extract_skater_stats(page_props, team_name):
+    """
+    Build skater stat rows from the already decoded ``pageProps`` of a team
+    stats page, so callers holding the payload don't decode it again.
+    """
     try:
-        data = json.loads(match.group(1))
-        page_props = data.get('props', {}).get('pageProps', {})
         skater_stats = page_props.get('skaterStats', {})
         stats_data = skater_stats.get('stats', {})
         edges = stats_data.get('edges', [])
@@ -63,87 +77,66 @@ def fetch_skater_stats_from_next_data(html, team_name):
         
         return results
     
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error for {team_name}: {e}")
-        return []
     except Exception as e:
         print(f"Unexpected error extracting stats for {team_name}: {e}")
         return []
 
 
-def scrape_all_team_stats():
+def write_skater_csv(all_stats, csv_path='/workspaces/DataBase_Project/skater_stats.csv'):
     """
-    Scrape skater stats for all NCAA teams and write to skater_stats.csv
+    Deduplicate skater rows (same first_name, last_name, team) and write them to csv_path
     """
-    # Get list of NCAA teams from the league page
-    print("Fetching NCAA team list...")
-    url = "https://www.eliteprospects.com/league/ncaa"
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    })
+    unique_stats, duplicates_removed = dedupe_rows(all_stats)
     
-    try:
-        resp = session.get(url, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.content, 'html.parser')
-        
-        # Extract team links
-        teams = []
-        excluded = {
-            'U.S. National U17 Team',
-            'Oshawa Generals',
-            'Seattle Jr. Kraken 18U AAA',
-            'Langley Rivermen',
-            'Red Deer Rebels',
-        }
-        
-        for a in soup.select("a.TextLink_link__RhSiC"):
-            text = a.get_text(strip=True)
-            href = a.get('href', '')
-            if href.startswith('/team/') and text not in excluded:
-                # Extract team_id and slug from href: /team/{id}/{slug}
-                parts = href.split('/')
-                if len(parts) >= 4:
-                    team_id = parts[2]
-                    team_slug = parts[3]
-                    teams.append((text, team_id, team_slug))
+    if unique_stats:
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=SKATER_FIELDS)
+            writer.writeheader()
+            writer.writerows(unique_stats)
         
-        # Optionally trim at Yale if it appears; this used to guard against
-        # non‑NCAA entries later on, but the real protection is the hard cap
-        # below.  We keep the code for informational purposes but it isn't
-        # required for correctness.
-        cutoff = None
-        for idx, (name, _id, _slug) in enumerate(teams):
-            if name.lower() == 'yale':
-                cutoff = idx
-                break
-        if cutoff is not None:
-            teams = teams[: cutoff + 1]
+        print(f"\n✓ Wrote {len(unique_stats)} stats records to {csv_path}")
+        if duplicates_removed > 0:
+            print(f"✓ Removed {duplicates_removed} duplicate entries")
+    else:
+        print("\n✗ No stats records found")
 
-        # hard cap at 63 teams (number of NCAA men's programs); avoids
-        # occasional stray links beyond the official list
-        if len(teams) > 63:
-            print(f"Truncating team list to 63 entries (was {len(teams)})")
-            teams = teams[:63]
 
+def scrape_all_team_stats(report_path=None):
+    """
+    Scrape skater stats for all NCAA teams and write to skater_stats.csv
+
+    Writes a JSON run report to ``report_path`` (default: the
+    ``SCRAPER_REPORT`` environment variable) if one is given.
+    """
+    # Get list of NCAA teams from the league page
+    print("Fetching NCAA team list...")
+    try:
+        teams = get_ncaa_team_links()
         print(f"Found {len(teams)} NCAA teams\n")
-        
     except Exception as e:
         print(f"Error fetching team list: {e}")
         return
     
+    report = ScrapeReport('scrape_all_team_stats')
     all_stats = []
+    # links without an id and slug have no stats page
+    teams = [(name, team_stats_url(href)) for name, href in teams]
+    teams = [(name, url) for name, url in teams if url]
+    urls = [url for _name, url in teams]
     
-    for team_name, team_id, team_slug in teams:
-        url = f"{BASE_URL}/team/{team_id}/{team_slug}/stats"
+    for (team_name, _stats_url), (_url, resp) in zip(teams, iter_pages(urls)):
         print(f"Scraping {team_name}...", end=" ", flush=True)
+        report.page(team_name, 'stats', resp)
         
         try:
-            resp = session.get(url, timeout=10)
+            if isinstance(resp, Exception):
+                raise resp
             resp.raise_for_status()
             
-            stats = fetch_skater_stats_from_next_data(resp.text, team_name)
+            # a page unchanged since the last run (304 or same body) reuses
+            # the rows parsed from it then
+            stats = report.extract(team_name, 'skaters', lambda: cached_rows(
+                resp, 'skaters', team_name, lambda: fetch_skater_stats_from_next_data(resp.text, team_name)))
             all_stats.extend(stats)
             print(f"✓ ({len(stats)} players)")
         
@@ -151,33 +144,10 @@ def scrape_all_team_stats():
             print(f"✗ Error: {e}")
             continue
     
-    # Deduplicate entries (same first_name, last_name, team)
-    seen = set()
-    unique_stats = []
-    duplicates_removed = 0
-    for stat in all_stats:
-        key = (stat['first_name'], stat['last_name'], stat['team'])
-        if key not in seen:
-            seen.add(key)
-            unique_stats.append(stat)
-        else:
-            duplicates_removed += 1
-    
-    # Write to CSV
-    if unique_stats:
-        csv_path = '/workspaces/DataBase_Project/skater_stats.csv'
-        fieldnames = ['first_name', 'last_name', 'GP', 'G', 'A', 'TP', 'PIM', '+/-', 'team']
-        
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(unique_stats)
-        
-        print(f"\n✓ Wrote {len(unique_stats)} stats records to {csv_path}")
-        if duplicates_removed > 0:
-            print(f"✓ Removed {duplicates_removed} duplicate entries")
-    else:
-        print("\n✗ No stats records found")
+    write_skater_csv(all_stats)
+    report_path = report_path or default_report_path()
+    if report_path:
+        report.write(report_path)
 
 
 if __name__ == '__main__':
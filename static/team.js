@@ -5,7 +5,9 @@ document.addEventListener('DOMContentLoaded', function() {
     if (team) {
         document.getElementById('team-title').textContent = `${team} Players`;
         
-        fetch(`/team/${encodeURIComponent(team)}/players`)
+        // the roster payload carries every player's bio and stats, so the
+        // modal is filled in without another request
+        fetch(`/team/${encodeURIComponent(team)}/roster`)
             .then(response => response.json())
             .then(data => {
                 const playersList = document.getElementById('players-list');
@@ -21,9 +23,9 @@ document.addEventListener('DOMContentLoaded', function() {
                         const ul = document.createElement('ul');
                         players.forEach(player => {
                             const li = document.createElement('li');
-                            li.textContent = player;
+                            li.textContent = `${player.bio.first_name} ${player.bio.last_name}`;
                             li.className = 'player-item';
-                            li.addEventListener('click', () => showPlayerModal(player, team));
+                            li.addEventListener('click', () => showPlayerModal(player));
                             ul.appendChild(li);
                         });
                         positionDiv.appendChild(ul);
@@ -60,52 +62,39 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
-function showPlayerModal(playerName, team) {
-    const [firstName, ...lastNameParts] = playerName.split(' ');
-    const lastName = lastNameParts.join(' ');
+// internal keys that ride along in the API payload but aren't player details
+const HIDDEN_FIELDS = new Set(['player_id', 'content_hash']);
+
+function showPlayerModal(data) {
+    const modal = document.getElementById('player-modal');
+    const detailsDiv = document.getElementById('player-details');
     
-    fetch(`/player/${encodeURIComponent(firstName)}/${encodeURIComponent(lastName)}?team=${encodeURIComponent(team)}`)
-        .then(response => response.json())
-        .then(data => {
-            if (data.error) {
-                alert('Player not found');
-                return;
-            }
-            
-            const modal = document.getElementById('player-modal');
-            const detailsDiv = document.getElementById('player-details');
-            
-            let html = `<h2>${data.bio.first_name} ${data.bio.last_name}</h2>`;
-            
-            // Bio section
-            html += '<h3>Bio</h3><div class="bio-section">';
-            for (const [key, value] of Object.entries(data.bio)) {
-                if (value !== null && value !== undefined) {
-                    const label = key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
-                    html += `<p><strong>${label}:</strong> ${value}</p>`;
-                }
-            }
-            html += '</div>';
-            
-            // Stats section
-            if (data.stats) {
-                html += '<h3>Stats</h3><div class="stats-section">';
-                for (const [key, value] of Object.entries(data.stats)) {
-                    if (value !== null && value !== undefined) {
-                        const label = key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
-                        html += `<p><strong>${label}:</strong> ${value}</p>`;
-                    }
-                }
-                html += '</div>';
-            } else {
-                html += '<h3>Stats</h3><p>No stats available</p>';
+    let html = `<h2>${data.bio.first_name} ${data.bio.last_name}</h2>`;
+    
+    // Bio section
+    html += '<h3>Bio</h3><div class="bio-section">';
+    for (const [key, value] of Object.entries(data.bio)) {
+        if (value !== null && value !== undefined && !HIDDEN_FIELDS.has(key)) {
+            const label = key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
+            html += `<p><strong>${label}:</strong> ${value}</p>`;
+        }
+    }
+    html += '</div>';
+    
+    // Stats section
+    if (data.stats) {
+        html += '<h3>Stats</h3><div class="stats-section">';
+        for (const [key, value] of Object.entries(data.stats)) {
+            if (value !== null && value !== undefined && !HIDDEN_FIELDS.has(key)) {
+                const label = key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
+                html += `<p><strong>${label}:</strong> ${value}</p>`;
             }
-            
-            detailsDiv.innerHTML = html;
-            modal.style.display = 'block';
-        })
-        .catch(error => {
-            console.error('Error fetching player details:', error);
-            alert('Error loading player details');
-        });
+        }
+        html += '</div>';
+    } else {
+        html += '<h3>Stats</h3><p>No stats available</p>';
+    }
+    
+    detailsDiv.innerHTML = html;
+    modal.style.display = 'block';
 }
\ No newline at end of file
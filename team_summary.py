@@ -0,0 +1,144 @@
+"""Team rollups for the ``Team_Summary`` table, computed with pandas.
+
+``refresh_team_summary`` reads the skater and goalie rows of the given
+teams into two DataFrames, aggregates them with ``groupby`` and column
+arithmetic (no per-row Python), and replaces those teams' summary rows.
+``bulk_load.finish_ingest`` calls it with the teams a load changed, so a
+refresh of one team touches one team's rows.  ``backfill_team_summary``
+fills the table for databases loaded before it existed; the API runs it at
+startup and ``finish_ingest`` before its own refresh.
+"""
+
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert
+
+from models import Goalie_Stats, Player_Stats, Team_Summary
+
+# teams per IN (...) list, well under SQLite's bound-parameter limit
+TEAM_BATCH_SIZE = 500
+
+SKATER_COLUMNS = ('team', 'GP', 'G', 'A', 'TP', 'PIM')
+GOALIE_COLUMNS = ('team', 'GAA', 'TOI', 'SVS')
+
+
+def toi_minutes(toi: pd.Series) -> pd.Series:
+    """Time on ice as minutes: ``"1788"`` or ``"1200:30"`` (minutes:seconds)."""
+    parts = toi.astype('string').str.extract(r'^\s*(\d+(?:\.\d+)?)(?::(\d+))?\s*$')
+    minutes = pd.to_numeric(parts[0], errors='coerce').astype('float64')
+    seconds = pd.to_numeric(parts[1], errors='coerce').astype('float64').fillna(0)
+    return minutes + seconds / 60
+
+
+def _frame(conn, model, columns, teams: Optional[List[str]]) -> pd.DataFrame:
+    table = model.__table__
+    query = select(*(table.c[c] for c in columns))
+    if teams is not None:
+        query = query.where(table.c.team.in_(teams))
+    frame = pd.DataFrame.from_records(conn.execute(query).all(), columns=list(columns))
+    # NULLs come back as None; make the stats numeric (NaN) columns
+    for column in columns:
+        if column not in ('team', 'TOI'):
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('float64')
+    return frame
+
+
+def _per_game(total: pd.Series, games: pd.Series) -> pd.Series:
+    return (total / games.where(games > 0)).round(3)
+
+
+def compute_team_summary(skaters: pd.DataFrame, goalies: pd.DataFrame) -> pd.DataFrame:
+    """One row per team (the index) with the ``Team_Summary`` columns."""
+    s = skaters.groupby('team').agg(
+        skaters=('team', 'size'), games=('GP', 'max'),
+        goals=('G', 'sum'), assists=('A', 'sum'), points=('TP', 'sum'), pim=('PIM', 'sum'))
+    s['goals_per_game'] = _per_game(s['goals'], s['games'])
+    s['points_per_game'] = _per_game(s['points'], s['games'])
+    s['pim_per_game'] = _per_game(s['pim'], s['games'])
+
+    minutes = toi_minutes(goalies['TOI'])
+    # goals against from GAA and minutes, only where both are known; kept
+    # fractional so the team GAA is sum(GAA * minutes) / sum(minutes), and
+    # rounded to a whole number only when stored
+    against = goalies['GAA'] * minutes / 60
+    timed = against.notna()
+    with_saves = timed & goalies['SVS'].notna()
+    g = pd.DataFrame({
+        'team': goalies['team'],
+        'goalie_minutes': minutes.where(timed),
+        'goals_against': against,
+        'saves': goalies['SVS'],
+        'shots_saved': goalies['SVS'].where(with_saves),
+        'shots_against': against.where(with_saves),
+        'timed': timed,
+    }).groupby('team').agg(
+        goalies=('team', 'size'), timed=('timed', 'sum'),
+        goalie_minutes=('goalie_minutes', 'sum'), goals_against=('goals_against', 'sum'),
+        saves=('saves', 'sum'), saves_recorded=('saves', 'count'),
+        shots_saved=('shots_saved', 'sum'), shots_against=('shots_against', 'sum'))
+    g['save_pct'] = (g['shots_saved'] / (g['shots_saved'] + g['shots_against']).replace(0, np.nan)).round(3)
+    g['gaa'] = (g['goals_against'] * 60 / g['goalie_minutes'].replace(0, np.nan)).round(2)
+    # teams without a goalie who has TOI (or SVS) recorded have no figure, not 0
+    untimed = g['timed'] == 0
+    g.loc[untimed, ['goalie_minutes', 'goals_against']] = np.nan
+    g.loc[g['saves_recorded'] == 0, 'saves'] = np.nan
+    g['goalie_minutes'] = g['goalie_minutes'].round(1)
+
+    summary = s.join(g[['goalies', 'goalie_minutes', 'goals_against', 'saves', 'save_pct', 'gaa']], how='outer')
+    counts = ['skaters', 'goalies', 'goals', 'assists', 'points', 'pim']
+    summary[counts] = summary[counts].fillna(0)
+    return summary
+
+
+def _records(summary: pd.DataFrame) -> List[dict]:
+    """Rows for the insert, with NaN as NULL and plain Python numbers."""
+    table = Team_Summary.__table__
+    summary = summary.reset_index().rename(columns={'index': 'team'})
+    summary = summary[[c.name for c in table.columns]]
+    whole = [c.name for c in table.columns if c.type.python_type is int]
+    summary[whole] = summary[whole].round().astype('Int64')
+    return [
+        {k: (None if pd.isna(v) else v) for k, v in row.items()}
+        for row in summary.astype(object).to_dict('records')
+    ]
+
+
+def _batches(teams: List[str]) -> Iterator[List[str]]:
+    for start in range(0, len(teams), TEAM_BATCH_SIZE):
+        yield teams[start:start + TEAM_BATCH_SIZE]
+
+
+def refresh_team_summary(conn, teams: Optional[Iterable[str]] = None):
+    """Recompute the ``Team_Summary`` rows of ``teams`` (every team when
+    None) in the caller's transaction.  Teams left without stats rows lose
+    their summary row."""
+    table = Team_Summary.__table__
+    if teams is None:
+        conn.execute(table.delete())
+        batches = [None]
+    else:
+        teams = sorted(set(teams))
+        if not teams:
+            return
+        batches = _batches(teams)
+    for batch in batches:
+        if batch is not None:
+            conn.execute(table.delete().where(table.c.team.in_(batch)))
+        summary = compute_team_summary(_frame(conn, Player_Stats, SKATER_COLUMNS, batch),
+                                       _frame(conn, Goalie_Stats, GOALIE_COLUMNS, batch))
+        if len(summary):
+            conn.execute(insert(table), _records(summary))
+
+
+def backfill_team_summary(conn) -> bool:
+    """Summarize every team if ``Team_Summary`` is empty but there are
+    stats rows.  Returns whether it did."""
+    if conn.execute(select(Team_Summary.team).limit(1)).first() is not None:
+        return False
+    if not conn.execute(text("SELECT 1 FROM player_stats UNION ALL SELECT 1 FROM goalie_stats LIMIT 1")).first():
+        return False
+    refresh_team_summary(conn)
+    return True
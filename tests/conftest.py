@@ -0,0 +1,23 @@
+"""Point the code under test at a scratch database.
+
+``models`` binds its engine to ``NCAA_DB_PATH`` (and migrates that file)
+the first time it is imported, so this runs before any test module is
+collected.  It builds a small synthetic database (63 teams) so the tests
+never open the tracked ``ncaa_hockey.db``.
+"""
+
+import os
+import shutil
+import tempfile
+
+from benchmarks import synthetic_db
+
+_scratch = tempfile.mkdtemp(prefix='ncaa_tests_')
+os.environ['NCAA_DB_PATH'] = os.path.join(_scratch, 'test.db')
+# every request should reach the database, not the response cache
+os.environ['NCAA_CACHE_MAX_MB'] = '0'
+synthetic_db.build_db(os.environ['NCAA_DB_PATH'], scale=1)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_scratch, ignore_errors=True)
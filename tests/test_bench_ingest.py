@@ -0,0 +1,7 @@
+from benchmarks.bench_ingest import check, run_stage
+
+
+def test_crashed_stage_fails_instead_of_hanging(tmp_path):
+    result = run_stage('normalize', str(tmp_path / 'scratch.db'), csv_dir=str(tmp_path / 'missing'))
+    assert 'FileNotFoundError' in result['error']
+    assert check({'normalize x1': result}, None, 25, {}) == ['normalize x1: crashed']
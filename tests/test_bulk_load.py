@@ -0,0 +1,87 @@
+"""``bulk_load`` change detection and ``Change_Log`` retention."""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+import bulk_load
+import models
+from models import Bio, Change_Log, Player_Stats
+
+
+@pytest.fixture
+def conn():
+    # every test runs in a transaction that is rolled back afterwards
+    with models.engine.connect() as conn:
+        with conn.begin() as trans:
+            yield conn
+            trans.rollback()
+
+
+def logged(conn):
+    return conn.execute(select(func.count()).select_from(Change_Log)).scalar()
+
+
+def roster(team):
+    bios = [{'first_name': f'Test{i}', 'last_name': 'Loader', 'team': team, 'position': 'F'}
+            for i in range(5)]
+    stats = [{'first_name': b['first_name'], 'last_name': 'Loader', 'team': team,
+              'GP': 10, 'G': i, 'A': 2 * i, 'TP': 3 * i, 'PIM': 0, 'plus_minus': 1}
+             for i, b in enumerate(bios)]
+    return bios, stats
+
+
+def test_second_identical_load_logs_no_changes(conn):
+    bios, stats = roster('Test University')
+    before = logged(conn)
+    for model, rows in ((Bio, bios), (Player_Stats, stats)):
+        result = bulk_load.upsert_rows(model, [dict(r) for r in rows], conn=conn)
+        assert result.inserted == len(rows)
+    after_first = logged(conn)
+    assert after_first == before + len(bios) + len(stats)
+
+    for model, rows in ((Bio, bios), (Player_Stats, stats)):
+        result = bulk_load.upsert_rows(model, [dict(r) for r in rows], conn=conn)
+        assert (result.inserted, result.updated, result.unchanged) == (0, 0, len(rows))
+        assert not result.teams
+    assert logged(conn) == after_first
+
+    # a real change is logged once, with the column that changed
+    stats[0]['G'] += 1
+    bulk_load.upsert_rows(Player_Stats, [dict(r) for r in stats], conn=conn)
+    change = conn.execute(select(Change_Log).order_by(Change_Log.id.desc()).limit(1)).mappings().one()
+    assert logged(conn) == after_first + 1
+    assert (change['change'], change['changed_columns']) == ('update', 'G')
+
+
+def test_finish_run_prunes_old_changes(conn):
+    log = Change_Log.__table__
+    now = models.utcnow()
+    entry = {'table_name': 'bio', 'first_name': 'Old', 'last_name': 'Change', 'team': 'Test University',
+             'change': 'insert'}
+    conn.execute(log.insert(), [dict(entry, changed_at=now - timedelta(days=bulk_load.CHANGE_LOG_DAYS + 1)),
+                                dict(entry, first_name='New', changed_at=now - timedelta(days=1))])
+    bulk_load.finish_run(conn)
+    kept = conn.execute(select(log.c.first_name).where(log.c.last_name == 'Change')).scalars().all()
+    assert kept == ['New']
+    assert bulk_load.prune_change_log(conn, days=0) == 0
+
+
+def test_rows_without_a_team_are_kept_and_nameless_rows_counted(conn):
+    from bio_init import bio_record
+    from goalie_init import goalie_record
+    from player_init import skater_record
+
+    rows = [{'first_name': 'No', 'last_name': 'Team', 'team': ''},
+            {'first_name': 'Also', 'last_name': 'Teamless'},
+            {'first_name': ' ', 'last_name': 'Nameless', 'team': 'Test University'}]
+    for record in (bio_record, skater_record, goalie_record):
+        mapped = [record(r) for r in rows]
+        assert [r and r['team'] for r in mapped] == ['', '', None]
+
+    result = bulk_load.upsert_rows(Bio, map(bio_record, rows), conn=conn)
+    assert (result.inserted, result.skipped) == (2, 1)
+    assert result.teams == {''}
+    teams = conn.execute(select(Bio.team).where(Bio.last_name.in_(['Team', 'Teamless']))).scalars().all()
+    assert teams == ['', '']
@@ -0,0 +1,57 @@
+"""``/leaders`` ranks within the filtered list, across cursor pages."""
+
+from fastapi.testclient import TestClient
+
+import main
+
+client = TestClient(main.app)
+
+
+def pages(path, limit):
+    leaders, cursor = [], 0
+    while cursor is not None:
+        body = client.get(f"{path}&limit={limit}&cursor={cursor}").json()
+        leaders += body["leaders"]
+        cursor = body["next_cursor"]
+    return leaders
+
+
+def expected_ranks(values, descending=True):
+    # competition ranking: ties share a rank, the next rank skips
+    return [1 + sum(1 for other in values if (other > v if descending else other < v)) for v in values]
+
+
+def test_filtered_ranks_start_at_one_and_agree_across_pages():
+    for path in ("/leaders/G?position=D", "/leaders/TP?min_gp=20", "/leaders/GAA?min_gp=5"):
+        whole = client.get(f"{path}&limit=100").json()["leaders"]
+        assert whole and whole[0]["rank"] == 1
+        values = [leader["value"] for leader in whole]
+        if len(whole) < 100:
+            assert [leader["rank"] for leader in whole] == expected_ranks(values, "GAA" not in path)
+        # the same list in small pages, some starting inside a tie
+        paged = pages(path, 7)[:len(whole)]
+        assert [(leader["player_id"], leader["rank"]) for leader in paged] == \
+            [(leader["player_id"], leader["rank"]) for leader in whole]
+
+
+def test_unfiltered_and_team_ranks_are_precomputed():
+    leaders = client.get("/leaders/TP?limit=5").json()["leaders"]
+    assert leaders[0]["rank"] == 1
+    team = leaders[0]["team"]
+    leaders = client.get(f"/leaders/TP?team={team}&limit=50").json()["leaders"]
+    assert [leader["rank"] for leader in leaders] == [leader["team_rank"] for leader in leaders]
+
+
+def test_goalie_rate_stats_default_to_a_minimum_of_games():
+    min_gp = main.LEADER_MIN_GP["save_pct"]
+    assert client.get("/leaders/save_pct").json()["min_gp"] == min_gp
+    leaders = pages("/leaders/save_pct?", 100)
+    assert all(leader["GP"] >= min_gp for leader in leaders)
+    everyone = pages("/leaders/save_pct?min_gp=0", 100)
+    assert len(everyone) > len(leaders)
+    # counting stats have no default
+    assert client.get("/leaders/W").json()["min_gp"] == 0
+
+
+def test_offset_is_gone():
+    assert "offset" not in client.get("/leaders/TP?offset=10").json()
@@ -0,0 +1,169 @@
+"""``models._migrate_to_player_ids`` on databases with the old name-keyed
+schema."""
+
+import os
+import sqlite3
+import subprocess
+
+import pytest
+
+import models
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the schema before player_id: every table keyed on (first_name, last_name)
+OLD_SCHEMA = """
+CREATE TABLE bio (
+    first_name VARCHAR NOT NULL, last_name VARCHAR NOT NULL, team VARCHAR,
+    number VARCHAR, position VARCHAR, age INTEGER, born VARCHAR, birth_place VARCHAR,
+    country VARCHAR, height VARCHAR, weight VARCHAR, shoots VARCHAR,
+    PRIMARY KEY (first_name, last_name)
+);
+CREATE INDEX ix_bio_first_name ON bio (first_name);
+CREATE INDEX ix_bio_last_name ON bio (last_name);
+CREATE TABLE player_stats (
+    first_name VARCHAR NOT NULL, last_name VARCHAR NOT NULL,
+    "GP" INTEGER, "G" INTEGER, "A" INTEGER, "TP" INTEGER, "PIM" INTEGER,
+    plus_minus INTEGER, team VARCHAR,
+    PRIMARY KEY (first_name, last_name)
+);
+CREATE INDEX ix_player_stats_first_name ON player_stats (first_name);
+CREATE INDEX ix_player_stats_last_name ON player_stats (last_name);
+CREATE TABLE goalie_stats (
+    first_name VARCHAR NOT NULL, last_name VARCHAR NOT NULL,
+    "GP" INTEGER, "GAA" FLOAT, save_pct FLOAT, "W" INTEGER, "L" INTEGER, "T" INTEGER,
+    "SO" INTEGER, "TOI" VARCHAR, "SVS" INTEGER, team VARCHAR,
+    PRIMARY KEY (first_name, last_name)
+);
+CREATE INDEX ix_goalie_stats_first_name ON goalie_stats (first_name);
+CREATE INDEX ix_goalie_stats_last_name ON goalie_stats (last_name);
+"""
+
+
+def migrate(path):
+    engine = models.make_engine(str(path))
+    try:
+        models._migrate_to_player_ids(engine)
+    finally:
+        engine.dispose()
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@pytest.fixture
+def old_db(tmp_path):
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    conn.executemany(
+        "INSERT INTO bio (first_name, last_name, team, number, position, age) VALUES (?, ?, ?, ?, ?, ?)", [
+            ('John', 'Smith', 'Team A', '9', 'F', 21),
+            ('Al', 'Jones', 'Team A', '4', 'D', 22),
+            ('Ben', 'Noteam', None, None, 'F', 20),
+        ])
+    conn.executemany(
+        'INSERT INTO player_stats (first_name, last_name, team, "GP", "G", "A", "TP", "PIM", plus_minus) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+            # the stats loader overwrote Team A's John Smith with Team B's
+            ('John', 'Smith', 'Team B', 30, 12, 10, 22, 8, 5),
+            ('Al', 'Jones', 'Team A', 28, 2, 9, 11, 20, -3),
+            # no bio row at all
+            ('Cy', 'Stub', 'Team A', 5, 0, 1, 1, 0, 0),
+        ])
+    conn.execute(
+        'INSERT INTO goalie_stats (first_name, last_name, team, "GP", "GAA", save_pct, "TOI", "SVS") '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', ('Gus', 'Goalie', 'Team B', 20, 2.5, 0.91, '1200', 600))
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migration_keeps_every_row(old_db):
+    conn = migrate(old_db)
+    counts = {t: conn.execute(f"SELECT count(*) FROM {t}").fetchone()[0]
+              for t in ('bio', 'player_stats', 'goalie_stats')}
+    # three bios plus stubs for Team B's John Smith, Cy Stub and Gus Goalie
+    assert counts == {'bio': 6, 'player_stats': 3, 'goalie_stats': 1}
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not {'bio_old', 'player_stats_old', 'goalie_stats_old'} & tables
+    indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert 'ix_bio_first_name' not in indexes
+    # every stats row belongs to the bio row of the same player and team
+    orphans = conn.execute(
+        "SELECT count(*) FROM player_stats s LEFT JOIN bio b "
+        "ON b.player_id = s.player_id AND b.team = s.team WHERE b.player_id IS NULL").fetchone()[0]
+    assert orphans == 0
+    assert conn.execute("SELECT count(*) FROM player_stats WHERE content_hash IS NOT NULL").fetchone()[0] == 0
+
+
+def test_namesakes_on_different_teams_are_split(old_db):
+    conn = migrate(old_db)
+    smiths = {r['team']: r for r in conn.execute(
+        "SELECT * FROM bio WHERE first_name = 'John' AND last_name = 'Smith'")}
+    assert set(smiths) == {'Team A', 'Team B'}
+    assert smiths['Team A']['player_id'] != smiths['Team B']['player_id']
+    # Team A keeps the bio, Team B's is a stub
+    assert (smiths['Team A']['number'], smiths['Team A']['age']) == ('9', 21)
+    assert smiths['Team B']['number'] is None and smiths['Team B']['position'] is None
+    stats = conn.execute(
+        "SELECT * FROM player_stats WHERE first_name = 'John' AND last_name = 'Smith'").fetchall()
+    assert len(stats) == 1
+    assert stats[0]['player_id'] == smiths['Team B']['player_id']
+    assert (stats[0]['GP'], stats[0]['TP']) == (30, 22)
+
+
+def test_stub_bios(old_db):
+    conn = migrate(old_db)
+    stubs = {(r['first_name'], r['last_name']): r for r in conn.execute(
+        "SELECT * FROM bio WHERE (first_name, last_name) IN (VALUES ('Cy', 'Stub'), ('Gus', 'Goalie'))")}
+    assert stubs[('Cy', 'Stub')]['position'] is None
+    assert stubs[('Cy', 'Stub')]['team'] == 'Team A'
+    assert stubs[('Gus', 'Goalie')]['position'] == 'G'
+    goalie = conn.execute("SELECT * FROM goalie_stats").fetchone()
+    assert goalie['player_id'] == stubs[('Gus', 'Goalie')]['player_id']
+    assert (goalie['GAA'], goalie['TOI'], goalie['SVS']) == (2.5, '1200', 600)
+    # a bio without a team gets the empty team rather than being dropped
+    assert conn.execute("SELECT team FROM bio WHERE last_name = 'Noteam'").fetchone()[0] == ''
+
+
+def test_migration_runs_once(old_db):
+    migrate(old_db).close()
+    conn = migrate(old_db)
+    assert conn.execute("SELECT count(*) FROM bio").fetchone()[0] == 6
+
+
+def test_migrates_the_committed_database(tmp_path):
+    """The shipped ncaa_hockey.db, as committed, in the old schema."""
+    path = tmp_path / 'ncaa_hockey.db'
+    try:
+        data = subprocess.run(['git', 'show', 'HEAD:ncaa_hockey.db'], cwd=REPO,
+                              capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip('needs a git checkout')
+    path.write_bytes(data)
+    conn = sqlite3.connect(path)
+    if 'player_id' in {r[1] for r in conn.execute("PRAGMA table_info(bio)")}:
+        pytest.skip('committed database is already migrated')
+    before = {t: conn.execute(f"SELECT count(*) FROM {t}").fetchone()[0]
+              for t in ('bio', 'player_stats', 'goalie_stats')}
+    # stats rows whose (name, team) has no bio each get one stub
+    stubs = conn.execute(
+        "SELECT count(*) FROM ("
+        "SELECT first_name, last_name, COALESCE(team, '') FROM player_stats "
+        "UNION SELECT first_name, last_name, COALESCE(team, '') FROM goalie_stats "
+        "EXCEPT SELECT first_name, last_name, COALESCE(team, '') FROM bio)").fetchone()[0]
+    conn.close()
+
+    conn = migrate(path)
+    after = {t: conn.execute(f"SELECT count(*) FROM {t}").fetchone()[0] for t in before}
+    assert after == dict(before, bio=before['bio'] + stubs)
+    for table in ('player_stats', 'goalie_stats'):
+        orphans = conn.execute(
+            f"SELECT count(*) FROM {table} s LEFT JOIN bio b "
+            "ON b.player_id = s.player_id AND b.team = s.team WHERE b.player_id IS NULL").fetchone()[0]
+        assert orphans == 0
+
+
+def test_fixture_does_not_touch_tracked_database():
+    assert os.path.abspath(models.DB_PATH) != os.path.join(REPO, 'ncaa_hockey.db')
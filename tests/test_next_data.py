@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import next_data
+from benchmarks.fixtures import make_next_data, make_team_page
+
+KEYS = ('skaterStats', 'goalieStats')
+
+
+def page(payload, compact=True):
+    body = json.dumps(payload, separators=(',', ':') if compact else None, ensure_ascii=False)
+    return f'<html><script id="__NEXT_DATA__" type="application/json">{body}</script></html>'
+
+
+def expected(payload):
+    props = payload['props']['pageProps']
+    return {key: props[key] for key in KEYS if key in props}
+
+
+@pytest.mark.parametrize('compact', [True, False])
+@pytest.mark.parametrize('page_props, direct', [
+    # the same name nested in an earlier entry
+    ({'news': [{'skaterStats': 'nested'}], 'skaterStats': {'edges': [1]}}, False),
+    ({'news': {'skaterStats': 'nested'}}, False),
+    # brackets, quotes and backslashes inside strings don't count
+    ({'n': ['[{', '\\"}', '}}]', 'a\\'], 'skaterStats': [1, ']'], 'goalieStats': {}}, True),
+    ({'n': 'Åström {', 'skaterStats': 'é'}, True),
+    # a key whose name ends in one we want
+    ({'"skaterStats': 5, 'skaterStats': 6}, False),
+    ({'a': 1}, True),
+])
+def test_only_direct_children_of_page_props(page_props, direct, compact):
+    payload = {'props': {'pageProps': page_props}}
+    html = page(payload, compact)
+    assert next_data.load_page_props(html, keys=KEYS) == expected(payload)
+    subtrees = next_data._load_subtrees(next_data.find_next_data(html), KEYS)
+    assert (subtrees is not None) == direct
+
+
+def test_key_after_page_props_is_not_taken():
+    # back at the same depth as pageProps' entries, but outside it
+    payload = {'props': {'pageProps': {'a': 1}}, 'other': {'x': {'skaterStats': 'later'}}}
+    html = page(payload)
+    assert next_data.load_page_props(html, keys=KEYS) == {}
+    assert next_data._load_subtrees(next_data.find_next_data(html), KEYS) is None
+
+
+def test_fixture_pages_use_the_subtree_path():
+    html = make_team_page()
+    data = next_data.find_next_data(html)
+    assert next_data._load_subtrees(data, KEYS) == expected(make_next_data())
+    full = next_data.load_page_props(html)
+    assert set(full) > set(KEYS)
@@ -0,0 +1,76 @@
+import os
+
+import requests
+
+import scrape_all_teams
+import scrape_goalie_stats
+import scrape_skater_stats
+from page_cache import PageCache
+
+
+def response(status, body=b'', etag=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.encoding = 'utf-8'
+    if etag:
+        resp.headers['ETag'] = etag
+    return resp
+
+
+class Server:
+    """A stand-in session: 200 with an ETag, then 304 to a matching
+    If-None-Match."""
+
+    def __init__(self, body=b'<html>page</html>'):
+        self.body = body
+        self.requests = 0
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests += 1
+        etag = f'"{len(self.body)}"'
+        if (headers or {}).get('If-None-Match') == etag:
+            return response(304)
+        return response(200, self.body, etag)
+
+
+def cache_bytes(directory):
+    return sum(os.path.getsize(os.path.join(directory, sub, name))
+               for sub in ('bodies', 'parsed') for name in os.listdir(os.path.join(directory, sub)))
+
+
+def test_cap_holds_while_writing(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=2000)
+    for i in range(40):
+        resp = cache.get(Server(b'x' * 200 + str(i).encode()), f'https://example.test/{i}')
+        cache.store_parsed(resp.content_hash, 'skaters', 'Team', [{'n': i}])
+        assert cache_bytes(tmp_path) <= 2000
+    # the latest page is still cached
+    assert cache.lookup('https://example.test/39') is not None
+
+
+def test_revalidated_stats_pages_are_not_parsed_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape_all_teams, '_cache', PageCache(str(tmp_path)))
+    server = Server()
+    parsed = []
+
+    def iter_pages(urls):
+        for url in urls:
+            yield url, scrape_all_teams._cache.get(server, url)
+
+    for module, scrape, fetch in (
+            (scrape_skater_stats, scrape_skater_stats.scrape_all_team_stats, 'fetch_skater_stats_from_next_data'),
+            (scrape_goalie_stats, scrape_goalie_stats.scrape_all_goalie_stats, 'fetch_goalie_stats_from_next_data')):
+        written = []
+        monkeypatch.setattr(module, 'get_ncaa_team_links', lambda: [('Team A', '/team/1/team-a')])
+        monkeypatch.setattr(module, 'iter_pages', iter_pages)
+        monkeypatch.setattr(module, fetch, lambda html, team: parsed.append(team) or [{'team': team}])
+        for attr in ('write_skater_csv', 'write_goalie_csv'):
+            if hasattr(module, attr):
+                monkeypatch.setattr(module, attr, written.append)
+        parsed.clear()
+        scrape(report_path='')
+        scrape(report_path='')
+        # parsed on the 200, reused on the 304
+        assert parsed == ['Team A']
+        assert written == [[{'team': 'Team A'}], [{'team': 'Team A'}]]
@@ -0,0 +1,81 @@
+"""The DuckDB team queries over a snapshot agree with ``team_summary``."""
+
+import math
+import sqlite3
+
+import pytest
+
+pytest.importorskip('pyarrow')
+pytest.importorskip('duckdb')
+
+from sqlalchemy import text
+
+import models
+import parquet_snapshot
+from team_summary import refresh_team_summary
+
+
+def close(a, b, places):
+    # DuckDB rounds halves away from zero, pandas to even
+    if a is None or b is None:
+        return a is None and b is None
+    return math.isclose(a, b, abs_tol=10 ** -places + 1e-9)
+
+
+@pytest.fixture(scope='module')
+def snapshot(tmp_path_factory):
+    out = tmp_path_factory.mktemp('snapshot')
+    # a private copy: the TOI edits below must not leak into other tests
+    path = out / 'snapshot_source.db'
+    copy = sqlite3.connect(path)
+    # the scratch database is in WAL mode, so copy it through SQLite
+    with sqlite3.connect(models.DB_PATH) as source:
+        source.backup(copy)
+    copy.close()
+    engine = models.make_engine(str(path))
+    with engine.begin() as conn:
+        # some goalies with minutes:seconds TOI, as other sources write it
+        goalies = conn.execute(text(
+            "SELECT player_id, team, TOI FROM goalie_stats WHERE TOI GLOB '[0-9]*' "
+            "ORDER BY player_id LIMIT 5")).all()
+        assert goalies
+        for player_id, team, toi in goalies:
+            conn.execute(text("UPDATE goalie_stats SET TOI = :toi WHERE player_id = :id AND team = :team"),
+                         {'toi': f'{toi}:30', 'id': player_id, 'team': team})
+        refresh_team_summary(conn, [team for _id, team, _toi in goalies])
+        summary = {row.team: row._mapping for row in conn.execute(text("SELECT * FROM team_summary"))}
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(models, 'read_engine', models.make_engine(str(path), readonly=True))
+        parquet_snapshot.export_snapshot(str(out / 'parquet'), force=True)
+    return parquet_snapshot.connect_snapshot(str(out / 'parquet')), summary
+
+
+def query(con, name):
+    columns, rows = parquet_snapshot.run_query(con, parquet_snapshot.ANALYTICS_QUERIES[name])
+    return {row[0]: dict(zip(columns, row)) for row in rows}
+
+
+def test_team_scoring_matches_team_summary(snapshot):
+    con, summary = snapshot
+    scoring = query(con, 'team_scoring')
+    assert scoring
+    for team, row in scoring.items():
+        expected = summary[team]
+        for column in ('skaters', 'games', 'goals', 'assists', 'points', 'pim'):
+            assert row[column] == expected[column], (team, column)
+        for column in ('goals_per_game', 'points_per_game', 'pim_per_game'):
+            assert close(row[column], expected[column], 3), (team, column)
+
+
+def test_team_goaltending_matches_team_summary(snapshot):
+    con, summary = snapshot
+    goaltending = query(con, 'team_goaltending')
+    assert goaltending
+    for team, row in goaltending.items():
+        expected = summary[team]
+        assert row['goalies'] == expected['goalies']
+        assert row['saves'] == expected['saves']
+        assert close(row['goalie_minutes'], expected['goalie_minutes'], 1), team
+        assert close(row['goals_against'], expected['goals_against'], 0), team
+        assert close(row['save_pct'], expected['save_pct'], 3), team
+        assert close(row['gaa'], expected['gaa'], 2), team
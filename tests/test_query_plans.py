@@ -0,0 +1,8 @@
+from benchmarks.check_query_plans import query_plans
+
+
+def test_api_queries_use_indexes():
+    results = query_plans()
+    assert results
+    scans = {' '.join(statement.split()): found for statement, _plan, found in results if found}
+    assert not scans
@@ -0,0 +1,75 @@
+"""The response cache middleware: ETags, 304s and invalidation by a load."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+
+import bulk_load
+import main
+import models
+from models import Bio
+from response_cache import ResponseCache, etag_matches
+
+client = TestClient(main.app)
+
+NEW_PLAYER = {'first_name': 'Etag', 'last_name': 'Tester', 'position': 'F'}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    # the tests run with the cache sized to 0; give this one room
+    cache = ResponseCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(main, 'response_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def team():
+    with models.read_engine.connect() as conn:
+        team = conn.execute(select(Bio.team).order_by(Bio.player_id).limit(1)).scalar()
+    yield team
+    bio = Bio.__table__
+    with models.engine.begin() as conn:
+        conn.execute(delete(bio).where(bio.c.first_name == NEW_PLAYER['first_name'],
+                                       bio.c.last_name == NEW_PLAYER['last_name']))
+        bulk_load.finish_ingest(conn, {team})
+
+
+def test_etag_matches():
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('"b", W/"a"', '"a"')
+    assert etag_matches('*', '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches(None, '"a"')
+
+
+def test_if_none_match_gets_304(cache):
+    first = client.get('/teams')
+    assert first.status_code == 200
+    etag = first.headers['etag']
+    assert first.headers['cache-control'] == 'no-cache'
+
+    again = client.get('/teams', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.content == b''
+    assert again.headers['etag'] == etag
+    assert cache.hits == 1
+
+    assert client.get('/teams', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_load_bumps_generation_and_etag(cache, team):
+    path = f'/team/{team}/players'
+    before = client.get(path)
+    etag = before.headers['etag']
+    generation = main.current_generation()
+
+    result = bulk_load.load_records(Bio, [dict(NEW_PLAYER, team=team)])
+    assert result.inserted == 1
+    assert main.current_generation() > generation
+
+    after = client.get(path, headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['etag'] != etag
+    assert 'Etag Tester' in after.json()['players_by_position']['F']
+    assert client.get(path, headers={'If-None-Match': after.headers['etag']}).status_code == 304
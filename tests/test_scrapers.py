@@ -0,0 +1,11 @@
+from scrape_all_teams import team_stats_url
+
+
+def test_team_stats_url_uses_id_and_slug():
+    base = 'https://example.test'
+    assert team_stats_url('/team/1554/boston-university', base) == f'{base}/team/1554/boston-university/stats'
+    # season and trailing segments of the league-page link are not kept
+    assert team_stats_url('/team/1554/boston-university/2024-2025/', base) == \
+        f'{base}/team/1554/boston-university/stats'
+    assert team_stats_url('/team/1554', base) is None
+    assert team_stats_url('/team/', base) is None
@@ -0,0 +1,67 @@
+"""``/search`` and its FTS5 tables, with and without the trigram tokenizer."""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+import main
+import models
+
+client = TestClient(main.app)
+
+
+def names(conn, kind):
+    return {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = :kind"),
+                                           {'kind': kind})}
+
+
+def add_player(conn, first, last):
+    conn.execute(text("INSERT INTO bio (first_name, last_name, team) VALUES (:first, :last, 'Team A')"),
+                 {'first': first, 'last': last})
+
+
+def test_fuzzy_search_finds_misspellings():
+    with models.read_engine.connect() as conn:
+        last = conn.execute(text("SELECT last_name FROM bio WHERE length(last_name) > 5 LIMIT 1")).scalar()
+    resp = client.get('/search', params={'q': last[:-1] + 'q', 'fuzzy': 'true'})
+    assert resp.status_code == 200
+    assert last in {r['last_name'] for r in resp.json()['results']}
+
+
+def test_fuzzy_search_without_trigram_tokenizer_is_501(monkeypatch):
+    monkeypatch.setattr(main, 'SEARCH_TABLES', frozenset({'bio_fts'}))
+    resp = client.get('/search', params={'q': 'smith', 'fuzzy': 'true'})
+    assert resp.status_code == 501
+    assert 'trigram' in resp.json()['error']
+    assert client.get('/search', params={'q': 'smith'}).status_code == 200
+
+
+def test_init_search_skips_trigram_table_when_unsupported(tmp_path, monkeypatch):
+    engine = models.make_engine(str(tmp_path / 'search.db'))
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(models, '_has_trigram_tokenizer', lambda engine: False)
+    assert models._init_search(engine) == {'bio_fts'}
+    with engine.begin() as conn:
+        assert 'bio_fts' in names(conn, 'table')
+        assert not {n for n in names(conn, 'table') | names(conn, 'trigger') if n.startswith('bio_trigram')}
+        add_player(conn, 'Jane', 'Doe')
+        assert conn.execute(text("SELECT rowid FROM bio_fts WHERE bio_fts MATCH 'doe'")).all()
+
+
+def test_trigram_index_survives_an_older_sqlite(tmp_path, monkeypatch):
+    # indexed by this SQLite, then opened by one without the tokenizer
+    engine = models.make_engine(str(tmp_path / 'search.db'))
+    SQLModel.metadata.create_all(engine)
+    assert 'bio_trigram' in models._init_search(engine)
+    with monkeypatch.context() as patch:
+        patch.setattr(models, '_has_trigram_tokenizer', lambda engine: False)
+        assert models._init_search(engine) == {'bio_fts'}
+    # writes to bio no longer touch bio_trigram
+    with engine.begin() as conn:
+        assert not {n for n in names(conn, 'trigger') if n.startswith('bio_trigram')}
+        add_player(conn, 'Jane', 'Doe')
+    # and the index catches up once the tokenizer is back
+    assert 'bio_trigram' in models._init_search(engine)
+    with engine.begin() as conn:
+        assert len({n for n in names(conn, 'trigger') if n.startswith('bio_trigram')}) == 3
+        assert conn.execute(text("SELECT rowid FROM bio_trigram WHERE bio_trigram MATCH 'Doe'")).all()
@@ -0,0 +1,73 @@
+"""``team_summary`` rollups and the backfill of an empty ``team_summary``."""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+
+import models
+from team_summary import compute_team_summary, toi_minutes
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def skaters(*rows):
+    return pd.DataFrame(list(rows), columns=['team', 'GP', 'G', 'A', 'TP', 'PIM'], dtype=object).astype(
+        {c: 'float64' for c in ('GP', 'G', 'A', 'TP', 'PIM')})
+
+
+def goalies(*rows):
+    return pd.DataFrame(list(rows), columns=['team', 'GAA', 'TOI', 'SVS'], dtype=object).astype(
+        {'GAA': 'float64', 'SVS': 'float64'})
+
+
+def test_toi_minutes():
+    minutes = toi_minutes(pd.Series(['1788', '1200:30', ' 61.5 ', '', None, 'n/a']))
+    assert minutes.tolist()[:3] == [1788, 1200.5, 61.5]
+    assert minutes[3:].isna().all()
+
+
+def test_gaa_is_weighted_by_minutes_without_rounding_goals():
+    # 2.5 * 60 / 60 = 2.5 goals against; rounding each goalie to whole goals
+    # first would report a 3.00 GAA
+    summary = compute_team_summary(skaters(('A', 1, 0, 0, 0, 0)), goalies(('A', 2.5, '60', 20)))
+    assert summary.loc['A', 'gaa'] == 2.5
+    assert summary.loc['A', 'save_pct'] == round(20 / 22.5, 3)
+
+    # two goalies: (1.4 * 30 + 2.6 * 90) / 120
+    summary = compute_team_summary(skaters(('A', 2, 0, 0, 0, 0)),
+                                   goalies(('A', 1.4, '30:00', None), ('A', 2.6, '90', None)))
+    assert summary.loc['A', 'gaa'] == round((1.4 * 30 + 2.6 * 90) / 120, 2)
+    assert summary.loc['A', 'goalie_minutes'] == 120
+    assert pd.isna(summary.loc['A', 'save_pct'])
+
+
+def test_team_without_goalies_has_no_goaltending_figures():
+    summary = compute_team_summary(skaters(('A', 10, 5, 6, 11, 4), ('A', 8, 1, 1, 2, 0)), goalies())
+    row = summary.loc['A']
+    assert (row['skaters'], row['goalies'], row['games'], row['points']) == (2, 0, 10, 13)
+    assert row['points_per_game'] == 1.3
+    assert row[['goalie_minutes', 'goals_against', 'saves', 'save_pct', 'gaa']].isna().all()
+
+
+def test_import_backfills_nothing_and_api_fills_empty_summary(tmp_path):
+    """Importing ``team_summary`` against a database whose summary table is
+    empty must not go round ``models`` and back; the API fills it."""
+    path = tmp_path / 'empty_summary.db'
+    conn = sqlite3.connect(path)
+    # the scratch database is in WAL mode, so copy it through SQLite
+    with sqlite3.connect(models.DB_PATH) as source:
+        source.backup(conn)
+    teams = conn.execute("SELECT count(DISTINCT team) FROM player_stats").fetchone()[0]
+    conn.execute("DELETE FROM team_summary")
+    conn.commit()
+    conn.close()
+
+    env = dict(os.environ, NCAA_DB_PATH=str(path), PYTHONPATH=REPO)
+    for module in ('team_summary', 'bulk_load', 'main'):
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=REPO, env=env, check=True)
+        # team_summary and bulk_load only define things; main backfills
+        count = sqlite3.connect(path).execute("SELECT count(*) FROM team_summary").fetchone()[0]
+        assert count == (teams if module == 'main' else 0)